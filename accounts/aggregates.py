@@ -0,0 +1,67 @@
+"""
+Per-user aggregates cached in the ``aggregates`` and ``views`` aliases.
+
+Category item counts (``category_counts``) and the dashboard's "Running Out
+Soon" fragment are cached under a per-user version. Code that changes a
+user's items, categories, inventories or forecasts calls ``invalidate``,
+which bumps the version once the surrounding transaction commits; entries
+cached under older versions are never read again and expire on their own.
+
+The version is read from the shared tier, so a bump in one process is seen
+by every other process at once. The versioned entries never change, so they
+may be served from the per-process tier.
+"""
+
+import time
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .categories import categories_with_counts
+
+
+TIMEOUT = 60 * 60
+
+
+def _cache():
+    return caches['aggregates']
+
+
+def _version_key(user_id):
+    return f'aggregates:version:{user_id}'
+
+
+def version(user_id):
+    cache = _cache()
+    return getattr(cache, 'shared', cache).get(_version_key(user_id), 0)
+
+
+def _bump_version(user_id):
+    cache = _cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Seeded from the clock, like the autocomplete version, so a version
+        # lost to eviction never restarts at one already cached under.
+        if not cache.add(key, time.time_ns() // 1000, timeout=None):
+            cache.incr(key)
+
+
+def invalidate(user_id):
+    """Drop ``user_id``'s cached aggregates in every process once the change commits."""
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        transaction.on_commit(lambda: _bump_version(user_id))
+    else:
+        _bump_version(user_id)
+
+
+def category_counts(user):
+    """``categories_with_counts`` as ``[{'id', 'name', 'item_count'}]``, cached per user."""
+    cache = _cache()
+    key = f'aggregates:categories:{user.id}:{version(user.id)}'
+    counts = cache.get(key)
+    if counts is None:
+        counts = list(categories_with_counts(user).values('id', 'name', 'item_count'))
+        cache.set(key, counts, TIMEOUT)
+    return counts
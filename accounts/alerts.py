@@ -0,0 +1,88 @@
+"""
+Expiry and low-stock alert digests.
+
+``send_alert_digests`` runs a single query across every user's items for
+anything expiring within ``EXPIRY_ALERT_DAYS`` or at/below
+``LOW_STOCK_THRESHOLD`` that has not been alerted yet. Rows arrive ordered
+by user, so they are grouped while streaming and each user gets one
+digest. Delivered items are recorded in ``ItemAlert`` so later runs skip
+them until they are re-armed (new expiration date, or restocked).
+"""
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from django.utils import timezone
+
+from .models import Item, ItemAlert
+from .notifications import get_notifier
+
+
+def pending_alerts(today=None):
+    """Items owed an alert, with ``alert_expiring``/``alert_low_stock`` flags, ordered by user."""
+    today = today or timezone.localdate()
+    expiring = Q(expiration_date__gte=today, expiration_date__lte=today + timedelta(days=settings.EXPIRY_ALERT_DAYS))
+    low_stock = Q(quantity__lte=settings.LOW_STOCK_THRESHOLD)
+    expiry_sent = Exists(ItemAlert.objects.filter(
+        item=OuterRef('pk'), kind=ItemAlert.KIND_EXPIRING, expiration_date=OuterRef('expiration_date'),
+    ))
+    low_stock_sent = Exists(ItemAlert.objects.filter(item=OuterRef('pk'), kind=ItemAlert.KIND_LOW_STOCK))
+    return (
+        Item.objects.filter((expiring & ~expiry_sent) | (low_stock & ~low_stock_sent))
+        .filter(inventory__deleted_at__isnull=True, inventory__user__is_active=True)
+        .annotate(
+            alert_expiring=ExpressionWrapper(expiring & ~expiry_sent, output_field=BooleanField()),
+            alert_low_stock=ExpressionWrapper(low_stock & ~low_stock_sent, output_field=BooleanField()),
+        )
+        .select_related('inventory__user')
+        .order_by('inventory__user_id', 'expiration_date', 'name')
+    )
+
+
+def format_digest(expiring, low_stock):
+    lines = []
+    if expiring:
+        lines.append('Expiring soon:')
+        lines += [f'  - {item.name} ({item.inventory.name}) expires {item.expiration_date:%b %d, %Y}'
+                  for item in expiring]
+    if low_stock:
+        if lines:
+            lines.append('')
+        lines.append('Low on stock:')
+        lines += [f'  - {item.name} ({item.inventory.name}): {item.quantity} left' for item in low_stock]
+    count = len({item.id for item in expiring + low_stock})
+    return f'Inventory alert: {count} item{"s" if count != 1 else ""} need attention', '\n'.join(lines)
+
+
+def send_alert_digests(notifier=None, today=None):
+    """Send one digest per user with pending alerts. Returns the number of digests delivered."""
+    notifier = notifier or get_notifier()
+    # Restocked items may be reported as low on stock again later.
+    ItemAlert.objects.filter(
+        kind=ItemAlert.KIND_LOW_STOCK, item__quantity__gt=settings.LOW_STOCK_THRESHOLD,
+    ).delete()
+
+    delivered = 0
+    sent = []
+    rows = pending_alerts(today).iterator(chunk_size=2000)
+    for _, items in groupby(rows, key=lambda item: item.inventory.user_id):
+        items = list(items)
+        expiring = [item for item in items if item.alert_expiring]
+        low_stock = [item for item in items if item.alert_low_stock]
+        subject, body = format_digest(expiring, low_stock)
+        if not notifier.send(items[0].inventory.user, subject, body):
+            continue
+        delivered += 1
+        sent += [ItemAlert(item=item, kind=ItemAlert.KIND_EXPIRING, expiration_date=item.expiration_date)
+                 for item in expiring]
+        sent += [ItemAlert(item=item, kind=ItemAlert.KIND_LOW_STOCK) for item in low_stock]
+
+    if sent:
+        # An expiry alert for an earlier date is replaced by the new one.
+        ItemAlert.objects.bulk_create(
+            sent, update_conflicts=True, unique_fields=['item', 'kind'],
+            update_fields=['expiration_date', 'sent_at'], batch_size=500,
+        )
+    return delivered
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from . import backends  # noqa: F401  (connects user cache invalidation)
+        from . import ledger  # noqa: F401  (flushes buffered stock movements)
+
+        from django.conf import settings
+        if getattr(settings, 'WARMUP_ON_START', False):
+            from .warmup import warm_up
+            warm_up(include_connections=False)
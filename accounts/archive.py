@@ -0,0 +1,146 @@
+"""
+Archive tier for consumed and long-expired items.
+
+Every inventory page sorts and pages through the live ``Item`` table, so
+items nobody will use again are moved out of it into ``ArchivedItem``.
+``ARCHIVE_RULES`` decides which items are eligible:
+
+``consumed_after_days``
+    Quantity 0 and untouched for this many days.
+``expired_after_days``
+    Expired, and untouched, for this many days.
+
+A rule set to 0 (or left out) is off.
+
+``archive_items`` (the ``archive_items`` command) moves eligible items in
+batches of ``batch_size``, each in its own short transaction of
+set-based statements:
+
+- an ``INSERT ... SELECT`` into the archive, re-checking the rules, so an
+  item changed since the batch was chosen stays live;
+- DELETEs of the batch's forecasts and alert markers (derived data that
+  their jobs rebuild);
+- a DELETE of the live rows.
+
+Archived rows keep their id, so the stock ledger still refers to them.
+``restore_items`` moves rows back the same way. Restored items are stamped
+as updated now, so the rules leave them alone for another full period.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.db.models.fields import CharField, DateTimeField
+from django.utils import timezone
+
+from . import aggregates, autocomplete
+from .models import ArchivedItem, Item, ItemAlert, ItemForecast
+from .transfer import insert_select
+
+
+DEFAULT_BATCH_SIZE = 500
+
+# Columns shared by Item and ArchivedItem (ArchivedItem adds archived_at)
+COLUMNS = [f.column for f in Item._meta.concrete_fields]
+
+
+def archive_rule(now=None):
+    """A ``Q`` matching the items ``ARCHIVE_RULES`` archives, or None when every rule is off."""
+    rules = getattr(settings, 'ARCHIVE_RULES', {})
+    now = now or timezone.now()
+    rule = None
+    consumed = rules.get('consumed_after_days')
+    if consumed:
+        rule = Q(quantity__lte=0, updated_at__lt=now - timedelta(days=consumed))
+    expired = rules.get('expired_after_days')
+    if expired:
+        cutoff = now - timedelta(days=expired)
+        expired_rule = Q(expiration_date__lt=cutoff.date(), updated_at__lt=cutoff)
+        rule = expired_rule if rule is None else rule | expired_rule
+    return rule
+
+
+def _delete_where_id_in(model, ids_queryset):
+    """``DELETE FROM model WHERE id IN (<ids_queryset>)`` without loading rows (or cascading)."""
+    select_sql, params = ids_queryset.query.sql_with_params()
+    quote = connection.ops.quote_name
+    sql = f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote("id")} IN ({select_sql})'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def archive_batch(ids, rule, now):
+    """Archive the items among ``ids`` that still match ``rule``. Returns the number archived."""
+    with transaction.atomic():
+        rows = (
+            Item.objects.filter(rule, id__in=ids).order_by()
+            .annotate(archived_now=Value(now, output_field=DateTimeField()))
+            .values(*[f.attname for f in Item._meta.concrete_fields], 'archived_now')
+        )
+        archived = insert_select(ArchivedItem, COLUMNS + ['archived_at'], rows)
+        if not archived:
+            return 0
+        moved = ArchivedItem.objects.filter(id__in=ids).values('id')
+        ItemForecast.objects.filter(item_id__in=moved).delete()
+        ItemAlert.objects.filter(item_id__in=moved).delete()
+        _delete_where_id_in(Item, Item.objects.filter(id__in=moved).values('id'))
+    return archived
+
+
+def archive_items(batch_size=DEFAULT_BATCH_SIZE, now=None, log=None):
+    """Archive every live item matching ``ARCHIVE_RULES``. Returns the number archived."""
+    now = now or timezone.now()
+    rule = archive_rule(now)
+    if rule is None:
+        return 0
+    total = 0
+    last_id = 0
+    while True:
+        rows = list(
+            Item.objects.filter(rule, id__gt=last_id, inventory__deleted_at__isnull=True)
+            .order_by('id').values_list('id', 'inventory__user_id')[:batch_size]
+        )
+        if not rows:
+            return total
+        last_id = rows[-1][0]
+        archived = archive_batch([pk for pk, _ in rows], rule, now)
+        for user_id in {user_id for _, user_id in rows}:
+            autocomplete.invalidate(user_id)
+            aggregates.invalidate(user_id)
+        total += archived
+        if log:
+            log(f'{archived} item(s) up to id {last_id}')
+
+
+def restore_items(inventory, ids):
+    """
+    Move the archived items among ``ids`` back into ``inventory``. Returns the number restored.
+
+    A restored item whose barcode a live item (or another item restored
+    with it) now uses comes back without a barcode.
+    """
+    now = timezone.now()
+    archived = ArchivedItem.objects.filter(inventory=inventory, id__in=ids)
+    taken = Q(Exists(
+        Item.objects.filter(inventory=inventory, barcode=OuterRef('barcode')).exclude(barcode='')
+    )) | Q(Exists(
+        archived.filter(barcode=OuterRef('barcode'), id__lt=OuterRef('id')).exclude(barcode='')
+    ))
+    fields = [f for f in Item._meta.concrete_fields if f.name not in ('barcode', 'updated_at')]
+    with transaction.atomic():
+        rows = (
+            archived.order_by()
+            .annotate(
+                new_barcode=Case(When(taken, then=Value('')), default=F('barcode'), output_field=CharField()),
+                new_updated_at=Value(now, output_field=DateTimeField()),
+            )
+            .values(*[f.attname for f in fields], 'new_barcode', 'new_updated_at')
+        )
+        restored = insert_select(Item, [f.column for f in fields] + ['barcode', 'updated_at'], rows)
+        archived.delete()
+    autocomplete.invalidate(inventory.user_id)
+    aggregates.invalidate(inventory.user_id)
+    return restored
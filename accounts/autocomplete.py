@@ -0,0 +1,241 @@
+"""
+Typeahead suggestions for item names and brands.
+
+``suggest(user, prefix)`` returns the user's most used distinct names and
+brands starting with ``prefix`` (case-insensitive, most items first).
+
+Each process keeps a ``PrefixIndex`` per recently active user: a sorted
+list of normalized values, so the matches for a prefix are one contiguous
+slice found with two bisections. A user's first request is answered from
+the database instead, with a range scan on the ``(inventory, lower(name))``
+and ``(inventory, lower(brand))`` indexes, and the user's index is built
+when that request finishes (``request_finished``), so no keystroke waits
+for it.
+
+Every change bumps a per-user version in the ``default`` cache once its
+transaction commits. Item views report what changed (``item_saved``,
+``item_deleted``) so this process patches its index in place; bulk
+operations (copies, batches, inventory duplication and deletion) call
+``invalidate`` and the index is rebuilt. Other processes notice the new
+version, within that cache's local timeout, and rebuild theirs.
+"""
+
+import bisect
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+from django.dispatch import receiver
+
+from .models import Item
+
+
+FIELDS = ('name', 'brand')
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Sorts after every character, so [prefix, prefix + _END) holds exactly the keys starting with prefix.
+_END = '\U0010ffff'
+
+_indexes = OrderedDict()  # user id -> (version, {field: PrefixIndex})
+_pending = set()  # users to build when the current request finishes
+_lock = threading.Lock()
+
+
+def normalize(value):
+    # Must match Lower() in query_prefix, so both paths group values the same way
+    return value.lower()
+
+
+class PrefixIndex:
+    """Distinct values of one field for one user, with item counts, searchable by prefix."""
+
+    def __init__(self):
+        self.keys = []  # sorted normalized values
+        self.spellings = {}  # normalized value -> Counter of original spellings
+
+    def add(self, value, count=1):
+        key = normalize(value)
+        if not key:
+            return
+        spellings = self.spellings.get(key)
+        if spellings is None:
+            spellings = self.spellings[key] = Counter()
+            bisect.insort(self.keys, key)
+        spellings[value] += count
+
+    def remove(self, value):
+        key = normalize(value)
+        spellings = self.spellings.get(key)
+        if spellings is None:
+            return
+        spellings[value] -= 1
+        if spellings[value] <= 0:
+            del spellings[value]
+        if not spellings:
+            del self.spellings[key]
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def top(self, prefix, limit=DEFAULT_LIMIT):
+        """The ``limit`` values starting with ``prefix`` used by most items (ties alphabetical)."""
+        prefix = normalize(prefix.strip())
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + _END, start)
+        total = {key: self.spellings[key].total() for key in self.keys[start:end]}
+        best = heapq.nsmallest(limit, total, key=lambda key: (-total[key], key))
+        # Shown as the alphabetically first spelling, as the database path does (Min)
+        return [min(self.spellings[key]) for key in best]
+
+
+def clear_cache():
+    with _lock:
+        _indexes.clear()
+        _pending.clear()
+
+
+def _version_key(user_id):
+    return f'autocomplete:version:{user_id}'
+
+
+def _version(user_id):
+    return cache.get(_version_key(user_id), 0)
+
+
+def build(user):
+    """Load every distinct name and brand of ``user``'s live items into fresh indexes (one query)."""
+    version = _version(user.id)
+    indexes = {field: PrefixIndex() for field in FIELDS}
+    rows = Item.objects.owned_by(user).order_by().values_list(*FIELDS).annotate(count=Count('id'))
+    for name, brand, count in rows:
+        indexes['name'].add(name, count)
+        indexes['brand'].add(brand, count)
+    _store(user.id, version, indexes)
+    return indexes
+
+
+def _store(user_id, version, indexes):
+    with _lock:
+        _indexes[user_id] = (version, indexes)
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > getattr(settings, 'AUTOCOMPLETE_USERS', 500):
+            _indexes.popitem(last=False)
+
+
+def cached_indexes(user_id):
+    """The user's current indexes in this process, or None if missing or outdated."""
+    with _lock:
+        entry = _indexes.get(user_id)
+    if entry is None:
+        return None
+    version, indexes = entry
+    if version != _version(user_id):
+        with _lock:
+            _indexes.pop(user_id, None)
+        return None
+    with _lock:
+        if user_id in _indexes:
+            _indexes.move_to_end(user_id)
+    return indexes
+
+
+def query_prefix(user, field, prefix, limit=DEFAULT_LIMIT):
+    """The database path: an index range scan on ``lower(field)`` per inventory."""
+    prefix = normalize(prefix.strip())
+    rows = (
+        Item.objects.owned_by(user)
+        .annotate(key=Lower(field))
+        .filter(key__gte=prefix, key__lt=prefix + _END)
+        .values('key')
+        .annotate(count=Count('id'), display=Min(field))
+        .order_by('-count', 'key')[:limit]
+    )
+    return [row['display'] for row in rows]
+
+
+def suggest(user, prefix, fields=FIELDS, limit=DEFAULT_LIMIT):
+    """``{field: [value, ...]}`` for each of ``fields``."""
+    indexes = cached_indexes(user.id)
+    if indexes is not None:
+        with _lock:
+            return {field: indexes[field].top(prefix, limit) for field in fields}
+    with _lock:
+        _pending.add(user)
+    return {field: query_prefix(user, field, prefix, limit) for field in fields}
+
+
+@receiver(request_finished)
+def build_pending(**kwargs):
+    if not _pending:
+        return
+    with _lock:
+        users = list(_pending)
+        _pending.clear()
+    for user in users:
+        if cached_indexes(user.id) is None:
+            build(user)
+
+
+def _on_commit(func):
+    # Same rule as the stock ledger: only act on committed changes.
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        transaction.on_commit(func)
+    else:
+        func()
+
+
+def _bump_version(user_id):
+    key = _version_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Seeded from the clock, not 1: a version lost to eviction must never
+        # restart at a number an older index in some process was built under.
+        seed = time.time_ns() // 1000
+        return seed if cache.add(key, seed, timeout=None) else cache.incr(key)
+
+
+def _changed(user_id, added=(), removed=(), patch=True):
+    """
+    Bump the user's version so other processes rebuild, and patch this
+    process's index in place when it was current up to this change.
+    """
+    def apply():
+        version = _bump_version(user_id)
+        with _lock:
+            entry = _indexes.pop(user_id, None)
+            if not patch or entry is None or entry[0] != version - 1:
+                return
+            indexes = entry[1]
+            for values in removed:
+                for field, value in zip(FIELDS, values):
+                    indexes[field].remove(value)
+            for values in added:
+                for field, value in zip(FIELDS, values):
+                    indexes[field].add(value)
+            _indexes[user_id] = (version, indexes)
+    _on_commit(apply)
+
+
+def item_saved(user_id, item, previous=None):
+    """Record that ``item`` was created (``previous`` None) or changed from ``(name, brand)``."""
+    current = (item.name, item.brand)
+    if previous == current:
+        return
+    _changed(user_id, added=[current], removed=[previous] if previous is not None else [])
+
+
+def item_deleted(user_id, items):
+    """Record that ``items`` (each with ``name`` and ``brand``) are gone."""
+    _changed(user_id, removed=[(item.name, item.brand) for item in items])
+
+
+def invalidate(user_id):
+    """Drop ``user_id``'s indexes in every process; they are rebuilt on the next request."""
+    _changed(user_id, patch=False)
@@ -0,0 +1,102 @@
+"""
+Authentication backend that signs users in by email address.
+
+Users are resolved with a single query against the functional
+``LOWER(email)`` unique index created in migration 0006, so login,
+registration and email changes all share one case-insensitive, indexed
+lookup instead of scanning ``auth_user``.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+EMAIL_INDEX_NAME = 'auth_user_email_lower_uniq'
+
+UserModel = get_user_model()
+
+
+def normalize_email_key(email):
+    """Return the value stored in the ``LOWER(email)`` index for ``email``."""
+    return (email or '').strip().lower()
+
+
+def users_by_email(email):
+    """Queryset of users whose email matches ``email`` case-insensitively."""
+    # Excluding blank emails matches the partial index predicate, which
+    # the planner needs to see before it will use the index.
+    return UserModel._default_manager.annotate(
+        email_lower=Lower('email'),
+    ).filter(email_lower=normalize_email_key(email)).exclude(email='')
+
+
+def get_user_by_email(email):
+    """Return the user owning ``email`` or None."""
+    if not normalize_email_key(email):
+        return None
+    return users_by_email(email).first()
+
+
+def email_in_use(email, exclude_user_id=None):
+    """True if another account already uses ``email`` (case-insensitive)."""
+    users = users_by_email(email)
+    if exclude_user_id is not None:
+        users = users.exclude(pk=exclude_user_id)
+    return users.exists()
+
+
+def _user_cache_key(user_id):
+    return f'accounts:auth-user:{user_id}'
+
+
+def _user_cache():
+    # Only the shared tier: the invalidation below clears the local tier of
+    # the saving process alone, and a copy held by another process would keep
+    # a deactivated user (or an old password hash) signed in.
+    return getattr(cache, 'shared', cache)
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate with ``email`` and ``password``.
+
+    ``get_user`` (run by the authentication middleware on every request) is
+    served from the shared cache tier for ``AUTH_USER_CACHE_TIMEOUT``
+    seconds; entries are dropped whenever the user row is saved or deleted.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        user = get_user_by_email(email)
+        if user is None:
+            # Run the hasher once anyway so response time does not reveal
+            # whether the address is registered.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return super().get_user(user_id)
+        key = _user_cache_key(user_id)
+        user = _user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                _user_cache().set(key, user, timeout)
+        return user
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def invalidate_cached_user(sender, instance, **kwargs):
+    _user_cache().delete(_user_cache_key(instance.pk))
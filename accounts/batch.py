@@ -0,0 +1,201 @@
+"""
+Batched item operations for one inventory.
+
+A batch is an ordered list of operations::
+
+    {"op": "quantity", "item_id": 7, "delta": -2}
+    {"op": "update",   "item_id": 7, "fields": {"brand": "ACME"}}
+    {"op": "delete",   "item_id": 9}
+    {"op": "create",   "fields": {"name": "Rice", "quantity": 3}}
+
+Every referenced item is loaded (and row-locked) with one query, the
+operations are applied in order to those in-memory rows, and the net
+result is written inside a single transaction with set-based statements:
+one ``bulk_update`` for changed rows, one ``bulk_create`` for new rows and
+one ``DELETE`` for removed rows, however many operations touched them.
+
+``ItemForm`` only checks barcodes against rows already in the database, so
+the batch also tracks which operation claimed each barcode it assigns; a
+second operation giving the same barcode to another item is rejected.
+"""
+
+import copy
+
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .forms import BARCODE_TAKEN, ItemForm
+from .ledger import movement, record_movements
+from .models import Item, StockMovement
+
+
+MAX_OPERATIONS = 500
+
+EDITABLE_FIELDS = ('name', 'quantity', 'category', 'brand', 'barcode', 'description', 'expiration_date')
+
+
+class BatchError(ValueError):
+    """Raised for a malformed operation; reported in that operation's result."""
+
+
+def _item_id(op):
+    try:
+        return int(op['item_id'])
+    except (KeyError, TypeError, ValueError):
+        raise BatchError('item_id is required')
+
+
+def _fields(op):
+    fields = op.get('fields')
+    if not isinstance(fields, dict) or not fields:
+        raise BatchError('fields must be a non-empty object')
+    unknown = set(fields) - set(EDITABLE_FIELDS)
+    if unknown:
+        raise BatchError(f'Unknown field(s): {", ".join(sorted(unknown))}')
+    return fields
+
+
+class ItemBatch:
+    def __init__(self, inventory):
+        self.inventory = inventory
+        self.items = {}
+        self.opening = {}
+        self.dirty = {}
+        self.deleted = set()
+        self.created = []
+        self.barcodes = {}
+
+    def _claim_barcode(self, item, barcode, previous=''):
+        # ``item`` is the in-memory row (new or existing) that takes ``barcode``.
+        if previous and self.barcodes.get(previous) is item:
+            del self.barcodes[previous]
+        if barcode and self.barcodes.setdefault(barcode, item) is not item:
+            raise BatchError({'barcode': [{'message': BARCODE_TAKEN, 'code': 'unique'}]})
+
+    def _existing(self, op):
+        item_id = _item_id(op)
+        if item_id not in self.items or item_id in self.deleted:
+            raise BatchError('Item not found')
+        return self.items[item_id]
+
+    def op_quantity(self, op):
+        item = self._existing(op)
+        try:
+            delta = int(op.get('delta'))
+        except (TypeError, ValueError):
+            raise BatchError('delta must be an integer')
+        item.quantity = max(0, item.quantity + delta)
+        self.dirty.setdefault(item.id, set()).add('quantity')
+        return {'item_id': item.id, 'quantity': item.quantity}
+
+    def op_update(self, op):
+        item = self._existing(op)
+        data = model_to_dict(item, fields=EDITABLE_FIELDS)
+        data.update(_fields(op))
+        # Validate against a copy: ModelForm writes cleaned values into its
+        # instance even when validation fails.
+        form = ItemForm(data=data, instance=copy.copy(item), user=self.inventory.user_id)
+        if not form.is_valid():
+            raise BatchError(form.errors.get_json_data())
+        changed = set(form.changed_data) & set(EDITABLE_FIELDS)
+        if 'barcode' in changed:
+            self._claim_barcode(item, form.cleaned_data['barcode'], previous=item.barcode)
+        for field in changed:
+            setattr(item, field, form.cleaned_data[field])
+        self.dirty.setdefault(item.id, set()).update(changed)
+        return {'item_id': item.id, 'quantity': item.quantity}
+
+    def op_delete(self, op):
+        item = self._existing(op)
+        self._claim_barcode(item, '', previous=item.barcode)
+        self.deleted.add(item.id)
+        self.dirty.pop(item.id, None)
+        return {'item_id': item.id}
+
+    def op_create(self, op):
+        form = ItemForm(data=_fields(op), user=self.inventory.user_id, inventory=self.inventory)
+        if not form.is_valid():
+            raise BatchError(form.errors.get_json_data())
+        item = form.save(commit=False)
+        item.inventory = self.inventory
+        self._claim_barcode(item, item.barcode)
+        self.created.append(item)
+        return {'name': item.name, 'quantity': item.quantity}
+
+    def run(self, operations, atomic=False):
+        if not isinstance(operations, list):
+            raise BatchError('operations must be a list')
+        if len(operations) > MAX_OPERATIONS:
+            raise BatchError(f'At most {MAX_OPERATIONS} operations per batch')
+
+        with transaction.atomic():
+            ids = set()
+            for op in operations:
+                if isinstance(op, dict) and 'item_id' in op:
+                    try:
+                        ids.add(int(op['item_id']))
+                    except (TypeError, ValueError):
+                        pass
+            if ids:
+                self.items = Item.objects.select_for_update().filter(inventory=self.inventory).in_bulk(ids)
+                self.opening = {pk: item.quantity for pk, item in self.items.items()}
+
+            results = []
+            created_results = []
+            for index, op in enumerate(operations):
+                handler = getattr(self, f'op_{op.get("op")}', None) if isinstance(op, dict) else None
+                try:
+                    if handler is None:
+                        raise BatchError('Unknown operation')
+                    result = handler(op)
+                except BatchError as exc:
+                    results.append({'index': index, 'success': False, 'error': exc.args[0]})
+                    continue
+                results.append({'index': index, 'success': True, **result})
+                if op['op'] == 'create':
+                    created_results.append((results[-1], self.created[-1]))
+
+            if atomic and not all(r['success'] for r in results):
+                transaction.set_rollback(True)
+                return results, False
+
+            self.write()
+            for result, item in created_results:
+                result['item_id'] = item.id
+        return results, True
+
+    def write(self):
+        now = timezone.now()
+        if self.dirty:
+            fields = set().union(*self.dirty.values())
+            changed = [self.items[pk] for pk in self.dirty]
+            if fields:
+                for item in changed:
+                    item.updated_at = now
+                Item.objects.bulk_update(changed, sorted(fields) + ['updated_at'])
+        if self.created:
+            Item.objects.bulk_create(self.created)
+        if self.deleted:
+            Item.objects.filter(id__in=self.deleted, inventory=self.inventory).delete()
+        record_movements(self.movements())
+
+    def movements(self):
+        changes = []
+        for pk, item in self.items.items():
+            if item.quantity != self.opening[pk]:
+                changes.append(movement(item, StockMovement.KIND_ADJUST, item.quantity - self.opening[pk]))
+            if pk in self.deleted:
+                changes.append(movement(item, StockMovement.KIND_DELETE, -item.quantity))
+        changes.extend(movement(item, StockMovement.KIND_CREATE, item.quantity) for item in self.created)
+        return changes
+
+
+def apply_item_operations(inventory, operations, atomic=False):
+    """
+    Apply ``operations`` to ``inventory``.
+
+    Returns ``(results, committed)``. Invalid operations are reported and
+    skipped; with ``atomic=True`` any failure leaves the database untouched.
+    """
+    return ItemBatch(inventory).run(operations, atomic=atomic)
@@ -0,0 +1,214 @@
+"""
+Two-tier cache backend with per-alias hit/miss counters.
+
+Every alias configured with ``TieredCache`` keeps a bounded, LRU-evicted
+in-process tier in front of a shared tier (file-based by default, or any
+other Django cache backend such as a memcached instance on a local socket).
+Reads are answered from the local tier when possible and fall back to the
+shared tier, whose value is then promoted locally for at most
+``LOCAL_TIMEOUT`` seconds. Writes go to both tiers.
+
+Counters are kept per process and per alias; ``cache_stats()`` returns a
+snapshot used to size the aliases.
+
+The file-based shared tier is ``CounterFileBasedCache``: Django's
+``FileBasedCache`` with ``add`` and ``incr`` made atomic across processes,
+so throttle buckets and version counters are not lost to concurrent
+requests.
+"""
+
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.files import locks
+from django.utils.module_loading import import_string
+
+
+_stats = defaultdict(lambda: defaultdict(int))
+_stats_lock = threading.Lock()
+
+
+def _count(alias, counter, amount=1):
+    with _stats_lock:
+        _stats[alias][counter] += amount
+
+
+def cache_stats():
+    """Return ``{alias: {counter: value}}`` for every tiered cache in this process."""
+    with _stats_lock:
+        snapshot = {alias: dict(counters) for alias, counters in _stats.items()}
+    for counters in snapshot.values():
+        lookups = counters.get('local_hits', 0) + counters.get('shared_hits', 0) + counters.get('misses', 0)
+        hits = lookups - counters.get('misses', 0)
+        counters['hit_ratio'] = round(hits / lookups, 4) if lookups else None
+    return snapshot
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class CountingLocMemCache(LocMemCache):
+    """LocMemCache (already LRU ordered) that records how many entries it evicts."""
+
+    def __init__(self, name, params, alias):
+        super().__init__(name, params)
+        self._alias = alias
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        _count(self._alias, 'local_evictions', before - len(self._cache))
+
+
+class CounterFileBasedCache(FileBasedCache):
+    """
+    FileBasedCache with ``add`` and ``incr`` that are atomic across processes.
+
+    Both run under an exclusive lock on one lock file in the cache directory,
+    and ``incr`` keeps the entry's expiry instead of resetting it to the
+    alias default. Plain ``get``/``set`` are unchanged (writes are already
+    atomic renames).
+    """
+
+    lock_name = 'counters.lock'  # not a *.djcache file, so clear() and culling leave it alone
+
+    @contextmanager
+    def _counter_lock(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._counter_lock():
+            return super().add(key, value, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._counter_lock():
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError(f"Key '{key}' not found")
+            remaining = None if expiry is None else expiry - time.time()
+            if remaining is not None and remaining <= 0:
+                self._delete(fname)
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            self.set(key, value, remaining, version=version)
+        return value
+
+
+# Backends whose incr is a single atomic operation (LocMemCache only within one process)
+ATOMIC_INCR_BACKENDS = (CounterFileBasedCache, BaseMemcachedCache, RedisCache, LocMemCache)
+
+
+def has_atomic_incr(cache):
+    """True if ``cache`` (or the shared tier of a ``TieredCache``) increments atomically."""
+    return isinstance(getattr(cache, 'shared', cache), ATOMIC_INCR_BACKENDS)
+
+
+class TieredCache(BaseCache):
+    """
+    ``LOCATION`` names the alias (used for the local tier and for stats).
+
+    OPTIONS:
+        LOCAL_MAX_ENTRIES  size bound of the in-process LRU tier
+        LOCAL_TIMEOUT      max seconds a value may be served locally
+        SHARED             a regular CACHES entry for the shared tier
+
+    ``incr``/``decr`` are delegated to the shared backend's own ``incr``, so
+    they are exactly as atomic as that backend (``has_atomic_incr``):
+    memcached and ``CounterFileBasedCache`` increment atomically and keep the
+    key's expiry, but a backend relying on ``BaseCache.incr`` (such as plain
+    ``FileBasedCache``) does a get followed by a set, which can lose
+    concurrent increments and resets the expiry to the alias default.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.alias = location
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self.local = CountingLocMemCache(
+            f'tiered:{location}',
+            {'TIMEOUT': self.local_timeout, 'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)}},
+            alias=location,
+        )
+        shared = dict(options['SHARED'])
+        backend = import_string(shared.pop('BACKEND'))
+        self.shared = backend(shared.pop('LOCATION', ''), shared)
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = self.local.get(key, sentinel, version=version)
+        if value is not sentinel:
+            _count(self.alias, 'local_hits')
+            return value
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            _count(self.alias, 'misses')
+            return default
+        _count(self.alias, 'shared_hits')
+        self.local.set(key, value, self._local_timeout(DEFAULT_TIMEOUT), version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        _count(self.alias, 'sets')
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._local_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            _count(self.alias, 'sets')
+            self.local.set(key, value, self._local_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.touch(key, self._local_timeout(timeout), version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.local.has_key(key, version=version) or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters must stay consistent across processes, so they are only
+        # ever served by the shared tier (atomic only if that backend is).
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
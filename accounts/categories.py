@@ -0,0 +1,61 @@
+"""
+Category lookups and maintenance.
+
+Names are unique per user regardless of case, enforced by the
+``category_user_name_ci_uniq`` index on ``(user_id, LOWER(name))``. Lookups
+compare ``Lower('name')`` with ``name.lower()`` so they are answered by that
+index rather than a scan. Merging and reassigning move items with a single
+UPDATE (plus one for archived items, which follow their category too).
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+from .models import ArchivedItem, Category, Item
+
+
+def categories_by_name(user, name):
+    return (
+        Category.objects.filter(user=user)
+        .annotate(name_lower=Lower('name')).filter(name_lower=name.strip().lower())
+    )
+
+
+def category_name_taken(user, name, exclude_id=None):
+    categories = categories_by_name(user, name)
+    if exclude_id is not None:
+        categories = categories.exclude(id=exclude_id)
+    return categories.exists()
+
+
+def categories_with_counts(user):
+    """The user's categories with ``item_count`` (live inventories only), in one query."""
+    return (
+        Category.objects.filter(user=user)
+        .annotate(item_count=Count('items', filter=Q(items__inventory__deleted_at__isnull=True)))
+        .order_by('name')
+    )
+
+
+def merge_categories(source, target):
+    """Move every item (live or archived) of ``source`` to ``target`` and delete ``source``. Returns live items moved."""
+    with transaction.atomic():
+        moved = Item.objects.filter(category=source).update(category=target)
+        ArchivedItem.objects.filter(category=source).update(category=target)
+        source.delete()
+    return moved
+
+
+def delete_category(category, reassign_to=None):
+    """
+    Delete ``category``; its items move to ``reassign_to`` or become uncategorized.
+
+    Returns the number of items reassigned.
+    """
+    if reassign_to is not None:
+        return merge_categories(category, reassign_to)
+    with transaction.atomic():
+        moved = Item.objects.filter(category=category).update(category=None)
+        category.delete()
+    return moved
@@ -0,0 +1,40 @@
+"""
+Bounded thread pool for blocking work started from async views.
+
+Image decoding/resizing and storage reads/writes do not release the event
+loop on their own. ``run_blocking`` hands them to a small, process-wide
+pool (``BLOCKING_IO_WORKERS`` threads) so a burst of uploads cannot spawn
+an unbounded number of threads or starve the ORM's own sync thread.
+
+Functions run here must not touch the database: ORM access from async
+views goes through Django's ``a*`` methods instead.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BLOCKING_IO_WORKERS', 4),
+                    thread_name_prefix='blocking-io',
+                )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the bounded pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
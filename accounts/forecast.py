@@ -0,0 +1,126 @@
+"""
+Consumption forecasts and reorder suggestions.
+
+``forecast_user`` reads every item a user owns and its consumption over the
+last ``FORECAST_WINDOW_DAYS`` days with two aggregate queries, projects all
+stock-out dates at once on column arrays (NumPy when it is installed, an
+equivalent pure-Python path otherwise) and upserts the ``ItemForecast``
+rows in one statement. Pages only read those stored rows.
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import aggregates
+from .ledger import CONSUMED
+from .models import Item, ItemForecast, StockMovement
+
+try:
+    import numpy as np
+except ImportError:  # in requirements.txt; the pure-Python projection is a fallback
+    np = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def project(quantities, consumed, ages, window_days, lead_days, cover_days):
+    """
+    Project stock-outs for parallel columns of per-item values.
+
+    ``ages`` are item ages in days; consumption is averaged over the part of
+    the window the item existed for. Returns ``(daily_rates, days_left,
+    reorder_quantities)`` where ``days_left`` is None for items nobody uses.
+    """
+    if np is not None:
+        return _project_numpy(quantities, consumed, ages, window_days, lead_days, cover_days)
+    return _project_python(quantities, consumed, ages, window_days, lead_days, cover_days)
+
+
+def _project_numpy(quantities, consumed, ages, window_days, lead_days, cover_days):
+    qty = np.asarray(quantities, dtype=float)
+    observed = np.clip(np.asarray(ages, dtype=float), 1, window_days)
+    rates = np.asarray(consumed, dtype=float) / observed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_left = np.where(rates > 0, np.floor(qty / rates), np.inf)
+    reorder = np.where(days_left <= lead_days, np.maximum(np.ceil(rates * cover_days) - qty, 0), 0)
+    return (
+        rates.tolist(),
+        [None if math.isinf(d) else int(d) for d in days_left.tolist()],
+        reorder.astype(int).tolist(),
+    )
+
+
+def _project_python(quantities, consumed, ages, window_days, lead_days, cover_days):
+    rates = [c / min(max(a, 1), window_days) for c, a in zip(consumed, ages)]
+    days_left = [math.floor(q / r) if r > 0 else None for q, r in zip(quantities, rates)]
+    reorder = [
+        max(math.ceil(r * cover_days) - q, 0) if d is not None and d <= lead_days else 0
+        for q, r, d in zip(quantities, rates, days_left)
+    ]
+    return rates, days_left, reorder
+
+
+def forecast_user(user_id, now=None):
+    """Recompute and store forecasts for every item of one user. Returns the item count."""
+    now = now or timezone.now()
+    window_days = _setting('FORECAST_WINDOW_DAYS', 30)
+    items = list(
+        Item.objects.filter(inventory__user_id=user_id, inventory__deleted_at__isnull=True).order_by()
+        .values_list('id', 'quantity', 'created_at')
+    )
+    if not items:
+        return 0
+    used = dict(
+        StockMovement.objects.filter(
+            item__inventory__user_id=user_id,
+            created_at__gte=now - timedelta(days=window_days),
+            kind=StockMovement.KIND_ADJUST,
+            delta__lt=0,
+        ).values('item_id').annotate(used=CONSUMED).order_by().values_list('item_id', 'used')
+    )
+
+    ids, quantities, created = zip(*items)
+    rates, days_left, reorder = project(
+        quantities,
+        [used.get(pk, 0) for pk in ids],
+        [(now - c).total_seconds() / 86400 for c in created],
+        window_days,
+        _setting('FORECAST_LEAD_DAYS', 7),
+        _setting('FORECAST_COVER_DAYS', 14),
+    )
+
+    today = timezone.localdate(now)
+    ItemForecast.objects.bulk_create(
+        [
+            ItemForecast(
+                item_id=pk,
+                daily_rate=rate,
+                runs_out_on=today + timedelta(days=left) if left is not None else None,
+                reorder_quantity=amount,
+                computed_at=now,
+            )
+            for pk, rate, left, amount in zip(ids, rates, days_left, reorder)
+        ],
+        update_conflicts=True,
+        unique_fields=['item'],
+        update_fields=['daily_rate', 'runs_out_on', 'reorder_quantity', 'computed_at'],
+        batch_size=500,
+    )
+    aggregates.invalidate(user_id)
+    return len(ids)
+
+
+def run_forecasts(now=None):
+    """Forecast every user that owns items. Returns the number of items forecast."""
+    user_ids = (
+        User.objects.filter(is_active=True, inventories__deleted_at__isnull=True, inventories__items__isnull=False)
+        .distinct()
+        .order_by('id').values_list('id', flat=True)
+    )
+    return sum(forecast_user(user_id, now=now) for user_id in user_ids.iterator())
@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from .models import Item
+from .backends import email_in_use
+from .models import Category, Item
 from .validators import StrongPasswordValidator
 
 
@@ -51,7 +52,7 @@ class RegisterForm(forms.Form):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if email_in_use(email):
             raise ValidationError('This email is already registered.')
         return email
 
@@ -99,22 +100,42 @@ class LoginForm(forms.Form):
 
 
 
+BARCODE_TAKEN = 'Another item in this inventory already has this barcode.'
+
 
 class ItemForm(forms.ModelForm):
     remove_image = forms.BooleanField(required=False, initial=False)
 
     class Meta:
         model = Item
-        fields = ('name', 'quantity', 'brand', 'description', 'expiration_date', 'image')
+        fields = ('name', 'quantity', 'category', 'brand', 'barcode', 'description', 'expiration_date', 'image')
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Item name'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
+            'category': forms.Select(attrs={'class': 'form-select'}),
             'brand': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Brand (optional)'}),
+            'barcode': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Barcode / UPC (optional)'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Description (optional)'}),
             'expiration_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'image': forms.ClearableFileInput(attrs={'class': 'form-control'}),
         }
 
+    def __init__(self, *args, user=None, inventory=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the owner's categories can be chosen.
+        self.fields['category'].queryset = (
+            Category.objects.filter(user=user) if user is not None else Category.objects.none()
+        )
+        self.inventory_id = inventory.id if inventory is not None else self.instance.inventory_id
+
+    def clean_barcode(self):
+        barcode = (self.cleaned_data.get('barcode') or '').strip()
+        if barcode and self.inventory_id is not None:
+            taken = Item.objects.filter(inventory_id=self.inventory_id, barcode=barcode).exclude(pk=self.instance.pk)
+            if taken.exists():
+                raise ValidationError(BARCODE_TAKEN, code='unique')
+        return barcode
+
     def clean_quantity(self):
         q = self.cleaned_data.get('quantity')
         if q is None:
@@ -0,0 +1,62 @@
+"""
+Password hashers whose cost is driven by settings.
+
+``PASSWORD_HASHER`` picks the preferred algorithm (see settings.py) and the
+classes below read their cost parameters from settings at hash time. Django
+re-encodes a stored hash on the next successful ``check_password`` whenever
+its algorithm or cost differs from the preferred hasher, so changing these
+settings upgrades (or downgrades) existing accounts transparently as users
+sign in.
+"""
+
+from django.conf import settings
+from django.contrib.auth import update_session_auth_hash
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with ``PASSWORD_PBKDF2_ITERATIONS`` iterations."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
+
+
+class TunableScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with an ``N`` of ``PASSWORD_SCRYPT_WORK_FACTOR`` (a power of two)."""
+
+    @property
+    def work_factor(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', None) or ScryptPasswordHasher.work_factor
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with ``PASSWORD_ARGON2_TIME_COST`` / ``PASSWORD_ARGON2_MEMORY_COST``."""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_TIME_COST', None) or Argon2PasswordHasher.time_cost
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', None) or Argon2PasswordHasher.memory_cost
+
+
+def verify_password(request, raw_password):
+    """
+    Check ``raw_password`` against the signed-in user, hashing it once.
+
+    If the check upgrades the stored hash, the session's auth hash is
+    refreshed so the user is not signed out by the upgrade.
+    """
+    user = request.user
+    encoded = user.password
+    if not user.check_password(raw_password):
+        return False
+    if user.password != encoded:
+        update_session_auth_hash(request, user)
+    return True
@@ -0,0 +1,132 @@
+"""
+Responsive image variants for item pictures.
+
+Every uploaded item image is resized once, at save time, to a small set of
+widths (``ITEM_IMAGE_VARIANT_WIDTHS``). The resulting storage names are kept
+on the Item itself, so templates and JSON APIs can emit a full ``srcset``
+from the row alone, without a thumbnail-engine lookup per variant.
+
+Variants live under ``variants/<source name>/<width>.jpg`` which makes the
+source image recoverable from any variant path.
+"""
+
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+VARIANT_ROOT = 'variants'
+DEFAULT_WIDTHS = (160, 320, 640)
+
+
+def variant_widths():
+    return tuple(sorted(getattr(settings, 'ITEM_IMAGE_VARIANT_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def variant_name(source_name, width):
+    """Return the storage name of the ``width`` variant of ``source_name``."""
+    return posixpath.join(VARIANT_ROOT, source_name, f'{width}.jpg')
+
+
+def source_name_for_variant(name):
+    """Map a variant storage name back to its source image, or return None."""
+    prefix = VARIANT_ROOT + '/'
+    if not name.startswith(prefix):
+        return None
+    source = posixpath.dirname(name[len(prefix):])
+    return source or None
+
+
+def build_variants(image_field):
+    """
+    Render and store every configured width for ``image_field``.
+
+    Widths larger than the original are skipped (apart from the smallest,
+    so there is always at least one variant). Returns a ``{width: name}``
+    mapping with string keys, ready to be stored in a JSONField.
+    """
+    from PIL import Image, ImageOps
+
+    image_field.open('rb')
+    try:
+        with Image.open(image_field) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'L'):
+                original = original.convert('RGB')
+            widths = variant_widths()
+            variants = {}
+            for width in widths:
+                if width > original.width and width != widths[0]:
+                    continue
+                resized = original.copy()
+                resized.thumbnail((width, width * 4))
+                buffer = BytesIO()
+                resized.save(buffer, format='JPEG', quality=85, optimize=True, progressive=True)
+                name = variant_name(image_field.name, width)
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                variants[str(width)] = default_storage.save(name, ContentFile(buffer.getvalue()))
+            return variants
+    finally:
+        image_field.close()
+
+
+def delete_variants(variants):
+    """Delete the stored files of a ``{width: name}`` mapping."""
+    for name in (variants or {}).values():
+        default_storage.delete(name)
+
+
+def delete_variants_of(source_name):
+    """Delete every stored variant of ``source_name``, whether or not it is tracked."""
+    directory = posixpath.join(VARIANT_ROOT, source_name)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        default_storage.delete(posixpath.join(directory, filename))
+
+
+def refresh_item_variants(item, save=True, delete_stale=True):
+    """
+    Rebuild (or clear) the variants of ``item`` to match its current image.
+
+    Pass ``delete_stale=False`` when the previous image may be shared with
+    other items; its variants are then left to ``delete_unreferenced_images``.
+    """
+    old = item.image_variants or {}
+    item.image_variants = build_variants(item.image) if item.image else {}
+    if delete_stale:
+        stale = {w: n for w, n in old.items() if n not in item.image_variants.values()}
+        delete_variants(stale)
+    if save:
+        item.save(update_fields=['image_variants'])
+    return item.image_variants
+
+
+def variant_urls(variants):
+    """Return ``{width: url}`` for a stored ``{width: name}`` mapping."""
+    return {width: default_storage.url(name) for width, name in (variants or {}).items()}
+
+
+def srcset(variants):
+    """Build an HTML ``srcset`` attribute value from a ``{width: name}`` mapping."""
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w'
+        for width, name in sorted((variants or {}).items(), key=lambda kv: int(kv[0]))
+    )
+
+
+def preferred_variant(variants, width=320):
+    """Return the name of the smallest variant at least ``width`` wide (or the largest)."""
+    if not variants:
+        return None
+    ordered = sorted(variants.items(), key=lambda kv: int(kv[0]))
+    for w, name in ordered:
+        if int(w) >= width:
+            return name
+    return ordered[-1][1]
@@ -0,0 +1,277 @@
+"""
+Stock movement ledger.
+
+Every change to an item's quantity appends a ``StockMovement``. Movements
+are buffered in-process (only once the surrounding transaction commits)
+and written with one ``bulk_create`` when the buffer holds
+``STOCK_LEDGER_FLUSH_SIZE`` rows or its oldest row is older than
+``STOCK_LEDGER_FLUSH_SECONDS``. The check runs when a request finishes, so
+a mutating request costs at most one extra INSERT and usually none, and
+from a background thread, so an idle process still writes its buffer once
+it is due. The buffer is also written when the process exits; SIGTERM
+(how Cloud Run and ``start.sh`` stop it) is turned into a normal exit so
+that happens after the interrupted code has unwound, never from inside
+the signal handler.
+
+``take_snapshots`` (the ``snapshot_stock`` command) periodically folds new
+movements into per-item ``StockSnapshot`` rows. Historical queries seek to
+the nearest snapshot through an index and only sum the movements recorded
+after it, instead of scanning an item's whole ledger.
+"""
+
+import atexit
+import logging
+import os
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, router, transaction
+from django.db.models import Case, F, Max, Sum, When
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import StockMovement, StockSnapshot
+
+
+DEFAULT_BATCH_SIZE = 500
+
+# Quantity taken out of stock by an adjustment (deletions are not consumption).
+CONSUMED = Sum(Case(
+    When(kind=StockMovement.KIND_ADJUST, delta__lt=0, then=-F('delta')),
+    default=0,
+))
+
+logger = logging.getLogger(__name__)
+
+_buffer = []
+_buffer_started = None
+_buffer_lock = threading.Lock()
+_flusher_pid = None  # process the background flusher was started in
+
+
+def movement(item, kind, delta):
+    """Build (but do not record) a movement for ``item`` at its current quantity."""
+    return StockMovement(
+        item_id=item.id,
+        kind=kind,
+        delta=delta,
+        quantity=0 if kind == StockMovement.KIND_DELETE else item.quantity,
+        created_at=timezone.now(),
+    )
+
+
+def record(item, kind, delta):
+    record_movements([movement(item, kind, delta)])
+
+
+def record_movements(movements):
+    """Queue ``movements``; inside a transaction they are queued on commit."""
+    movements = [m for m in movements if m.delta or m.kind != StockMovement.KIND_ADJUST]
+    if not movements:
+        return
+    # A plain attribute read, so this is also safe from async views.
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        transaction.on_commit(lambda: _append(movements))
+    else:
+        _append(movements)
+
+
+def _append(movements):
+    global _buffer_started
+    with _buffer_lock:
+        if not _buffer:
+            _buffer_started = time.monotonic()
+        _buffer.extend(movements)
+    _start_flusher()
+
+
+def pending_count():
+    with _buffer_lock:
+        return len(_buffer)
+
+
+def flush_due():
+    with _buffer_lock:
+        if not _buffer:
+            return False
+        return (len(_buffer) >= getattr(settings, 'STOCK_LEDGER_FLUSH_SIZE', 50)
+                or time.monotonic() - _buffer_started >= getattr(settings, 'STOCK_LEDGER_FLUSH_SECONDS', 5))
+
+
+def flush():
+    """Write every buffered movement with a single INSERT. Returns the row count."""
+    global _buffer, _buffer_started
+    with _buffer_lock:
+        pending, _buffer, _buffer_started = _buffer, [], None
+    if not pending:
+        return 0
+    try:
+        StockMovement.objects.bulk_create(pending)
+    except Exception:
+        _append(pending)
+        raise
+    return len(pending)
+
+
+@receiver(request_finished)
+def flush_if_due(**kwargs):
+    if flush_due():
+        flush()
+
+
+def background_flush():
+    """One tick of the background flusher; returns the number of rows written."""
+    if not getattr(settings, 'STOCK_LEDGER_BACKGROUND_FLUSH', True) or not flush_due():
+        return 0
+    try:
+        return flush()
+    except Exception:
+        logger.exception('Could not write buffered stock movements; retrying later')
+        return 0
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(max(1, getattr(settings, 'STOCK_LEDGER_FLUSH_SECONDS', 5)))
+        background_flush()
+        close_old_connections()
+
+
+def _start_flusher():
+    """Start the background flusher once per process (forked workers start their own)."""
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _buffer_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='stock-ledger-flush', daemon=True).start()
+
+
+@atexit.register
+def _flush_at_exit():
+    if _buffer:
+        flush()
+
+
+def sigterm_handler(previous):
+    """
+    A SIGTERM handler that hands over to ``previous`` or exits via ``SystemExit``.
+
+    atexit handlers do not run when SIGTERM kills the process with the
+    default disposition, which is how Cloud Run and ``start.sh`` (runserver)
+    stop it. Raising ``SystemExit`` instead unwinds the main thread first
+    (rolling back any ``atomic()`` block it was in) and then runs
+    ``_flush_at_exit``. The handler itself never touches the database: it
+    may have interrupted a transaction or a ``flush()`` on this thread.
+    """
+    def handle_sigterm(signum, frame):
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+    return handle_sigterm
+
+
+def _install_sigterm_handler():
+    # Only the main thread may install signal handlers
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, sigterm_handler(signal.getsignal(signal.SIGTERM)))
+
+
+_install_sigterm_handler()
+
+
+def _settled_movement_id():
+    """
+    The highest movement id that no later commit can fall under.
+
+    SQLite serialises writers and assigns rowids under the write lock, so
+    ids become visible in order. PostgreSQL hands out sequence values
+    before commit: ``SHARE`` mode waits for inserts in flight and makes new
+    ones wait, so every id up to the maximum read here is committed and
+    any id assigned afterwards is larger.
+    """
+    connection = connections[router.db_for_write(StockMovement)]
+    with transaction.atomic(using=connection.alias):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {connection.ops.quote_name(StockMovement._meta.db_table)} IN SHARE MODE')
+        return StockMovement.objects.using(connection.alias).aggregate(last=Max('id'))['last']
+
+
+def take_snapshots(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Fold every movement recorded since the last run into new snapshots.
+
+    Only items that moved get a snapshot. Returns the number created. A run
+    writes all of its batches in one transaction, so a failure part-way
+    leaves the watermark where it was and the next run redoes the lot.
+    """
+    flush()
+    taken_at = timezone.now()
+    upto = _settled_movement_id()
+    with transaction.atomic():
+        watermark = StockSnapshot.objects.aggregate(last=Max('last_movement_id'))['last'] or 0
+        if upto is None or upto <= watermark:
+            return 0
+
+        changes = list(
+            StockMovement.objects.filter(id__gt=watermark, id__lte=upto)
+            .values('item_id').annotate(net=Sum('delta'), used=CONSUMED).order_by('item_id')
+        )
+        created = 0
+        for start in range(0, len(changes), batch_size):
+            batch = changes[start:start + batch_size]
+            latest_ids = (
+                StockSnapshot.objects.filter(item_id__in=[c['item_id'] for c in batch])
+                .values('item_id').annotate(last=Max('id')).values_list('last', flat=True)
+            )
+            previous = {s.item_id: s for s in StockSnapshot.objects.filter(id__in=list(latest_ids))}
+            snapshots = []
+            for change in batch:
+                prior = previous.get(change['item_id'])
+                snapshots.append(StockSnapshot(
+                    item_id=change['item_id'],
+                    quantity=(prior.quantity if prior else 0) + change['net'],
+                    consumed=(prior.consumed if prior else 0) + change['used'],
+                    last_movement_id=upto,
+                    taken_at=taken_at,
+                ))
+            StockSnapshot.objects.bulk_create(snapshots)
+            created += len(snapshots)
+    return created
+
+
+def _totals(item_id, when):
+    """``(quantity, consumed)`` for an item as of ``when``: one index seek plus a short tail."""
+    snapshot = (
+        StockSnapshot.objects.filter(item_id=item_id, taken_at__lte=when)
+        .order_by('-taken_at', '-id').first()
+    )
+    tail = StockMovement.objects.filter(item_id=item_id, created_at__lte=when)
+    quantity = consumed = 0
+    if snapshot is not None:
+        tail = tail.filter(id__gt=snapshot.last_movement_id)
+        quantity, consumed = snapshot.quantity, snapshot.consumed
+    sums = tail.aggregate(net=Sum('delta'), used=CONSUMED)
+    return quantity + (sums['net'] or 0), consumed + (sums['used'] or 0)
+
+
+def quantity_as_of(item_id, when):
+    return _totals(item_id, when)[0]
+
+
+def consumed_between(item_id, start, end):
+    return _totals(item_id, end)[1] - _totals(item_id, start)[1]
+
+
+def consumption_rate(item_id, days=30, now=None):
+    """Average units consumed per day over the last ``days`` days."""
+    end = now or timezone.now()
+    return consumed_between(item_id, end - timedelta(days=days), end) / days
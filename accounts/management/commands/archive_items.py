@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.archive import DEFAULT_BATCH_SIZE, archive_items
+
+
+class Command(BaseCommand):
+    help = (
+        'Move consumed and long-expired items (see ARCHIVE_RULES) out of the live '
+        'item table into the archive, in small batches with short transactions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Items archived per transaction.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        log = None
+        if options['verbosity'] > 1:
+            log = lambda what: self.stdout.write(f'  archived {what}')
+        while True:
+            archived = archive_items(batch_size=options['batch_size'], log=log)
+            self.stdout.write(self.style.SUCCESS(f'Archived {archived} item(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,84 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.archive import DEFAULT_BATCH_SIZE, archive_batch, archive_rule
+from accounts.models import Inventory, Item
+
+
+SORTS = ['expiry_asc', 'expiry_desc', 'quantity_asc', 'quantity_desc']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the inventory item page with consumed items still in the live table, '
+        'then again after archiving them. Rows are created in a transaction that '
+        'is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000, help='Items in the inventory.')
+        parser.add_argument('--consumed', type=float, default=0.8, help='Share of archivable items.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username='archive-bench', password=None)
+                inventory = Inventory.objects.create(user=user, name='Bench')
+                consumed = int(options['items'] * options['consumed'])
+                today = timezone.localdate()
+                Item.objects.bulk_create(
+                    Item(inventory=inventory, name=f'Item {i}', quantity=0 if i < consumed else 1 + i % 20,
+                         expiration_date=today + timedelta(days=i % 365))
+                    for i in range(options['items'])
+                )
+                now = timezone.now()
+                Item.objects.filter(inventory=inventory, quantity=0).update(updated_at=now - timedelta(days=365))
+
+                client = Client()
+                client.force_login(user)
+                url = reverse('inventory_items', args=[inventory.id])
+                self.stdout.write(f'{options["items"]} items, {consumed} archivable; median of {options["repeat"]}')
+                self.stdout.write(f'  {"sort":<15}{"before":>10}{"after":>10}')
+                before = self.measure(client, url, options['repeat'])
+
+                rule = archive_rule(now)
+                ids = list(Item.objects.filter(inventory=inventory).order_by('id').values_list('id', flat=True))
+                started = time.perf_counter()
+                archived = sum(
+                    archive_batch(ids[i:i + DEFAULT_BATCH_SIZE], rule, now)
+                    for i in range(0, len(ids), DEFAULT_BATCH_SIZE)
+                )
+                archive_time = time.perf_counter() - started
+
+                after = self.measure(client, url, options['repeat'])
+                for sort in SORTS:
+                    self.stdout.write(f'  {sort:<15}{before[sort]:>8.1f}ms{after[sort]:>8.1f}ms')
+                self.stdout.write(f'Archived {archived} item(s) in {archive_time * 1000:.0f}ms.')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, client, url, repeat):
+        results = {}
+        for sort in SORTS:
+            client.get(url, {'sort': sort})  # template and query caches
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                client.get(url, {'sort': sort})
+                timings.append((time.perf_counter() - started) * 1000)
+            results[sort] = statistics.median(timings)
+        return results
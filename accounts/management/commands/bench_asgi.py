@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, transaction
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import Inventory, Item
+
+
+CSRF_SECRET = 'b' * 32
+
+
+class Rollback(Exception):
+    pass
+
+
+async def asgi_request(app, method, path, cookies, body=b''):
+    """Send one HTTP request straight into an ASGI application; return the status."""
+    headers = [
+        (b'host', b'testserver'),
+        (b'cookie', '; '.join(f'{k}={v}' for k, v in cookies.items()).encode()),
+        (b'x-csrftoken', CSRF_SECRET.encode()),
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+    ]
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'headers': headers,
+        'client': ('127.0.0.1', 40000), 'server': ('testserver', 80),
+    }
+    sent = False
+    status = None
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the ASGI application (inventory_app.asgi) with concurrent item API '
+        'requests and report requests/sec and peak traced memory per concurrency level.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+
+    def handle(self, *args, **options):
+        from inventory_app.asgi import application
+
+        # Keep the benchmark's rolled-back transaction open across requests.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with transaction.atomic():
+                cookies, paths = self.setup_data()
+                self.stdout.write(f'{"endpoint":<18} {"concurrency":>11} {"req/s":>9} {"peak KiB":>9} {"errors":>7}')
+                for label, method, path, body in paths:
+                    for concurrency in options['concurrency']:
+                        rate, peak, errors = async_to_sync(self.run_level)(
+                            application, method, path, cookies, body, options['requests'], concurrency,
+                        )
+                        self.stdout.write(f'{label:<18} {concurrency:>11} {rate:>9.1f} {peak / 1024:>9.0f} {errors:>7}')
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+    def setup_data(self):
+        user = User.objects.create_user(username='asgi-bench', email='asgi-bench@example.com', password='x')
+        inventory = Inventory.objects.create(user=user, name='ASGI bench')
+        item = Item.objects.create(inventory=inventory, name='Bench item', quantity=10)
+        client = Client()
+        client.force_login(user)
+        cookies = {'sessionid': client.cookies['sessionid'].value, 'csrftoken': CSRF_SECRET}
+        body = json.dumps({'action': 'increase', 'amount': 1}).encode()
+        return cookies, [
+            ('item_detail_api', 'GET', reverse('item_detail_api', args=[inventory.id, item.id]), b''),
+            ('quantity_update', 'POST', reverse('item_quantity_update', args=[inventory.id, item.id]), body),
+        ]
+
+    async def run_level(self, app, method, path, cookies, body, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                return await asgi_request(app, method, path, cookies, body)
+
+        # Throughput is measured untraced; a second, shorter pass records
+        # peak memory since tracemalloc itself slows allocation down.
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        await asyncio.gather(*(one() for _ in range(concurrency * 2)))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        errors = sum(1 for status in statuses if status != 200)
+        return total / elapsed, peak, errors
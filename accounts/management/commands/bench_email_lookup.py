@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.backends import EMAIL_INDEX_NAME, UserModel, get_user_by_email, users_by_email
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the email login lookup while the user table grows to --users rows. '
+        'All rows are inserted inside a transaction that is rolled back; run it '
+        'against a scratch database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--lookups', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        target = options['users']
+        checkpoints = sorted({n for n in (1_000, 10_000, 100_000, 1_000_000, target) if n <= target})
+        password = make_password(None)
+        try:
+            with transaction.atomic():
+                created = 0
+                for checkpoint in checkpoints:
+                    while created < checkpoint:
+                        size = min(options['batch_size'], checkpoint - created)
+                        UserModel.objects.bulk_create(
+                            UserModel(
+                                username=f'bench-{created + i}',
+                                email=f'Bench.User{created + i}@Example.com',
+                                password=password,
+                            )
+                            for i in range(size)
+                        )
+                        created += size
+                    self.report(checkpoint, options['lookups'])
+                self.stdout.write(f'Query plan ({EMAIL_INDEX_NAME} expected):')
+                self.stdout.write(users_by_email('bench.user0@example.com').explain())
+                raise Rollback
+        except Rollback:
+            pass
+
+    def report(self, rows, lookups):
+        emails = [f'bench.user{(i * 7919) % rows}@EXAMPLE.com' for i in range(lookups)]
+        started = time.perf_counter()
+        for email in emails:
+            get_user_by_email(email)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{rows:>10,} users: {elapsed / lookups * 1e6:8.1f} µs/lookup')
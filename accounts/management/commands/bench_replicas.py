@@ -0,0 +1,124 @@
+import json
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts import ledger
+from accounts.models import Inventory, Item, StockMovement
+from accounts.routers import PIN_COOKIE
+
+from .sync_replicas import copy_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a read-heavy mix of dashboard / item list / item detail requests '
+        'and quantity clicks, and count queries per database alias to show how '
+        'much read load the replicas take off the primary. Needs DB_REPLICAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--items', type=int, default=60, help='Items per user.')
+        parser.add_argument('--write-ratio', type=float, default=0.1, help='Share of quantity updates.')
+        parser.add_argument(
+            '--sticky', type=int, nargs='+', default=[0, 1, 5],
+            help='REPLICA_STICKY_SECONDS values to compare.',
+        )
+
+    def sync(self):
+        """Bring the replicas up to date (SQLite copies; real replicas just get a moment)."""
+        for alias in settings.DATABASE_REPLICAS:
+            config = settings.DATABASES[alias]
+            if config['ENGINE'] == 'django.db.backends.sqlite3':
+                connections[alias].close()
+                copy_sqlite(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'], config['NAME'])
+            else:
+                time.sleep(1)
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas configured; set DB_REPLICAS (see sync_replicas).')
+        users = []
+        for n in range(options['users']):
+            user = User.objects.create_user(username=f'replica-bench-{n}', password=None)
+            inventory = Inventory.objects.create(user=user, name='Bench')
+            Item.objects.bulk_create(
+                Item(inventory=inventory, name=f'Item {i}', quantity=10) for i in range(options['items'])
+            )
+            users.append((user, inventory, list(inventory.items.values_list('id', flat=True))))
+        self.sync()
+
+        try:
+            self.stdout.write(
+                f'{options["requests"]} requests, {options["write_ratio"]:.0%} quantity updates, '
+                f'{options["users"]} users'
+            )
+            self.stdout.write(f'  {"sticky":>8}{"primary":>10}{"replicas":>10}{"shed":>7}{"time":>9}')
+            for sticky in options['sticky']:
+                with override_settings(REPLICA_STICKY_SECONDS=sticky):
+                    queries, elapsed = self.replay(users, options, random.Random(0))
+                primary = queries.pop(DEFAULT_DB_ALIAS, 0)
+                total = primary + sum(queries.values())
+                self.stdout.write(
+                    f'  {sticky:>7}s{primary:>10}{total - primary:>10}'
+                    f'{1 - primary / total:>7.0%}{elapsed:>8.2f}s'
+                )
+            self.stdout.write('Without the router every query goes to the primary.')
+        finally:
+            ledger.flush()
+            item_ids = [pk for _, _, ids in users for pk in ids]
+            StockMovement.objects.filter(item_id__in=item_ids).delete()
+            User.objects.filter(id__in=[user.id for user, _, _ in users]).delete()
+            self.sync()
+
+    def replay(self, users, options, rng):
+        """Run the request mix with fresh clients; returns (queries per alias, seconds)."""
+        queries = Counter()
+
+        def counter(alias):
+            def wrapper(execute, sql, params, many, context):
+                queries[alias] += 1
+                return execute(sql, params, many, context)
+            return wrapper
+
+        clients = []
+        for user, inventory, item_ids in users:
+            client = Client()
+            client.force_login(user)
+            clients.append((client, inventory, item_ids))
+        pinned_until = {}
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter(alias)))
+            for _ in range(options['requests']):
+                client, inventory, item_ids = rng.choice(clients)
+                item_id = rng.choice(item_ids)
+                # The test client keeps cookies forever; expire the pin like a browser would.
+                if pinned_until.get(client, 0) <= time.monotonic():
+                    client.cookies.pop(PIN_COOKIE, None)
+                if rng.random() < options['write_ratio']:
+                    response = client.post(
+                        reverse('item_quantity_update', args=[inventory.id, item_id]),
+                        json.dumps({'action': 'increase'}), content_type='application/json',
+                    )
+                else:
+                    response = client.get(rng.choice([
+                        reverse('dashboard'),
+                        reverse('inventory_items', args=[inventory.id]),
+                        reverse('item_detail_api', args=[inventory.id, item_id]),
+                    ]))
+                if PIN_COOKIE in response.cookies:
+                    pinned_until[client] = time.monotonic() + int(response.cookies[PIN_COOKIE]['max-age'])
+        return queries, time.perf_counter() - started
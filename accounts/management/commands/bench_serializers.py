@@ -0,0 +1,75 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from accounts import serializers
+from accounts.images import variant_urls
+from accounts.models import Inventory, Item
+from accounts.serializers import DEFAULT_ITEM_FIELDS, serialize_items
+
+
+class Rollback(Exception):
+    pass
+
+
+def instance_payload(queryset):
+    """The per-instance dict building the item endpoints used before serializers.py."""
+    return [{
+        'id': item.id,
+        'name': item.name,
+        'quantity': item.quantity,
+        'brand': item.brand,
+        'description': item.description,
+        'category': item.category.name if item.category else None,
+        'expiration_date': item.expiration_date.isoformat() if item.expiration_date else None,
+        'image_url': item.image.url if item.image else None,
+        'thumbnail_url': item.thumbnail_url(),
+        'image_variants': variant_urls(item.image_variants),
+        'image_srcset': item.image_srcset(),
+    } for item in queryset.select_related('category')]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time serializing one page of items: model instances + json versus '
+        'values() rows + the shared item serializer (full and sparse fieldsets). '
+        'Rows are created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=60, help='Items per page.')
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username='serializer-bench', password=None)
+                inventory = Inventory.objects.create(user=user, name='Bench')
+                Item.objects.bulk_create(
+                    Item(inventory=inventory, name=f'Item {i}', quantity=i, brand='ACME',
+                         description='x' * 80)
+                    for i in range(options['items'])
+                )
+                queryset = Item.objects.filter(inventory=inventory)
+                cases = [
+                    ('instances + json', lambda: json.dumps(instance_payload(queryset), cls=DjangoJSONEncoder)),
+                    ('values() + serializer', lambda: serializers.dumps(serialize_items(queryset, DEFAULT_ITEM_FIELDS))),
+                    ('values() + id,name,quantity', lambda: serializers.dumps(
+                        serialize_items(queryset, ('id', 'name', 'quantity')))),
+                ]
+                encoder = 'orjson' if serializers.orjson is not None else 'json'
+                self.stdout.write(f'{options["items"]} items/page, encoder: {encoder}')
+                for label, func in cases:
+                    func()
+                    started = time.perf_counter()
+                    for _ in range(options['repeat']):
+                        size = len(func())
+                    elapsed = (time.perf_counter() - started) / options['repeat']
+                    self.stdout.write(f'{label:<30} {elapsed * 1e3:8.2f} ms/page {size:>8} bytes')
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+
+CONFIGURATIONS = [
+    ('db + session messages', 'django.contrib.sessions.backends.db',
+     'django.contrib.messages.storage.session.SessionStorage'),
+    ('cached_db + cookie messages', 'django.contrib.sessions.backends.cached_db',
+     'django.contrib.messages.storage.cookie.CookieStorage'),
+    ('cache + cookie messages', 'django.contrib.sessions.backends.cache',
+     'django.contrib.messages.storage.cookie.CookieStorage'),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class SessionQueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if 'django_session' in sql:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Count django_session round-trips for a login / browse / logout flow '
+        'under each session and message storage configuration.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=20, help='Dashboard page views per flow.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"configuration":<32} {"login":>6} {"browse":>7} {"logout":>7} {"total":>6}')
+        for label, engine, storage in CONFIGURATIONS:
+            with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage):
+                counts = self.run_flow(options['pages'])
+            self.stdout.write(
+                f'{label:<32} {counts[0]:>6} {counts[1]:>7} {counts[2]:>7} {sum(counts):>6}'
+            )
+
+    def run_flow(self, pages):
+        counts = []
+        try:
+            with transaction.atomic():
+                User.objects.create_user(username='session-bench', email='session-bench@example.com', password='Bench-Pass-1!')
+                client = Client()
+                with self.counting() as counter:
+                    client.post(reverse('login'), {'email': 'session-bench@example.com', 'password': 'Bench-Pass-1!'})
+                    client.get(reverse('dashboard'))  # consumes the welcome message
+                counts.append(counter.count)
+                with self.counting() as counter:
+                    for _ in range(pages):
+                        client.get(reverse('dashboard'))
+                counts.append(counter.count)
+                with self.counting() as counter:
+                    client.get(reverse('logout'))
+                    client.get(reverse('login'))
+                counts.append(counter.count)
+                raise Rollback
+        except Rollback:
+            pass
+        return counts
+
+    @contextmanager
+    def counting(self):
+        counter = SessionQueryCounter()
+        with connection.execute_wrapper(counter):
+            yield counter
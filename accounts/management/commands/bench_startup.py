@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Runs in a fresh interpreter so nothing is already imported or compiled.
+FIRST_REQUEST = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - started
+from django.test import Client
+client = Client()
+timings = {"setup_ms": setup * 1000}
+for label in ("first_request_ms", "second_request_ms"):
+    started = time.perf_counter()
+    response = client.get(%r)
+    timings[label] = (time.perf_counter() - started) * 1000
+timings["status"] = response.status_code
+print(json.dumps(timings))
+'''
+
+
+def _run(code, extra_env=None, python_args=()):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'inventory_app.settings'))
+    env.update(extra_env or {})
+    return subprocess.run(
+        [sys.executable, *python_args, '-c', code],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def import_offenders(limit):
+    """Top-level imports during ``django.setup()`` by cumulative time (``-X importtime``)."""
+    result = _run('import django; django.setup()', python_args=('-X', 'importtime'))
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split(':', 1)[1].split('|')
+        if name.startswith(' ') and not name.startswith('  '):  # top-level imports only
+            try:
+                rows.append((int(cumulative) / 1000, name.strip()))
+            except ValueError:
+                pass  # the header line
+    return sorted(rows, reverse=True)[:limit]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold start in fresh interpreters: the slowest imports during '
+        'django.setup(), and setup plus first/second request latency with and '
+        'without WARMUP_ON_START.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/accounts/login/', help='Path requested after setup.')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes per configuration (best is kept).')
+        parser.add_argument('--top', type=int, default=10, help='Number of imports to list.')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Slowest imports during django.setup() (cumulative):')
+        for ms, name in import_offenders(options['top']):
+            self.stdout.write(f'  {ms:8.1f} ms  {name}')
+
+        self.stdout.write(f'\nCold start, GET {options["path"]} (best of {options["runs"]}):')
+        self.stdout.write(f'  {"":<18}{"setup":>10}{"1st req":>10}{"2nd req":>10}')
+        for label, warm in (('no warm-up', 'False'), ('WARMUP_ON_START', 'True')):
+            runs = [
+                json.loads(_run(FIRST_REQUEST % options['path'], {'WARMUP_ON_START': warm}).stdout)
+                for _ in range(options['runs'])
+            ]
+            best = {key: min(run[key] for run in runs) for key in ('setup_ms', 'first_request_ms', 'second_request_ms')}
+            self.stdout.write(
+                f'  {label:<18}{best["setup_ms"]:>8.1f}ms{best["first_request_ms"]:>8.1f}ms'
+                f'{best["second_request_ms"]:>8.1f}ms  (HTTP {runs[-1]["status"]})'
+            )
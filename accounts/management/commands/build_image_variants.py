@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from accounts.images import build_variants
+from accounts.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Pre-render responsive width variants for item images that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Rebuild variants for every item with an image, not only missing ones.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Number of items written back per UPDATE batch.',
+        )
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'image_variants')
+        if not options['all']:
+            items = items.filter(image_variants={})
+
+        built = failed = 0
+        pending = []
+        for item in items.order_by('id').iterator(chunk_size=options['batch_size']):
+            try:
+                item.image_variants = build_variants(item.image)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f'  {item.image.name}: {exc}')
+                continue
+            pending.append(item)
+            if len(pending) >= options['batch_size']:
+                Item.objects.bulk_update(pending, ['image_variants'])
+                built += len(pending)
+                pending = []
+        if pending:
+            Item.objects.bulk_update(pending, ['image_variants'])
+            built += len(pending)
+
+        self.stdout.write(self.style.SUCCESS(f'Built variants for {built} item(s); {failed} failed.'))
@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired database sessions in small batches so the cleanup never '
+        'holds a long lock on django_session.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--max-batches', type=int, default=100,
+            help='Stop after this many batches; the rest is left for the next run.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat the cleanup every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.cleanup(options['batch_size'], options['max_batches'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired session(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def cleanup(self, batch_size, max_batches):
+        deleted = 0
+        now = timezone.now()
+        for _ in range(max_batches):
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .order_by('expire_date')
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        return deleted
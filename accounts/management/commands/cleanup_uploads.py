@@ -0,0 +1,32 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.uploads import cleanup_uploads
+
+
+class Command(BaseCommand):
+    help = 'Remove resumable image uploads that were abandoned, with their part files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-hours', type=float, default=settings.UPLOAD_EXPIRY_HOURS,
+            help='Uploads untouched for longer than this are removed.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        log = None
+        if options['verbosity'] > 1:
+            log = lambda what: self.stdout.write(f'  removed {what}')
+        while True:
+            removed = cleanup_uploads(max_age=timedelta(hours=options['max_age_hours']), log=log)
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} abandoned upload(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.forecast import np, run_forecasts
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute consumption rates, stock-out dates and reorder suggestions '
+        'for every item from the stock ledger.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            count = run_forecasts()
+            elapsed = time.perf_counter() - started
+            engine = 'numpy' if np is not None else 'python'
+            self.stdout.write(self.style.SUCCESS(f'Forecast {count} item(s) in {elapsed:.2f}s ({engine}).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
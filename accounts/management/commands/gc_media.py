@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.media import DEFAULT_BATCH_SIZE, collect_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete item images (and their cached thumbnails and variants) that are '
+        'no longer referenced by any Item. Runs in constant memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='List orphaned files without deleting anything.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Number of files checked against the database per query.',
+        )
+        parser.add_argument(
+            '--grace-seconds', type=int, default=3600,
+            help='Ignore files modified more recently than this (protects in-flight uploads).',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat the collection every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.collect(options)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def collect(self, options):
+        dry_run = options['dry_run']
+        log = None
+        if options['verbosity'] > 1 or dry_run:
+            log = lambda name: self.stdout.write(f'  {"would delete" if dry_run else "deleted"} {name}')
+
+        deleted = collect_garbage(
+            batch_size=options['batch_size'],
+            grace_seconds=options['grace_seconds'],
+            dry_run=dry_run,
+            log=log,
+        )
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {deleted} orphaned image(s).'))
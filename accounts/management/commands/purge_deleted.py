@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.purge import DEFAULT_BATCH_SIZE, purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Permanently remove deleted inventories and accounts, with their items '
+        'and image files, in small batches with short transactions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Items deleted per transaction.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        log = None
+        if options['verbosity'] > 1:
+            log = lambda what: self.stdout.write(f'  purged {what}')
+        while True:
+            counts = purge_deleted(batch_size=options['batch_size'], log=log)
+            self.stdout.write(self.style.SUCCESS(
+                f'Purged {counts["inventories"]} inventory(ies), {counts["items"]} item(s) '
+                f'and {counts["accounts"]} account(s).'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
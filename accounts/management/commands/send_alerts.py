@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from accounts.alerts import send_alert_digests
+from accounts.notifications import get_notifier
+
+
+class Command(BaseCommand):
+    help = (
+        'Email (or print / log) one digest per user listing items that are '
+        'expiring soon or low on stock. Each item is reported once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--notifier',
+            help='Dotted path of the notifier class (defaults to ALERT_NOTIFIER).',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        notifier = import_string(options['notifier'])() if options['notifier'] else get_notifier()
+        while True:
+            delivered = send_alert_digests(notifier=notifier)
+            self.stdout.write(self.style.SUCCESS(f'Sent {delivered} alert digest(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
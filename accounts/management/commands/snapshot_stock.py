@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.ledger import DEFAULT_BATCH_SIZE, take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold stock movements recorded since the last run into per-item '
+        'snapshots, keeping historical quantity and consumption queries short.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Items snapshotted per INSERT.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created = take_snapshots(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Created {created} stock snapshot(s).'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+def copy_sqlite(source, target):
+    """Copy one SQLite database file onto another with the online backup API."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary onto every SQLite replica in DB_REPLICAS, for '
+        'trying replica routing locally. --interval simulates replication lag.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Repeat every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        targets = [
+            settings.DATABASES[alias]['NAME'] for alias in settings.DATABASE_REPLICAS
+            if settings.DATABASES[alias]['ENGINE'] == 'django.db.backends.sqlite3'
+        ]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3' or not targets:
+            raise CommandError('Needs an SQLite primary and SQLite replicas in DB_REPLICAS.')
+        while True:
+            started = time.perf_counter()
+            for target in targets:
+                copy_sqlite(primary['NAME'], target)
+            self.stdout.write(self.style.SUCCESS(
+                f'Synced {len(targets)} replica(s) in {(time.perf_counter() - started) * 1000:.0f} ms.'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
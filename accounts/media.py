@@ -0,0 +1,170 @@
+"""
+Helpers for managing uploaded item media on disk.
+
+Item rows are frequently deleted in bulk (queryset deletes, cascades from
+inventories and accounts), which never touches the image files. The
+functions here find image files that no Item or ArchivedItem references any
+more and remove them together with their cached thumbnails, and sweep the
+responsive variants (``variants/<source>/<width>.jpg``) whose source is no
+longer referenced.
+
+Memory use is bounded by the batch size: files are discovered with a lazy
+``os.scandir`` walk and checked against the database one batch at a time,
+so neither the directory listing nor the set of referenced paths is ever
+held in memory as a whole.
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .images import VARIANT_ROOT, delete_variants_of, source_name_for_variant
+from .models import ArchivedItem, Item
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def image_upload_dir():
+    """Return the media-relative directory Item images are uploaded to."""
+    return Item._meta.get_field('image').upload_to.strip('/')
+
+
+def iter_media_files(relative_dir, older_than=None):
+    """
+    Yield media-relative paths of regular files below ``relative_dir``.
+
+    Directories are walked iteratively with ``os.scandir`` so only the
+    current directory handle and the stack of pending sub-directories are
+    kept in memory. Files modified after ``older_than`` (a UNIX timestamp)
+    are skipped so in-flight uploads are never considered orphans.
+    """
+    media_root = os.fspath(settings.MEDIA_ROOT)
+    pending = [os.path.join(media_root, relative_dir)]
+    while pending:
+        current = pending.pop()
+        try:
+            iterator = os.scandir(current)
+        except FileNotFoundError:
+            continue
+        with iterator as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if older_than is not None and entry.stat(follow_symlinks=False).st_mtime > older_than:
+                    continue
+                relative = os.path.relpath(entry.path, media_root)
+                yield relative.replace(os.sep, '/')
+
+
+def iter_batches(iterable, size):
+    """Group ``iterable`` into lists of at most ``size`` elements."""
+    batch = []
+    for value in iterable:
+        batch.append(value)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def referenced_paths(paths):
+    """Return the subset of ``paths`` that is referenced by at least one Item (live or archived)."""
+    live = Item.objects.filter(image__in=paths).order_by().values_list('image', flat=True)
+    archived = ArchivedItem.objects.filter(image__in=paths).order_by().values_list('image', flat=True)
+    return set(live.union(archived))
+
+
+def delete_image_file(name):
+    """Delete an image file, its responsive variants and its cached thumbnails."""
+    from sorl.thumbnail import delete
+
+    delete_variants_of(name)
+    delete(name, delete_file=True)
+
+
+def delete_unreferenced_images(names):
+    """Delete the image files among ``names`` that no Item references any more."""
+    names = sorted({name for name in names if name})
+    if not names:
+        return 0
+    still_used = referenced_paths(names)
+    deleted = 0
+    for name in names:
+        if name not in still_used:
+            delete_image_file(name)
+            deleted += 1
+    return deleted
+
+
+def find_orphans(batch_size=DEFAULT_BATCH_SIZE, grace_seconds=3600):
+    """
+    Yield batches of image paths that exist on disk but are not referenced.
+
+    Each batch costs one indexed ``IN`` query regardless of how many files
+    live under the upload directory.
+    """
+    older_than = time.time() - grace_seconds if grace_seconds else None
+    files = iter_media_files(image_upload_dir(), older_than=older_than)
+    for batch in iter_batches(files, batch_size):
+        referenced = referenced_paths(batch)
+        orphans = [path for path in batch if path not in referenced]
+        if orphans:
+            yield orphans
+
+
+def find_orphan_variants(batch_size=DEFAULT_BATCH_SIZE, grace_seconds=3600):
+    """
+    Yield batches of variant paths whose source image is not referenced.
+
+    Variants outlive their source when it was removed by a bulk delete, or
+    by an earlier ``gc_media`` run that collected only the source file.
+    """
+    older_than = time.time() - grace_seconds if grace_seconds else None
+    files = iter_media_files(f'{VARIANT_ROOT}/{image_upload_dir()}', older_than=older_than)
+    for batch in iter_batches(files, batch_size):
+        sources = {path: source_name_for_variant(path) for path in batch}
+        referenced = referenced_paths({source for source in sources.values() if source})
+        orphans = [path for path, source in sources.items() if source not in referenced]
+        if orphans:
+            yield orphans
+
+
+def delete_variant_file(name):
+    """Delete one variant file and, once it is empty, its per-source directory."""
+    default_storage.delete(name)
+    try:
+        os.rmdir(os.path.dirname(os.path.join(os.fspath(settings.MEDIA_ROOT), name)))
+    except OSError:
+        pass  # other widths are still there
+
+
+def collect_garbage(batch_size=DEFAULT_BATCH_SIZE, grace_seconds=3600, dry_run=False, log=None):
+    """
+    Remove unreferenced item images, their thumbnails and stray variants.
+
+    Returns the number of files removed. With ``dry_run`` nothing is
+    removed and the count is the number of files that would have been.
+    """
+    deleted = 0
+    for orphans in find_orphans(batch_size=batch_size, grace_seconds=grace_seconds):
+        for name in orphans:
+            if log:
+                log(name)
+            if not dry_run:
+                delete_image_file(name)
+            deleted += 1
+    for orphans in find_orphan_variants(batch_size=batch_size, grace_seconds=grace_seconds):
+        for name in orphans:
+            if log:
+                log(name)
+            if not dry_run:
+                delete_variant_file(name)
+            deleted += 1
+    return deleted
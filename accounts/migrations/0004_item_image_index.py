@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_delete_activitylog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='item_images/'),
+        ),
+    ]
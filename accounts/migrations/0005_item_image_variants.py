@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_item_image_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
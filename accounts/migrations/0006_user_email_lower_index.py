@@ -0,0 +1,72 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+EMAIL_INDEX_NAME = 'auth_user_email_lower_uniq'
+
+
+def email_constraint():
+    return models.UniqueConstraint(
+        Lower('email'),
+        name=EMAIL_INDEX_NAME,
+        condition=~models.Q(email=''),
+    )
+
+
+def check_case_duplicates(User):
+    """
+    Refuse to build the index over addresses that differ only by case.
+
+    Registration used to reject exact matches only, so such accounts can
+    exist. They cannot be merged automatically (each owns its own
+    inventories) and login is by email, so one of each pair has to be given
+    a different address before migrating.
+    """
+    duplicates = list(
+        User.objects.exclude(email='').annotate(email_lower=Lower('email'))
+        .values('email_lower').annotate(ids=models.Count('id')).filter(ids__gt=1)
+        .values_list('email_lower', flat=True)[:20]
+    )
+    if not duplicates:
+        return
+    lines = []
+    for email in duplicates:
+        users = User.objects.annotate(email_lower=Lower('email')).filter(email_lower=email).order_by('id')
+        lines.append(', '.join(f'#{user.id} {user.username} <{user.email}>' for user in users))
+    raise RuntimeError(
+        'Cannot add the case-insensitive unique email index: these accounts share an '
+        'address that differs only by case. Change the email of all but one account in '
+        'each group (e.g. in the admin) and run migrate again.\n  ' + '\n  '.join(lines)
+    )
+
+
+def add_email_index(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    check_case_duplicates(User)
+    schema_editor.add_constraint(User, email_constraint())
+
+
+def remove_email_index(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.remove_constraint(User, email_constraint())
+
+
+class Migration(migrations.Migration):
+    """
+    Add a unique LOWER(email) index to the user table.
+
+    The user model belongs to django.contrib.auth, so the index is created
+    through the schema editor rather than as model state. Blank emails are
+    excluded so accounts created without an address do not collide.
+    """
+
+    dependencies = [
+        ('accounts', '0005_item_image_variants'),
+        # Depend on the latest auth migration: on SQLite, altering auth_user
+        # rebuilds the table and would silently drop this index.
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def record_opening_stock(apps, schema_editor):
+    """Give items that predate the ledger a baseline so quantity sums start correct."""
+    Item = apps.get_model('accounts', 'Item')
+    StockMovement = apps.get_model('accounts', 'StockMovement')
+    now = timezone.now()
+    batch = []
+    for item_id, quantity in Item.objects.order_by('id').values_list('id', 'quantity').iterator(chunk_size=500):
+        batch.append(StockMovement(item_id=item_id, kind='create', delta=quantity, quantity=quantity, created_at=now))
+        if len(batch) == 500:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('create', 'Created'), ('adjust', 'Adjusted'), ('delete', 'Deleted')], max_length=10)),
+                ('delta', models.IntegerField()),
+                ('quantity', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movements', to='accounts.item')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['item', 'created_at'], name='stock_movement_item_time')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('consumed', models.IntegerField()),
+                ('last_movement_id', models.BigIntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='snapshots', to='accounts.item')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['item', 'taken_at'], name='stock_snapshot_item_time')],
+            },
+        ),
+        migrations.RunPython(record_opening_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemForecast',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='accounts.item')),
+                ('daily_rate', models.FloatField()),
+                ('runs_out_on', models.DateField(blank=True, db_index=True, null=True)),
+                ('reorder_quantity', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_item_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('expiring', 'Expiring soon'), ('low_stock', 'Low stock')], max_length=10)),
+                ('expiration_date', models.DateField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['expiration_date'], name='item_expiration_date'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quantity'], name='item_quantity'),
+        ),
+        migrations.AddField(
+            model_name='itemalert',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='accounts.item'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='itemalert',
+            unique_together={('item', 'kind')},
+        ),
+    ]
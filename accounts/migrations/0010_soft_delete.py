@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_item_alerts'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='inventory',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='inventory',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('user', 'name'), name='inventory_user_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:36
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """Fold categories that differ only by case into the oldest one of each group."""
+    Category = apps.get_model('accounts', 'Category')
+    Item = apps.get_model('accounts', 'Item')
+    keep = {}
+    duplicates = (
+        Category.objects.annotate(name_lower=Lower('name'))
+        .order_by('user_id', 'name_lower', 'id').values_list('id', 'user_id', 'name_lower')
+    )
+    for category_id, user_id, name_lower in duplicates.iterator():
+        target = keep.setdefault((user_id, name_lower), category_id)
+        if target != category_id:
+            Item.objects.filter(category_id=category_id).update(category_id=target)
+            Category.objects.filter(id=category_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_soft_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='category',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(models.F('user'), django.db.models.functions.text.Lower('name'), name='category_user_name_ci_uniq'),
+        ),
+    ]
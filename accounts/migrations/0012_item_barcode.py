@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_category_name_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='barcode',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(condition=models.Q(('barcode', ''), _negated=True), fields=('inventory', 'barcode'), name='item_inventory_barcode_uniq'),
+        ),
+    ]
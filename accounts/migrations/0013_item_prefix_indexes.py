@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:06
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_item_barcode'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(models.F('inventory'), django.db.models.functions.text.Lower('name'), name='item_inventory_name_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(models.F('inventory'), django.db.models.functions.text.Lower('brand'), name='item_inventory_brand_lower'),
+        ),
+    ]
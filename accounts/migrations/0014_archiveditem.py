@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_item_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('brand', models.CharField(blank=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('expiration_date', models.DateField(blank=True, null=True)),
+                ('quantity', models.IntegerField(default=0)),
+                ('barcode', models.CharField(blank=True, default='', max_length=64)),
+                ('image', models.ImageField(blank=True, db_index=True, null=True, upload_to='item_images/')),
+                ('image_variants', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.category')),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_items', to='accounts.inventory')),
+            ],
+            options={
+                'ordering': ['-archived_at'],
+                'indexes': [models.Index(fields=['inventory', '-archived_at'], name='archived_item_inventory')],
+            },
+        ),
+    ]
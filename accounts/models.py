@@ -1,7 +1,18 @@
+import uuid
+
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 
 
+class InventoryManager(models.Manager):
+    """Hides inventories that were deleted and are waiting for the purger."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Inventory(models.Model):
     """Model to represent user inventories"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inventories')
@@ -9,10 +20,19 @@ class Inventory(models.Model):
     emoji = models.CharField(max_length=10, default='📦')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = InventoryManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-created_at']
-        unique_together = ['user', 'name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'], condition=models.Q(deleted_at__isnull=True),
+                name='inventory_user_name_uniq',
+            ),
+        ]
         verbose_name_plural = 'Inventories'
 
     def __str__(self):
@@ -26,13 +46,23 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ['user', 'name']
+        constraints = [
+            # Case-insensitive, and usable as the index for name lookups
+            # written as Lower('name') == name.lower() (see categories.py).
+            models.UniqueConstraint(models.F('user'), Lower('name'), name='category_user_name_ci_uniq'),
+        ]
         ordering = ['name']
 
     def __str__(self):
         return self.name
 
 
+class ItemQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        """Items in ``user``'s inventories, excluding inventories awaiting purge."""
+        return self.filter(inventory__user=user, inventory__deleted_at__isnull=True)
+
+
 class Item(models.Model):
     """An item inside an Inventory."""
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='items')
@@ -42,23 +72,207 @@ class Item(models.Model):
     description = models.TextField(blank=True)
     expiration_date = models.DateField(null=True, blank=True)
     quantity = models.IntegerField(default=0)
-    image = models.ImageField(upload_to='item_images/', blank=True, null=True)
+    barcode = models.CharField(max_length=64, blank=True, default='')
+    image = models.ImageField(upload_to='item_images/', blank=True, null=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['expiration_date'], name='item_expiration_date'),
+            models.Index(fields=['quantity'], name='item_quantity'),
+            # Prefix range scans for autocomplete (accounts/autocomplete.py)
+            models.Index(F('inventory'), Lower('name'), name='item_inventory_name_lower'),
+            models.Index(F('inventory'), Lower('brand'), name='item_inventory_brand_lower'),
+        ]
+        constraints = [
+            # Also the index scans are resolved through (accounts/scanning.py).
+            models.UniqueConstraint(
+                fields=['inventory', 'barcode'], condition=~models.Q(barcode=''),
+                name='item_inventory_barcode_uniq',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def image_srcset(self):
+        from .images import srcset
+        return srcset(self.image_variants)
+
+    def thumbnail_url(self):
+        """URL of the grid-sized variant, falling back to the original image."""
+        from django.core.files.storage import default_storage
+        from .images import preferred_variant
+        name = preferred_variant(self.image_variants)
+        if name:
+            return default_storage.url(name)
+        return self.image.url if self.image else None
+
     def is_low_stock(self):
-        return self.quantity <= 3
+        from django.conf import settings
+        return self.quantity <= settings.LOW_STOCK_THRESHOLD
 
     def is_expiring_soon(self):
+        from django.conf import settings
         from django.utils import timezone
         if not self.expiration_date:
             return False
         today = timezone.localdate()
         delta = (self.expiration_date - today).days
-        return delta <= 7 and delta >= 0
+        return delta <= settings.EXPIRY_ALERT_DAYS and delta >= 0
+
+
+class ArchivedItem(models.Model):
+    """
+    An item moved out of the live ``Item`` table by the archiver (accounts/archive.py).
+
+    The row keeps the item's id and has the same columns, so archiving and
+    restoring are plain ``INSERT ... SELECT`` statements and the stock
+    ledger still refers to the right item.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='archived_items')
+    name = models.CharField(max_length=255)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    brand = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+    expiration_date = models.DateField(null=True, blank=True)
+    quantity = models.IntegerField(default=0)
+    barcode = models.CharField(max_length=64, blank=True, default='')
+    image = models.ImageField(upload_to='item_images/', blank=True, null=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-archived_at']
+        indexes = [models.Index(fields=['inventory', '-archived_at'], name='archived_item_inventory')]
+
+    def __str__(self):
+        return self.name
+
+
+class ImageUpload(models.Model):
+    """A resumable image upload in progress (accounts/uploads.py)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.filename} {self.offset}/{self.size}"
+
+
+class ItemForecast(models.Model):
+    """Latest consumption forecast for an item, written by the forecast_stock job."""
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name='forecast')
+    daily_rate = models.FloatField()
+    runs_out_on = models.DateField(null=True, blank=True, db_index=True)
+    reorder_quantity = models.IntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.item_id}: {self.daily_rate:.2f}/day"
+
+    def days_left(self):
+        from django.utils import timezone
+        if self.runs_out_on is None:
+            return None
+        return max(0, (self.runs_out_on - timezone.localdate()).days)
+
+
+class ItemAlert(models.Model):
+    """
+    Marks an item as already included in an alert digest.
+
+    Expiry alerts are keyed on the date they were sent for, so changing an
+    item's expiration date re-arms it; low-stock alerts are removed once the
+    item is restocked above the threshold.
+    """
+    KIND_EXPIRING = 'expiring'
+    KIND_LOW_STOCK = 'low_stock'
+    KIND_CHOICES = [
+        (KIND_EXPIRING, 'Expiring soon'),
+        (KIND_LOW_STOCK, 'Low stock'),
+    ]
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='alerts')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    expiration_date = models.DateField(null=True, blank=True)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['item', 'kind']
+
+    def __str__(self):
+        return f"{self.item_id} {self.kind}"
+
+
+class AccountDeletion(models.Model):
+    """An account deactivated by its owner, to be removed by the purger."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.requested_at}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only record of a change to an item's quantity.
+
+    Rows outlive the item they describe, so the foreign key has no database
+    constraint and deleting an item leaves its history in place.
+    """
+    KIND_CREATE = 'create'
+    KIND_ADJUST = 'adjust'
+    KIND_DELETE = 'delete'
+    KIND_CHOICES = [
+        (KIND_CREATE, 'Created'),
+        (KIND_ADJUST, 'Adjusted'),
+        (KIND_DELETE, 'Deleted'),
+    ]
+
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING, db_constraint=False, related_name='movements')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    delta = models.IntegerField()
+    quantity = models.IntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['item', 'created_at'], name='stock_movement_item_time')]
+
+    def __str__(self):
+        return f"{self.item_id} {self.kind} {self.delta:+d}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Per-item running totals covering every movement up to ``last_movement_id``.
+
+    ``consumed`` is the cumulative sum of quantity decreases, so consumption
+    over any window is the difference of two snapshot-anchored totals.
+    """
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING, db_constraint=False, related_name='snapshots')
+    quantity = models.IntegerField()
+    consumed = models.IntegerField()
+    last_movement_id = models.BigIntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['item', 'taken_at'], name='stock_snapshot_item_time')]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.taken_at}: {self.quantity}"
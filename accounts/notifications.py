@@ -0,0 +1,59 @@
+"""
+Pluggable delivery for alert digests.
+
+``ALERT_NOTIFIER`` names the class used by ``send_alerts``. A notifier's
+``send(user, subject, body)`` returns True once the digest is delivered;
+items are only marked as notified for delivered digests.
+"""
+
+import sys
+import threading
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class ConsoleNotifier:
+    """Writes digests to stdout (or any given stream)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, user, subject, body):
+        self.stream.write(f'To: {user.email or user.username}\nSubject: {subject}\n\n{body}\n\n')
+        return True
+
+
+class FileNotifier:
+    """Appends digests to ``ALERT_FILE_PATH``."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or settings.ALERT_FILE_PATH
+
+    def send(self, user, subject, body):
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f'[{timezone.now().isoformat()}] To: {user.email or user.username}\n'
+                    f'Subject: {subject}\n\n{body}\n\n')
+        return True
+
+
+class EmailNotifier:
+    """
+    Sends digests through Django's email backend.
+
+    For local testing point ``EMAIL_HOST``/``EMAIL_PORT`` at an SMTP stand-in
+    such as ``python -m aiosmtpd -n -l localhost:1025``.
+    """
+
+    def send(self, user, subject, body):
+        if not user.email:
+            return False
+        return send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [user.email]) == 1
+
+
+def get_notifier():
+    return import_string(settings.ALERT_NOTIFIER)()
@@ -0,0 +1,206 @@
+"""
+On-demand profiling of a single request, for staff.
+
+With ``PROFILE_DIR`` set, a staff user can add ``?profile=1`` to a URL (or
+send ``X-Profile: 1``). That one request then runs under a profiler and
+``tracemalloc``, and its results are written to ``PROFILE_DIR``:
+
+``<id>.collapsed``
+    Stack samples of the request thread, one ``frame;frame;frame count``
+    line per distinct stack. This is the folded format read by
+    flamegraph.pl, speedscope and inferno.
+``<id>.prof``
+    Written instead with ``?profile=cprofile``: a deterministic cProfile
+    dump for pstats, snakeviz or flameprof.
+``<id>.alloc.txt``
+    The 25 source lines whose allocations grew most during the request.
+
+The flag is read as a boolean (``?profile=0`` is off); ``cprofile`` picks
+the deterministic profiler. The id is returned in the ``X-Profile-Id``
+response header. tracemalloc is process-wide, so allocations made by
+concurrent requests also appear in the diff.
+
+Async views (the item JSON API) do not run on the request thread: under
+WSGI Django runs their coroutine on an event loop in another thread. A
+profiled request is therefore handled inside an event loop the middleware
+starts itself; Django schedules the view's coroutine on that loop, so both
+threads are known and both are profiled (stack samples taken while a
+thread is just waiting for the other are left out).
+
+Without ``PROFILE_DIR`` the middleware removes itself at startup
+(``MiddlewareNotUsed``), so ordinary requests pay nothing. With it, the
+cost for a request without the flag is one header and one query-string
+lookup.
+"""
+
+import contextlib
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+SAMPLE_INTERVAL = 0.001
+TOP_ALLOCATIONS = 25
+ENABLED = ('1', 'true', 'yes', 'on')
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _waiting(frame):
+    # A thread parked at a hand-off: the event loop waiting for events, or the
+    # request thread waiting for the loop. Lock and queue internals are skipped.
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in ('threading.py', 'queue.py'):
+        frame = frame.f_back
+    return frame is not None and frame.f_code.co_name in ('select', 'run_until_future')
+
+
+class StackSampler(threading.Thread):
+    """Samples the Python stacks of some threads every ``interval`` seconds into folded stacks."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_ids = set()
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def add_thread(self, thread_id):
+        self.thread_ids.add(thread_id)
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None or _waiting(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class DeterministicProfiler:
+    """One cProfile per thread (cProfile only sees the thread that enabled it), merged on save."""
+
+    def __init__(self):
+        self.profiles = []
+
+    def enable(self):
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        profile.enable()
+        return profile
+
+    def dump_stats(self, path):
+        stats = pstats.Stats(*self.profiles)
+        stats.dump_stats(path)
+
+
+def profile_requested(request):
+    flag = (request.headers.get('X-Profile') or request.GET.get('profile') or '').strip().lower()
+    if flag == 'cprofile':
+        mode = 'cprofile'
+    elif flag in ENABLED:
+        mode = 'sample'
+    else:
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        return None
+    return mode
+
+
+def write_allocation_diff(path, before, after):
+    lines = [str(stat) for stat in after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]]
+    with open(path, 'w') as fh:
+        fh.write('\n'.join(lines) + '\n')
+
+
+class ProfilingMiddleware:
+    """Profile flagged requests from staff; must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.directory = getattr(settings, 'PROFILE_DIR', '')
+        if not self.directory:
+            raise MiddlewareNotUsed
+        os.makedirs(self.directory, exist_ok=True)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profile_requested(request)
+        if mode is None:
+            return self.get_response(request)
+
+        path = re.sub(r'[^A-Za-z0-9-]+', '_', request.path.strip('/'))[:60] or 'root'
+        profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:6]}-{path}'
+        base = os.path.join(self.directory, profile_id)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        profiler = DeterministicProfiler() if mode == 'cprofile' else StackSampler()
+        if mode == 'sample':
+            profiler.start()
+        started = time.perf_counter()
+        try:
+            response = async_to_sync(self._in_loop)(request, profiler)
+        finally:
+            elapsed = time.perf_counter() - started
+            if mode == 'cprofile':
+                profiler.dump_stats(base + '.prof')
+            else:
+                profiler.stop()
+                with open(base + '.collapsed', 'w') as fh:
+                    fh.write(profiler.folded())
+            write_allocation_diff(base + '.alloc.txt', before, tracemalloc.take_snapshot())
+            if started_tracing:
+                tracemalloc.stop()
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Time'] = f'{elapsed * 1000:.1f}ms'
+        return response
+
+    async def _in_loop(self, request, profiler):
+        # The rest of the chain runs back on the request thread; an async view
+        # it reaches is scheduled on this loop instead of a new one.
+        with self._profiling(profiler):
+            return await sync_to_async(self._on_request_thread, thread_sensitive=True)(request, profiler)
+
+    def _on_request_thread(self, request, profiler):
+        with self._profiling(profiler):
+            return self.get_response(request)
+
+    @contextlib.contextmanager
+    def _profiling(self, profiler):
+        if isinstance(profiler, StackSampler):
+            profiler.add_thread(threading.get_ident())
+            yield
+            return
+        profile = profiler.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
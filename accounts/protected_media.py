@@ -0,0 +1,155 @@
+"""
+Authenticated delivery of uploaded media.
+
+Every ``MEDIA_URL`` request is routed through ``serve_media``. It first maps
+the path to the item image it belongs to: an original under
+``item_images/``, or a responsive variant under ``variants/<source>/``. It
+then checks with one query (``Item.image`` is indexed) that the requesting
+user owns a live item using that image. The bytes never pass through
+Python when ``MEDIA_ACCEL_REDIRECT`` is set: the response only carries an
+``X-Accel-Redirect`` to nginx's ``internal`` media location, and nginx
+streams the file with sendfile and answers Range and conditional requests
+itself.
+
+Without nginx (runserver, Cloud Run) the file is served from here instead,
+with the same ETag format nginx uses (``"<mtime>-<size>"`` in hex), support
+for a single byte range, and ``FileResponse`` so WSGI servers with a
+``wsgi.file_wrapper`` can still use sendfile for whole files.
+
+Thumbnails rendered by sorl-thumbnail (``THUMBNAIL_PREFIX``) are named by a
+hash of their source and options and cannot be mapped back to an item, so
+they only require a logged-in user.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .images import source_name_for_variant
+from .media import image_upload_dir
+from .models import Item
+
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def clean_name(name):
+    """Normalize a media-relative path, or return None if it escapes MEDIA_ROOT."""
+    name = posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+    if name in ('', '.') or name == '..' or name.startswith('../'):
+        return None
+    return name
+
+
+def source_image(name):
+    """The ``Item.image`` value a media path belongs to, or None."""
+    if name.startswith(image_upload_dir() + '/'):
+        return name
+    return source_name_for_variant(name)
+
+
+def can_read(user, name):
+    if not user.is_authenticated:
+        return False
+    source = source_image(name)
+    if source is not None:
+        return Item.objects.owned_by(user).filter(image=source).exists()
+    thumbnail_prefix = getattr(settings, 'THUMBNAIL_PREFIX', 'cache/')
+    return name.startswith(thumbnail_prefix)
+
+
+def etag_for(stat):
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def byte_range(header, size):
+    """
+    Parse a single ``Range: bytes=`` header into ``(start, end)`` (inclusive).
+
+    Returns None when the whole file should be sent (no header, multiple or
+    malformed ranges) and ``False`` when the range cannot be satisfied.
+    """
+    match = _RANGE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _private(response, etag, stat):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, private=True, max_age=3600)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def serve_media(request, name):
+    name = clean_name(name)
+    if name is None or not can_read(request.user, name):
+        raise Http404('Media not found')
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT', '')
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + name
+        patch_cache_control(response, private=True, max_age=3600)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    path = os.path.join(settings.MEDIA_ROOT, *name.split('/'))
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        raise Http404('Media not found')
+    etag = etag_for(stat)
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return _private(conditional, etag, stat)
+
+    if_range = request.headers.get('If-Range')
+    requested = byte_range(request.headers.get('Range'), stat.st_size)
+    if if_range and if_range != etag:
+        requested = None
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return _private(response, etag, stat)
+    if requested is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        return _private(response, etag, stat)
+
+    start, end = requested
+    length = end - start + 1
+    response = StreamingHttpResponse(_read_range(path, start, length), status=206, content_type=content_type)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return _private(response, etag, stat)
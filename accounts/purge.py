@@ -0,0 +1,81 @@
+"""
+Soft deletion of inventories and accounts, and the background purger.
+
+Deleting an inventory only stamps ``deleted_at``; deleting an account
+deactivates the user, stamps their inventories and queues an
+``AccountDeletion``. Both are a constant number of statements however many
+items are involved, and the rows disappear from every page immediately.
+
+``purge_deleted`` (the ``purge_deleted`` command) then removes the rows in
+chunks of ``batch_size`` items, each in its own short transaction, and
+deletes image files that no remaining item references.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .media import delete_unreferenced_images
+from .models import AccountDeletion, ArchivedItem, Category, Inventory, Item
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def soft_delete_inventory(inventory):
+    Inventory.objects.filter(pk=inventory.pk).update(deleted_at=timezone.now())
+
+
+def soft_delete_account(user):
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        Inventory.objects.filter(user=user).update(deleted_at=timezone.now())
+        AccountDeletion.objects.get_or_create(user=user)
+
+
+def purge_items(inventory_id, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete an inventory's items, live and archived, chunk by chunk. Returns the number deleted."""
+    deleted = 0
+    for model in (Item, ArchivedItem):
+        while True:
+            rows = list(
+                model.objects.filter(inventory_id=inventory_id).order_by()
+                .values_list('id', 'image')[:batch_size]
+            )
+            if not rows:
+                break
+            with transaction.atomic():
+                model.objects.filter(id__in=[pk for pk, _ in rows]).delete()
+            delete_unreferenced_images(image for _, image in rows)
+            deleted += len(rows)
+    return deleted
+
+
+def purge_deleted(batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Remove every soft-deleted inventory, then every account queued for deletion.
+
+    Returns ``{'inventories': n, 'items': n, 'accounts': n}``.
+    """
+    counts = {'inventories': 0, 'items': 0, 'accounts': 0}
+    inventory_ids = list(
+        Inventory.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at').values_list('id', flat=True)
+    )
+    for inventory_id in inventory_ids:
+        counts['items'] += purge_items(inventory_id, batch_size)
+        Inventory.all_objects.filter(id=inventory_id).delete()
+        counts['inventories'] += 1
+        if log:
+            log(f'inventory {inventory_id}')
+
+    for user_id in AccountDeletion.objects.order_by('requested_at').values_list('user_id', flat=True):
+        if Inventory.all_objects.filter(user_id=user_id).exists():
+            continue  # stamped after this run started; the next run picks it up
+        with transaction.atomic():
+            Category.objects.filter(user_id=user_id).delete()
+            User.objects.filter(id=user_id).delete()
+        counts['accounts'] += 1
+        if log:
+            log(f'account {user_id}')
+    return counts
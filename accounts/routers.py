@@ -0,0 +1,127 @@
+"""
+Primary/replica database routing with read-your-writes stickiness.
+
+Writes always go to ``default``. Reads go to one of ``DATABASE_REPLICAS``
+only inside views marked with ``@replica_reads`` (the dashboard, item list
+and item detail), and only while it is safe to do so:
+
+- the request has not written anything yet;
+- no transaction is open on the primary;
+- the client is not pinned to the primary.
+
+A request that writes sets a short-lived cookie, and the client's reads
+stay on the primary for ``REPLICA_STICKY_SECONDS`` afterwards, so a user
+sees their own changes even while the replicas are lagging behind.
+
+Everything outside a request (management commands, background jobs)
+reads from the primary.
+"""
+
+import functools
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PIN_COOKIE = 'pin_primary'
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _begin(request):
+    state = {
+        'read_only': False,
+        'pinned': PIN_COOKIE in request.COOKIES,
+        'wrote': False,
+    }
+    return _request_state.set(state), state
+
+
+def _finish(state, response):
+    if state['wrote'] and replicas() and settings.REPLICA_STICKY_SECONDS:
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+        )
+    return response
+
+
+class ReplicaPinningMiddleware:
+    """Tracks writes per request and pins the client to the primary after one."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token, state = _begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return _finish(state, response)
+
+    async def __acall__(self, request):
+        token, state = _begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return _finish(state, response)
+
+
+def replica_reads(view):
+    """Let the rest of the request read from a replica (works on sync and async views)."""
+    def allow():
+        state = _request_state.get()
+        if state is not None:
+            state['read_only'] = True
+
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            allow()
+            return await view(request, *args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            allow()
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            state is None or not state['read_only'] or state['pinned'] or state['wrote']
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        aliases = replicas()
+        return random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # every alias holds the same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,83 @@
+"""
+Barcode scanning: resolve a code and adjust its item's stock in one statement.
+
+A scan is ``(inventory, code, delta)``. ``scan`` applies it with a single
+``UPDATE ... RETURNING``: the row is found through the partial unique
+index on ``(inventory_id, barcode)``, ownership is checked in the same
+statement (a primary-key probe of the inventory), and the new quantity
+comes back without a follow-up SELECT. A scan that would take the
+quantity below zero matches no row and is rejected, rather than clamped,
+so the ledger records exactly the delta that was scanned.
+
+There is no per-process cache of code -> item id for bursts of repeat
+scans: the partial unique index already resolves the code in one probe,
+and a cached id would still have to re-check barcode and ownership in the
+same UPDATE, so it could only save nothing or cost a second statement.
+
+``RETURNING`` needs SQLite 3.35+ or PostgreSQL.
+"""
+
+from django.db import connections, router
+from django.utils import timezone
+
+from .ledger import record
+from .models import Inventory, Item, StockMovement
+
+
+MAX_CODE_LENGTH = Item._meta.get_field('barcode').max_length
+
+
+class ScanError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _update(alias, user_id, inventory_id, code, delta):
+    """Apply ``delta`` to the matching item; returns ``(id, name, quantity)`` or None."""
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    item_table = quote(Item._meta.db_table)
+    inventory_table = quote(Inventory._meta.db_table)
+    sql = (
+        f'UPDATE {item_table} SET {quote("quantity")} = {quote("quantity")} + %s, {quote("updated_at")} = %s'
+        f' WHERE {quote("inventory_id")} = %s AND {quote("barcode")} = %s'
+        f' AND {quote("quantity")} + %s >= 0'
+        f' AND {quote("inventory_id")} IN (SELECT {quote("id")} FROM {inventory_table}'
+        f' WHERE {quote("id")} = %s AND {quote("user_id")} = %s AND {quote("deleted_at")} IS NULL)'
+    )
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql += f' RETURNING {quote("id")}, {quote("name")}, {quote("quantity")}'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [delta, now, inventory_id, code, delta, inventory_id, user_id])
+        return cursor.fetchone()
+
+
+def scan(user, inventory_id, code, delta=1):
+    """
+    Add ``delta`` to the quantity of the item with barcode ``code``.
+
+    Returns ``{'id', 'name', 'quantity'}``. Raises ``ScanError`` with status
+    404 for an unknown code and 409 when there is not enough stock.
+    """
+    code = str(code or '').strip()
+    if not code or len(code) > MAX_CODE_LENGTH:
+        raise ScanError('A barcode is required.' if not code else 'Barcode is too long.')
+    if isinstance(delta, bool) or not isinstance(delta, int) or delta == 0:
+        raise ScanError('Delta must be a non-zero integer.')
+
+    alias = router.db_for_write(Item)
+    row = _update(alias, user.id, inventory_id, code, delta)
+    if row is None:
+        current = (
+            Item.objects.using(alias).owned_by(user)
+            .filter(inventory_id=inventory_id, barcode=code)
+            .values_list('id', 'quantity').first()
+        )
+        if current is None:
+            raise ScanError('No item with this barcode in this inventory.', status=404)
+        raise ScanError(f'Only {current[1]} in stock.', status=409)
+
+    item_id, name, quantity = row
+    record(Item(id=item_id, quantity=quantity), StockMovement.KIND_ADJUST, delta)
+    return {'id': item_id, 'name': name, 'quantity': quantity}
@@ -0,0 +1,139 @@
+"""
+Item serialization shared by every JSON endpoint.
+
+Items are serialized from ``values()`` rows (plain dicts), never from model
+instances, so a whole page can be rendered without building ``Item``
+objects. ``?fields=a,b,c`` selects a sparse fieldset; only the columns the
+requested fields need are fetched.
+
+Responses are encoded with ``orjson`` when it is installed and fall back
+to a compact stdlib ``json`` encoding otherwise.
+"""
+
+import json
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from .images import preferred_variant, srcset, variant_urls
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _url(name):
+    return default_storage.url(name) if name else None
+
+
+def _thumbnail_url(row):
+    return _url(preferred_variant(row['image_variants']) or row['image'])
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# public field -> (columns needed, row -> value)
+ITEM_FIELDS = {
+    'id': (('id',), lambda row: row['id']),
+    'name': (('name',), lambda row: row['name']),
+    'quantity': (('quantity',), lambda row: row['quantity']),
+    'brand': (('brand',), lambda row: row['brand']),
+    'barcode': (('barcode',), lambda row: row['barcode']),
+    'description': (('description',), lambda row: row['description']),
+    'category': (('category__name',), lambda row: row['category__name']),
+    'category_id': (('category_id',), lambda row: row['category_id']),
+    'expiration_date': (('expiration_date',), lambda row: _isoformat(row['expiration_date'])),
+    'updated_at': (('updated_at',), lambda row: _isoformat(row['updated_at'])),
+    'image_url': (('image',), lambda row: _url(row['image'])),
+    'thumbnail_url': (('image', 'image_variants'), _thumbnail_url),
+    'image_variants': (('image_variants',), lambda row: variant_urls(row['image_variants'])),
+    'image_srcset': (('image_variants',), lambda row: srcset(row['image_variants'])),
+}
+
+DEFAULT_ITEM_FIELDS = (
+    'id', 'name', 'quantity', 'brand', 'barcode', 'description', 'category', 'category_id', 'expiration_date',
+    'image_url', 'thumbnail_url', 'image_variants', 'image_srcset',
+)
+
+
+def parse_fields(request, default=DEFAULT_ITEM_FIELDS):
+    """
+    Return the fieldset requested with ``?fields=``.
+
+    Raises ValueError naming any unknown field.
+    """
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in ITEM_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown field(s): {", ".join(unknown)}')
+    return fields or default
+
+
+def item_columns(fields):
+    """The ``values()`` columns needed to render ``fields``."""
+    columns = {}
+    for field in fields:
+        columns.update(dict.fromkeys(ITEM_FIELDS[field][0]))
+    return tuple(columns)
+
+
+def serialize_item_row(row, fields=DEFAULT_ITEM_FIELDS):
+    return {field: ITEM_FIELDS[field][1](row) for field in fields}
+
+
+def item_values(queryset, fields=DEFAULT_ITEM_FIELDS):
+    """Narrow an Item queryset to the ``values()`` rows ``fields`` needs."""
+    return queryset.values(*item_columns(fields))
+
+
+def serialize_rows(rows, fields=DEFAULT_ITEM_FIELDS):
+    return [serialize_item_row(row, fields) for row in rows]
+
+
+def serialize_items(queryset, fields=DEFAULT_ITEM_FIELDS):
+    """Serialize a whole Item queryset without instantiating model objects."""
+    return serialize_rows(item_values(queryset, fields), fields)
+
+
+def item_row(item):
+    """Build a ``values()``-shaped row from an Item already in memory."""
+    return {
+        'id': item.id,
+        'name': item.name,
+        'quantity': item.quantity,
+        'brand': item.brand,
+        'barcode': item.barcode,
+        'description': item.description,
+        'category__name': item.category.name if item.category_id else None,
+        'category_id': item.category_id,
+        'expiration_date': item.expiration_date,
+        'updated_at': item.updated_at,
+        'image': item.image.name if item.image else None,
+        'image_variants': item.image_variants,
+    }
+
+
+def serialize_item(item, fields=DEFAULT_ITEM_FIELDS):
+    """Serialize an Item instance the same way rows are (used right after saves)."""
+    return serialize_item_row(item_row(item), fields)
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse equivalent that uses the fastest available encoder."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
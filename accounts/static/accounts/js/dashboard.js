@@ -0,0 +1,181 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('createInventoryForm');
+    const formAlert = document.getElementById('formAlert');
+    const submitBtn = document.getElementById('submitBtn');
+
+    // Create inventory form submission - delegated
+    document.addEventListener('submit', async function(e) {
+        if (e.target.id !== 'createInventoryForm') return;
+        
+        e.preventDefault();
+        formAlert.classList.add('d-none');
+        submitBtn.disabled = true;
+        submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm me-2"></span>Creating...';
+
+        try {
+            const name = document.getElementById('inventoryName').value.trim();
+            const emoji = document.querySelector('input[name="emoji"]:checked').value;
+
+            const response = await fetch(form.dataset.url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                },
+                body: JSON.stringify({ name, emoji })
+            });
+
+            const data = await response.json();
+
+            if (data.success) {
+                formAlert.classList.remove('d-none', 'alert-danger');
+                formAlert.classList.add('alert-success');
+                formAlert.innerHTML = `<strong>✓ Success!</strong> ${data.message}`;
+                form.reset();
+                setTimeout(() => { location.reload(); }, 1500);
+            } else {
+                formAlert.classList.remove('d-none', 'alert-success');
+                formAlert.classList.add('alert-danger');
+                formAlert.innerHTML = `<strong>✗ Error:</strong> ${data.error}`;
+                submitBtn.disabled = false;
+                submitBtn.innerHTML = 'Create Inventory';
+            }
+        } catch (error) {
+            formAlert.classList.remove('d-none', 'alert-success');
+            formAlert.classList.add('alert-danger');
+            formAlert.innerHTML = `<strong>✗ Error:</strong> ${error.message}`;
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = 'Create Inventory';
+        }
+    });
+
+    // Edit inventory button - delegated
+    document.addEventListener('click', function(e) {
+        if (e.target.closest('.edit-inventory-btn')) {
+            const btn = e.target.closest('.edit-inventory-btn');
+            const card = btn.closest('.inventory-card');
+            const inventoryId = btn.getAttribute('data-inventory-id');
+            const inventoryName = card.querySelector('.inventory-name').textContent.trim();
+            const inventoryEmoji = card.querySelector('.inventory-emoji').textContent.trim();
+            
+            document.getElementById('editInventoryId').value = inventoryId;
+            document.getElementById('editInventoryName').value = inventoryName;
+            document.querySelectorAll('.edit-emoji-radio').forEach(radio => {
+                radio.checked = radio.value === inventoryEmoji;
+            });
+            document.getElementById('editInventoryFormAlert').classList.add('d-none');
+            const modal = new bootstrap.Modal(document.getElementById('editInventoryModal'));
+            modal.show();
+        }
+    });
+
+    // Duplicate inventory button - delegated
+    document.addEventListener('click', async function(e) {
+        const btn = e.target.closest('.duplicate-inventory-btn');
+        if (!btn) return;
+        btn.disabled = true;
+        try {
+            const response = await fetch(btn.getAttribute('data-url'), {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                },
+                body: '{}'
+            });
+            const data = await response.json();
+            if (data.success) {
+                location.reload();
+            } else {
+                alert(data.error);
+                btn.disabled = false;
+            }
+        } catch (error) {
+            alert(error.message);
+            btn.disabled = false;
+        }
+    });
+
+    // Delete inventory button - delegated
+    document.addEventListener('click', async function(e) {
+        if (e.target.id !== 'deleteInventoryBtn') return;
+        
+        if (!confirm('Are you sure you want to delete this inventory and all its items? This cannot be undone.')) return;
+        const inventoryId = document.getElementById('editInventoryId').value;
+        const editAlert = document.getElementById('editInventoryFormAlert');
+        
+        try {
+            const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+            if (!csrfToken) {
+                throw new Error('CSRF token not found');
+            }
+            
+            const response = await fetch(`/accounts/inventories/${inventoryId}/delete/`, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': csrfToken.value,
+                }
+            });
+            
+            if (!response.ok) {
+                throw new Error(`Server error: ${response.status}`);
+            }
+            
+            const data = await response.json();
+            
+            if (data.success) {
+                editAlert.classList.remove('d-none', 'alert-danger');
+                editAlert.classList.add('alert-success');
+                editAlert.innerHTML = '<strong>✓ Success!</strong> Inventory deleted.';
+                setTimeout(() => { location.reload(); }, 1000);
+            } else {
+                editAlert.classList.remove('d-none', 'alert-success');
+                editAlert.classList.add('alert-danger');
+                editAlert.innerHTML = `<strong>✗ Error:</strong> ${data.error}`;
+            }
+        } catch (error) {
+            editAlert.classList.remove('d-none', 'alert-success');
+            editAlert.classList.add('alert-danger');
+            editAlert.innerHTML = `<strong>✗ Error:</strong> ${error.message}`;
+            console.error('Delete error:', error);
+        }
+    });
+
+    // Edit inventory form submission - delegated
+    document.addEventListener('submit', async function(e) {
+        if (e.target.id !== 'editInventoryForm') return;
+        
+        e.preventDefault();
+        const inventoryId = document.getElementById('editInventoryId').value;
+        const name = document.getElementById('editInventoryName').value.trim();
+        const emoji = document.querySelector('.edit-emoji-radio:checked').value;
+        const editAlert = document.getElementById('editInventoryFormAlert');
+        
+        try {
+            const response = await fetch(`/accounts/inventories/${inventoryId}/update/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                },
+                body: JSON.stringify({ name, emoji })
+            });
+            const data = await response.json();
+            
+            if (data.success) {
+                editAlert.classList.remove('d-none', 'alert-danger');
+                editAlert.classList.add('alert-success');
+                editAlert.innerHTML = '<strong>✓ Success!</strong> Inventory updated.';
+                setTimeout(() => { location.reload(); }, 1000);
+            } else {
+                editAlert.classList.remove('d-none', 'alert-success');
+                editAlert.classList.add('alert-danger');
+                editAlert.innerHTML = `<strong>✗ Error:</strong> ${data.error}`;
+            }
+        } catch (error) {
+            editAlert.classList.remove('d-none', 'alert-success');
+            editAlert.classList.add('alert-danger');
+            editAlert.innerHTML = `<strong>✗ Error:</strong> ${error.message}`;
+        }
+    });
+});
@@ -0,0 +1,374 @@
+const inventoryId = document.currentScript.dataset.inventoryId;
+
+document.addEventListener('DOMContentLoaded', function() {
+
+    // Helper: fetch wrapper with JSON
+    async function fetchJSON(url, opts={}){
+        const res = await fetch(url, opts);
+        if (!res.ok) {
+            throw new Error(`Server error: ${res.status} - ${res.statusText}`);
+        }
+        return res.json();
+    }
+
+    // Image preview handler using event delegation
+    document.addEventListener('change', (e) => {
+        if (e.target.id === 'itemImage') {
+            const file = e.target.files[0];
+            const imagePreview = document.getElementById('imagePreview');
+            if(!file) { imagePreview.innerHTML = ''; return; }
+            const url = URL.createObjectURL(file);
+            imagePreview.innerHTML = `<img src="${url}" style="max-width:140px; max-height:140px; border-radius:8px;"/> <div><button id="removePreview" class="btn btn-sm btn-link">Remove</button></div>`;
+            document.getElementById('removeImageWrap').classList.add('d-none');
+            document.getElementById('removePreview')?.addEventListener('click', ()=>{ e.target.value=''; imagePreview.innerHTML=''; });
+        }
+    });
+
+    // Create modal handler - delegated click on button with id
+    document.addEventListener('click', (e) => {
+        if (e.target.id === 'createItemBtn' || e.target.closest('#createItemBtn')) {
+            const imagePreview = document.getElementById('imagePreview');
+            document.getElementById('itemModalTitle').textContent = 'Add Item';
+            document.getElementById('itemForm').reset();
+            document.getElementById('itemId').value = '';
+            document.getElementById('removeImageWrap').classList.add('d-none');
+            document.getElementById('deleteItemBtn').classList.add('d-none');
+            document.getElementById('itemFormAlert').classList.add('d-none');
+            imagePreview.innerHTML = '';
+        }
+    });
+
+    // Edit item buttons - delegated to parent container
+    document.addEventListener('click', async (e) => {
+        if (e.target.closest('.edit-item-btn')) {
+            e.preventDefault();
+            e.stopPropagation();
+            const btn = e.target.closest('.edit-item-btn');
+            const id = btn.dataset.itemId;
+            const imagePreview = document.getElementById('imagePreview');
+            
+            try {
+                const res = await fetchJSON(`/accounts/inventories/${inventoryId}/items/${id}/detail/`);
+                if(!res.success){ alert('Could not load item'); return; }
+                const item = res.item;
+                document.getElementById('itemModalTitle').textContent = 'Edit Item';
+                document.getElementById('itemId').value = item.id;
+                document.getElementById('itemName').value = item.name;
+                document.getElementById('itemQuantity').value = item.quantity;
+                document.getElementById('itemCategory').value = item.category_id || '';
+                document.getElementById('itemBrand').value = item.brand;
+                document.getElementById('itemBarcode').value = item.barcode;
+                document.getElementById('itemDescription').value = item.description;
+                document.getElementById('itemExpiration').value = item.expiration_date || '';
+                if(item.image_url){
+                    const srcset = item.image_srcset ? ` srcset="${item.image_srcset}" sizes="140px"` : '';
+                    imagePreview.innerHTML = `<img src="${item.thumbnail_url || item.image_url}"${srcset} loading="lazy" decoding="async" style="max-width:140px; max-height:140px; border-radius:8px;"/>`;
+                    document.getElementById('removeImageWrap').classList.remove('d-none');
+                } else {
+                    imagePreview.innerHTML = '';
+                    document.getElementById('removeImageWrap').classList.add('d-none');
+                }
+                document.getElementById('deleteItemBtn').classList.remove('d-none');
+                const modalEl = document.getElementById('itemModal');
+                const modal = new bootstrap.Modal(modalEl);
+                modal.show();
+            } catch (error) {
+                console.error('Error loading item:', error);
+                alert('Error loading item details');
+            }
+        }
+    });
+
+    // Resumable image upload: the file goes up in chunks after the item is saved.
+    // A failed chunk is retried from the server's offset, and an interrupted
+    // upload of the same file resumes where it stopped (id kept in localStorage).
+    const CHUNK_RETRIES = 5;
+
+    async function sha256Hex(file) {
+        // crypto.subtle only exists in secure contexts (HTTPS or localhost);
+        // over plain HTTP the upload goes without the whole-file checksum.
+        if (!(window.crypto && crypto.subtle)) return '';
+        const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    async function uploadImage(itemId, file) {
+        const csrf = {'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value};
+        const key = `upload:${file.name}:${file.size}:${file.lastModified}`;
+        let upload = null;
+        if (localStorage.getItem(key)) {
+            const res = await fetch(`/accounts/api/uploads/${localStorage.getItem(key)}/`);
+            if (res.ok) upload = (await res.json()).upload;
+        }
+        if (!upload) {
+            const res = await fetchJSON('/accounts/api/uploads/', {
+                method: 'POST',
+                headers: {...csrf, 'Content-Type': 'application/json'},
+                body: JSON.stringify({filename: file.name, size: file.size, sha256: await sha256Hex(file)})
+            });
+            upload = res.upload;
+            localStorage.setItem(key, upload.id);
+        }
+
+        let offset = upload.offset;
+        let failures = 0;
+        while (offset < file.size) {
+            let res = null;
+            try {
+                res = await fetch(`/accounts/api/uploads/${upload.id}/`, {
+                    method: 'PATCH',
+                    headers: {...csrf, 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset)},
+                    body: file.slice(offset, offset + upload.chunk_size)
+                });
+            } catch (error) {
+                // network drop: fall through to the retry below
+            }
+            if (res && (res.ok || res.status === 409)) {
+                const accepted = parseInt(res.headers.get('Upload-Offset'), 10);
+                // another tab is writing this upload: give it a moment
+                if (accepted === offset) await new Promise((resolve) => setTimeout(resolve, 500));
+                offset = accepted;
+                failures = 0;
+                continue;
+            }
+            if (res && res.status < 500) {
+                localStorage.removeItem(key);
+                throw new Error(`Upload failed: ${res.status}`);
+            }
+            if (++failures > CHUNK_RETRIES) throw new Error('Upload interrupted; save again to resume.');
+            await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+        }
+
+        localStorage.removeItem(key);
+        return fetchJSON(`/accounts/inventories/${inventoryId}/items/${itemId}/image/`, {
+            method: 'POST',
+            headers: {...csrf, 'Content-Type': 'application/json'},
+            body: JSON.stringify({upload_id: upload.id})
+        });
+    }
+
+    // Form submission - delegated
+    document.addEventListener('submit', async (e) => {
+        if (e.target.id === 'itemForm') {
+            e.preventDefault();
+            const id = document.getElementById('itemId').value;
+            const url = id ? `/accounts/inventories/${inventoryId}/items/${id}/update/` : `/accounts/inventories/${inventoryId}/items/create/`;
+            const form = document.getElementById('itemForm');
+            const fd = new FormData(form);
+            const alert = document.getElementById('itemFormAlert');
+            const image = document.getElementById('itemImage').files[0];
+            if (image) fd.delete('image');
+
+            try {
+                const res = await fetch(url, {
+                    method: 'POST',
+                    headers: { 'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value },
+                    body: fd
+                });
+                const data = await res.json();
+                if(data.success){
+                    if (image) {
+                        try {
+                            await uploadImage(data.item.id, image);
+                        } catch (error) {
+                            // Fall back to sending the image with the form, as before chunked uploads
+                            console.error('Chunked upload failed:', error);
+                            fd.set('image', image);
+                            const retry = await fetchJSON(`/accounts/inventories/${inventoryId}/items/${data.item.id}/update/`, {
+                                method: 'POST',
+                                headers: { 'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value },
+                                body: fd
+                            });
+                            if (!retry.success) throw new Error(JSON.stringify(retry.errors || retry.error));
+                        }
+                    }
+                    location.reload();
+                } else {
+                    alert.classList.remove('d-none');
+                    alert.classList.add('alert-danger');
+                    alert.textContent = JSON.stringify(data.errors || data.error || 'Unknown error');
+                }
+            } catch (error) {
+                console.error('Form submission error:', error);
+                alert.classList.remove('d-none');
+                alert.classList.add('alert-danger');
+                alert.textContent = 'Error submitting form: ' + error.message;
+            }
+        }
+    });
+
+    // Delete item button - delegated
+    document.addEventListener('click', async (e) => {
+        if (e.target.id === 'deleteItemBtn') {
+            if(!confirm('Delete this item?')) return;
+            const id = document.getElementById('itemId').value;
+            try {
+                const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+                if (!csrfToken) {
+                    throw new Error('CSRF token not found');
+                }
+                const res = await fetchJSON(`/accounts/inventories/${inventoryId}/items/${id}/delete/`, {
+                    method:'POST', 
+                    headers:{'X-CSRFToken': csrfToken.value}
+                });
+                if(res.success) {
+                    location.reload();
+                } else {
+                    alert(`Failed to delete: ${res.error || 'Unknown error'}`);
+                }
+            } catch (error) {
+                console.error('Delete error:', error);
+                alert(`Error deleting item: ${error.message}`);
+            }
+        }
+    });
+
+    // Quantity +/- buttons - delegated. Rapid clicks are coalesced per item
+    // and sent as one batch request once the user pauses. Deltas the server
+    // did not apply go back into the queue (throttled or unreachable server)
+    // or are taken off the displayed value (rejected).
+    const pendingDeltas = new Map();
+    let flushTimer = null;
+    let flushRetries = 0;
+    const FLUSH_DELAY_MS = 400;
+    const FLUSH_MAX_RETRIES = 5;
+
+    function showQuantity(id, quantity) {
+        const el = document.querySelector(`.qty-number[data-item-id='${id}']`);
+        if (el) el.textContent = quantity;
+    }
+
+    function revertQuantity(id, delta) {
+        const el = document.querySelector(`.qty-number[data-item-id='${id}']`);
+        if (el) el.textContent = Math.max(0, (parseInt(el.textContent, 10) || 0) - delta);
+    }
+
+    function scheduleFlush(delay) {
+        clearTimeout(flushTimer);
+        flushTimer = setTimeout(flushQuantities, delay);
+    }
+
+    async function flushQuantities(keepalive = false) {
+        clearTimeout(flushTimer);
+        flushTimer = null;
+        if (!pendingDeltas.size) return;
+        const operations = [];
+        pendingDeltas.forEach((delta, id) => {
+            if (delta) operations.push({op: 'quantity', item_id: Number(id), delta: delta});
+        });
+        pendingDeltas.clear();
+        if (!operations.length) return;
+        let res = null;
+        try {
+            res = await fetch(`/accounts/inventories/${inventoryId}/items/batch/`, {
+                method: 'POST',
+                keepalive: keepalive,
+                headers: {'Content-Type': 'application/json', 'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value},
+                body: JSON.stringify({operations: operations})
+            });
+        } catch (error) {
+            console.error('Quantity update error:', error);
+        }
+        const transient = !res || res.status === 429 || res.status >= 500;
+        if (transient && flushRetries < FLUSH_MAX_RETRIES) {
+            // Not applied: queue the deltas again, merged with newer clicks
+            operations.forEach((op) => {
+                const id = String(op.item_id);
+                pendingDeltas.set(id, (pendingDeltas.get(id) || 0) + op.delta);
+            });
+            flushRetries += 1;
+            const retryAfter = res && parseInt(res.headers.get('Retry-After'), 10);
+            scheduleFlush(retryAfter ? retryAfter * 1000 : FLUSH_DELAY_MS * 2 ** flushRetries);
+            return;
+        }
+        flushRetries = 0;
+        if (!res || !res.ok) {
+            console.error('Quantity update failed:', res ? res.status : 'network error');
+            operations.forEach((op) => revertQuantity(op.item_id, op.delta));
+            return;
+        }
+        const body = await res.json();
+        body.results.forEach((result, index) => {
+            if (!result.success) {
+                revertQuantity(operations[index].item_id, operations[index].delta);
+            } else if (!pendingDeltas.has(String(result.item_id))) {
+                // Only overwrite the optimistic value if no newer clicks are queued
+                showQuantity(result.item_id, result.quantity);
+            }
+        });
+    }
+
+    document.addEventListener('click', (e) => {
+        const btn = e.target.closest('.qty-increase, .qty-decrease');
+        if (!btn) return;
+        const id = btn.dataset.itemId;
+        const step = btn.classList.contains('qty-increase') ? 1 : -1;
+        const el = document.querySelector(`.qty-number[data-item-id='${id}']`);
+        const current = parseInt(el.textContent, 10) || 0;
+        if (step < 0 && current === 0) return;
+        showQuantity(id, current + step);
+        pendingDeltas.set(id, (pendingDeltas.get(id) || 0) + step);
+        if (!flushRetries) scheduleFlush(FLUSH_DELAY_MS);  // a pending retry flushes these too
+    });
+
+    window.addEventListener('pagehide', () => flushQuantities(true));
+
+    // Restore an archived item - delegated
+    document.addEventListener('click', async (e) => {
+        const btn = e.target.closest('.restore-item-btn');
+        if (!btn) return;
+        btn.disabled = true;
+        try {
+            await fetchJSON(`/accounts/inventories/${inventoryId}/archive/restore/`, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json', 'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value},
+                body: JSON.stringify({item_ids: [btn.dataset.itemId]})
+            });
+            location.reload();
+        } catch (error) {
+            console.error('Restore error:', error);
+            btn.disabled = false;
+        }
+    });
+
+    // Name/brand typeahead: suggestions for the latest prefix typed, after a short pause
+    const SUGGEST_DELAY_MS = 120;
+    const suggestTimers = {};
+    const suggestCache = new Map();
+    document.addEventListener('input', (e) => {
+        const field = e.target.dataset && e.target.dataset.suggest;
+        if (!field) return;
+        const input = e.target;
+        clearTimeout(suggestTimers[field]);
+        suggestTimers[field] = setTimeout(async () => {
+            const prefix = input.value.trim();
+            if (!prefix) return;
+            const key = `${field}:${prefix.toLowerCase()}`;
+            try {
+                if (!suggestCache.has(key)) {
+                    const params = new URLSearchParams({field: field, q: prefix});
+                    const res = await fetchJSON(`/accounts/api/items/autocomplete/?${params}`);
+                    suggestCache.set(key, res.suggestions[field]);
+                }
+                if (input.value.trim() !== prefix) return;  // typed on meanwhile
+                const list = document.getElementById(input.getAttribute('list'));
+                list.replaceChildren(...suggestCache.get(key).map((value) => {
+                    const option = document.createElement('option');
+                    option.value = value;
+                    return option;
+                }));
+            } catch (error) {
+                console.error('Autocomplete error:', error);
+            }
+        }, SUGGEST_DELAY_MS);
+    });
+
+    // Sort select change handler - delegated
+    document.addEventListener('change', (e) => {
+        if (e.target.id === 'sortSelect') {
+            const params = new URLSearchParams(window.location.search);
+            params.set('sort', e.target.value);
+            window.location.search = params.toString();
+        }
+    });
+});
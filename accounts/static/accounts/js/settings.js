@@ -0,0 +1,147 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Tab switching
+    window.switchTab = function(e, tabName) {
+        e.preventDefault();
+        
+        // Hide all sections
+        document.getElementById('email-section').style.display = 'none';
+        document.getElementById('password-section').style.display = 'none';
+        document.getElementById('delete-section').style.display = 'none';
+        
+        // Remove active class from all buttons
+        document.querySelectorAll('.list-group-item').forEach(item => {
+            item.classList.remove('active');
+        });
+        
+        // Show selected section
+        document.getElementById(tabName + '-section').style.display = 'block';
+        
+        // Add active class to clicked button
+        event.target.closest('.list-group-item').classList.add('active');
+    };
+
+    // Helper: fetch wrapper with JSON
+    async function fetchJSON(url, opts={}) {
+        const res = await fetch(url, opts);
+        if (!res.ok) {
+            throw new Error(`Server error: ${res.status} - ${res.statusText}`);
+        }
+        return res.json();
+    }
+
+    // Email form submission
+    document.getElementById('emailForm').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const alert = document.getElementById('emailAlert');
+        
+        try {
+            const newEmail = document.getElementById('newEmail').value.trim();
+            const currentPassword = document.getElementById('currentPassword').value;
+            
+            const res = await fetchJSON('/accounts/api/settings/email/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+                },
+                body: JSON.stringify({
+                    new_email: newEmail,
+                    current_password: currentPassword
+                })
+            });
+            
+            alert.classList.remove('d-none', 'alert-danger');
+            alert.classList.add('alert-success');
+            alert.innerHTML = `<strong>✓ Success!</strong> ${res.message}`;
+            
+            document.getElementById('emailForm').reset();
+            
+            // Reload page after 2 seconds
+            setTimeout(() => location.reload(), 2000);
+        } catch (error) {
+            console.error('Email change error:', error);
+            alert.classList.remove('d-none', 'alert-success');
+            alert.classList.add('alert-danger');
+            alert.innerHTML = `<strong>✗ Error:</strong> ${error.message}`;
+        }
+    });
+
+    // Password form submission
+    document.getElementById('passwordForm').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const alert = document.getElementById('passwordAlert');
+        
+        try {
+            const currentPassword = document.getElementById('currentPasswordField').value;
+            const newPassword = document.getElementById('newPassword').value;
+            const confirmPassword = document.getElementById('confirmPassword').value;
+            
+            if (newPassword !== confirmPassword) {
+                throw new Error('Passwords do not match.');
+            }
+            
+            const res = await fetchJSON('/accounts/api/settings/password/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+                },
+                body: JSON.stringify({
+                    current_password: currentPassword,
+                    new_password: newPassword
+                })
+            });
+            
+            alert.classList.remove('d-none', 'alert-danger');
+            alert.classList.add('alert-success');
+            alert.innerHTML = `<strong>✓ Success!</strong> ${res.message}`;
+            
+            document.getElementById('passwordForm').reset();
+        } catch (error) {
+            console.error('Password change error:', error);
+            alert.classList.remove('d-none', 'alert-success');
+            alert.classList.add('alert-danger');
+            alert.innerHTML = `<strong>✗ Error:</strong> ${error.message}`;
+        }
+    });
+
+    // Delete account form submission
+    document.getElementById('deleteForm').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const alert = document.getElementById('deleteAlert');
+        
+        try {
+            const usernameConfirmation = document.getElementById('usernameConfirm').value.trim();
+            const currentPassword = document.getElementById('deletePassword').value;
+            
+            // Final confirmation before deleting
+            if (!confirm('Are you absolutely sure? This action cannot be undone.\n\nAll your inventories, items, and account data will be permanently deleted.')) {
+                return;
+            }
+            
+            const res = await fetchJSON('/accounts/api/settings/delete/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+                },
+                body: JSON.stringify({
+                    username_confirmation: usernameConfirmation,
+                    current_password: currentPassword
+                })
+            });
+            
+            alert.classList.remove('d-none', 'alert-danger');
+            alert.classList.add('alert-success');
+            alert.innerHTML = `<strong>✓ Account Deleted!</strong> ${res.message}`;
+            
+            // Redirect to login after 2 seconds
+            setTimeout(() => window.location.href = '/accounts/login/', 2000);
+        } catch (error) {
+            console.error('Account deletion error:', error);
+            alert.classList.remove('d-none', 'alert-success');
+            alert.classList.add('alert-danger');
+            alert.innerHTML = `<strong>✗ Error:</strong> ${error.message}`;
+        }
+    });
+});
@@ -0,0 +1,68 @@
+"""
+Static file storage: content-hashed names plus precompressed copies.
+
+``collectstatic`` writes every file under its hashed name (from
+``ManifestStaticFilesStorage``) and then a ``.gz`` (and, when the optional
+``brotli`` package is installed, a ``.br``) next to each text asset, so
+nginx can serve them with ``gzip_static`` without compressing per request.
+
+With ``DEBUG`` on and no manifest yet, URLs fall back to the unhashed
+source names served by the staticfiles finders. Otherwise a missing
+manifest is an error (``manifest_strict``): unhashed names served under
+nginx's ``immutable`` caching would pin stale assets across deploys.
+"""
+
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz files are written
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.xml', '.map')
+
+# Below this size the compressed copy saves less than its own request overhead.
+MIN_COMPRESS_SIZE = 256
+
+
+def compress_file(path):
+    """Write ``path.gz`` (and ``path.br``) when they are smaller; returns the suffixes written."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+    written = []
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            # nginx recommends matching mtimes: they become Last-Modified/ETag
+            stat = os.stat(path)
+            os.utime(path + suffix, (stat.st_atime, stat.st_mtime))
+            written.append(suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress_file(self.path(name))
+
+    def stored_name(self, name):
+        if not self.hashed_files and settings.DEBUG:
+            return name
+        return super().stored_name(name)
@@ -1,6 +1,60 @@
-from django.test import TestCase, Client
+import base64
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import pstats
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, Client, override_settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
 from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.files import locks
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from . import autocomplete, forecast, ledger, routers, scanning, views, warmup
+from .alerts import send_alert_digests
+from .archive import archive_items, restore_items
+from .backends import EmailBackend
+from .batch import apply_item_operations
+from .categories import categories_by_name
+from .cache import CounterFileBasedCache, TieredCache, cache_stats, reset_cache_stats
+from .forms import ItemForm, RegisterForm
+from .media import referenced_paths
+from .models import (
+    ArchivedItem, Category, ImageUpload, Inventory, Item, ItemAlert, ItemForecast, StockMovement, StockSnapshot,
+)
+from .notifications import ConsoleNotifier, EmailNotifier
+from .profiling import ProfilingMiddleware
+from .purge import purge_deleted, soft_delete_inventory
+from .routers import PrimaryReplicaRouter
+from .serializers import DEFAULT_ITEM_FIELDS, item_columns, serialize_item, serialize_item_row
+from .storage import CompressedManifestStaticFilesStorage
+from .throttle import ThrottleMiddleware, parse_rate, take, throttle
+from .transfer import copy_name, move_items
+from .uploads import cleanup_uploads, part_path
 
 
 class UserAuthenticationTest(TestCase):
@@ -88,3 +142,1652 @@ class UserAuthenticationTest(TestCase):
         self.client.login(username='testuser', password='TestPass123!')
         response = self.client.get(self.logout_url)
         self.assertEqual(response.status_code, 302)
+
+
+class MediaGarbageCollectionTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='gcuser', email='gc@example.com', password='TestPass123!')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _write_image(self, name):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(b'not really a jpeg')
+        return path
+
+    def test_orphans_removed_and_referenced_kept(self):
+        inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        kept = self._write_image('item_images/kept.jpg')
+        orphan = self._write_image('item_images/orphan.jpg')
+        Item.objects.create(inventory=inventory, name='Milk', image='item_images/kept.jpg')
+
+        call_command('gc_media', grace_seconds=0, batch_size=1, stdout=StringIO())
+
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_dry_run_deletes_nothing(self):
+        orphan = self._write_image('item_images/orphan.jpg')
+        out = StringIO()
+
+        call_command('gc_media', grace_seconds=0, dry_run=True, stdout=out)
+
+        self.assertTrue(os.path.exists(orphan))
+        self.assertIn('item_images/orphan.jpg', out.getvalue())
+
+    def test_variants_of_unreferenced_sources_removed(self):
+        inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        Item.objects.create(inventory=inventory, name='Milk', image='item_images/kept.jpg')
+        kept = self._write_image('variants/item_images/kept.jpg/160.jpg')
+        orphan = self._write_image('variants/item_images/gone.jpg/160.jpg')
+
+        call_command('gc_media', grace_seconds=0, stdout=StringIO())
+
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(os.path.dirname(orphan)))
+
+    def test_recent_files_are_skipped(self):
+        orphan = self._write_image('item_images/uploading.jpg')
+
+        call_command('gc_media', stdout=StringIO())
+
+        self.assertTrue(os.path.exists(orphan))
+
+
+class ImageVariantTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.media_root, ITEM_IMAGE_VARIANT_WIDTHS=[160, 320, 640])
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='imguser', email='img@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.client.login(username='imguser', password='TestPass123!')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, width=400, height=300):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), color='red').save(buffer, format='JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_create_builds_variants_up_to_original_width(self):
+        response = self.client.post(
+            reverse('create_item', args=[self.inventory.id]),
+            {'name': 'Milk', 'quantity': 1, 'image': self._upload()},
+        )
+        self.assertEqual(response.status_code, 200)
+        item = Item.objects.get(name='Milk')
+        self.assertEqual(sorted(item.image_variants, key=int), ['160', '320'])
+        for name in item.image_variants.values():
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertIn('320w', item.image_srcset())
+
+    def test_detail_api_returns_all_variant_urls(self):
+        self.client.post(
+            reverse('create_item', args=[self.inventory.id]),
+            {'name': 'Milk', 'quantity': 1, 'image': self._upload(800, 800)},
+        )
+        item = Item.objects.get(name='Milk')
+        data = self.client.get(reverse('item_detail_api', args=[self.inventory.id, item.id])).json()['item']
+        self.assertEqual(set(data['image_variants']), {'160', '320', '640'})
+        self.assertTrue(data['thumbnail_url'].endswith('/320.jpg'))
+
+    def test_removing_image_deletes_variants(self):
+        self.client.post(
+            reverse('create_item', args=[self.inventory.id]),
+            {'name': 'Milk', 'quantity': 1, 'image': self._upload()},
+        )
+        item = Item.objects.get(name='Milk')
+        paths = [os.path.join(self.media_root, n) for n in item.image_variants.values()]
+        self.client.post(
+            reverse('update_item', args=[self.inventory.id, item.id]),
+            {'name': 'Milk', 'quantity': 1, 'remove_image': 'on'},
+        )
+        item.refresh_from_db()
+        self.assertEqual(item.image_variants, {})
+        self.assertFalse(any(os.path.exists(p) for p in paths))
+
+
+class EmailBackendTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mailer', email='Mailer@Example.com', password='TestPass123!')
+
+    def test_login_is_case_insensitive(self):
+        response = self.client.post(reverse('login'), {'email': 'mailer@example.COM', 'password': 'TestPass123!'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_login_resolves_user_in_one_query(self):
+        with self.assertNumQueries(1):
+            user = authenticate(email='MAILER@example.com', password='TestPass123!')
+        self.assertEqual(user, self.user)
+
+    def test_wrong_password_is_rejected(self):
+        self.assertIsNone(authenticate(email='mailer@example.com', password='nope'))
+
+    def test_registration_rejects_email_in_other_case(self):
+        form = RegisterForm(data={
+            'username': 'other',
+            'email': 'MAILER@example.com',
+            'password': 'SecurePassword123!',
+            'password_confirm': 'SecurePassword123!',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+    def test_case_insensitive_duplicate_blocked_by_index(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username='dupe', email='MAILER@EXAMPLE.COM', password='x')
+
+    def test_blank_emails_do_not_collide(self):
+        User.objects.create_user(username='blank1', email='', password='x')
+        User.objects.create_user(username='blank2', email='', password='x')
+
+    def test_cached_user_skips_the_per_process_tier(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        tiered = TieredCache('auth-test', {'OPTIONS': {'SHARED': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+        }}})
+        backend = EmailBackend()
+        with mock.patch('accounts.backends.cache', tiered), self.settings(AUTH_USER_CACHE_TIMEOUT=30):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+            # Another process deactivates the account: its post_save clears only the shared tier
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            tiered.shared.clear()
+            self.assertIsNone(backend.get_user(self.user.pk))
+
+
+class CountingPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = 1000
+    verify_calls = 0
+
+    def verify(self, password, encoded):
+        type(self).verify_calls += 1
+        return super().verify(password, encoded)
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'accounts.tests.CountingPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+])
+class PasswordHashingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hasher', email='hasher@example.com', password='TestPass123!')
+        self.client.login(username='hasher', password='TestPass123!')
+        CountingPBKDF2PasswordHasher.verify_calls = 0
+
+    def _post(self, name, payload):
+        return self.client.post(reverse(name), data=json.dumps(payload), content_type='application/json')
+
+    def test_legacy_hash_upgraded_on_login(self):
+        self.user.password = make_password('TestPass123!', hasher='md5')
+        self.user.save()
+        self.client.logout()
+
+        response = self.client.post(reverse('login'), {'email': 'hasher@example.com', 'password': 'TestPass123!'})
+
+        self.assertEqual(response.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_iteration_change_upgrades_hash(self):
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000, PASSWORD_HASHERS=['accounts.hashers.TunablePBKDF2PasswordHasher']):
+            self.assertTrue(authenticate(email='hasher@example.com', password='TestPass123!'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_change_password_hashes_current_password_once(self):
+        response = self._post('change_password', {'current_password': 'TestPass123!', 'new_password': 'NewSecure456!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CountingPBKDF2PasswordHasher.verify_calls, 1)
+
+    def test_change_password_rejects_same_password(self):
+        response = self._post('change_password', {'current_password': 'TestPass123!', 'new_password': 'TestPass123!'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_upgrade_during_settings_change_keeps_session(self):
+        self.user.password = make_password('TestPass123!', hasher='md5')
+        self.user.save()
+        self.client.force_login(self.user)
+
+        response = self._post('change_email', {'current_password': 'TestPass123!', 'new_email': 'new@example.com'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+
+class SessionStorageTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='sess', email='sess@example.com', password='TestPass123!')
+
+    def _session_queries(self, queries):
+        return [q for q in queries if 'django_session' in q['sql']]
+
+    def test_browsing_does_not_touch_session_table(self):
+        self.client.post(reverse('login'), {'email': 'sess@example.com', 'password': 'TestPass123!'})
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(3):
+                self.client.get(reverse('dashboard'))
+        self.assertEqual(self._session_queries(ctx.captured_queries), [])
+
+    def test_logout_message_is_stored_in_cookie(self):
+        self.client.post(reverse('login'), {'email': 'sess@example.com', 'password': 'TestPass123!'})
+        response = self.client.get(reverse('logout'))
+        self.assertIn('messages', response.cookies)
+
+    def test_cleanup_removes_only_expired_sessions_in_batches(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'old{i}', session_data='', expire_date=now - timedelta(days=1)) for i in range(5)]
+            + [Session(session_key='fresh', session_data='', expire_date=now + timedelta(days=1))]
+        )
+        call_command('cleanup_sessions', batch_size=2, max_batches=2, stdout=StringIO())
+        self.assertEqual(Session.objects.count(), 2)
+        call_command('cleanup_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['fresh'])
+
+
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        reset_cache_stats()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _cache(self, alias, local_entries=10):
+        return TieredCache(alias, {
+            'OPTIONS': {
+                'LOCAL_MAX_ENTRIES': local_entries,
+                'LOCAL_TIMEOUT': 60,
+                'SHARED': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': os.path.join(self.cache_dir, alias),
+                },
+            },
+        })
+
+    def test_reads_fall_back_to_shared_tier_and_promote(self):
+        cache = self._cache('t1')
+        self.assertIsNone(cache.get('k'))
+        cache.set('k', 'v')
+        cache.local.clear()
+
+        self.assertEqual(cache.get('k'), 'v')  # shared hit, promoted
+        self.assertEqual(cache.get('k'), 'v')  # local hit
+
+        stats = cache_stats()['t1']
+        self.assertEqual((stats['misses'], stats['shared_hits'], stats['local_hits']), (1, 1, 1))
+        self.assertAlmostEqual(stats['hit_ratio'], 2 / 3, places=3)
+
+    def test_local_tier_is_bounded(self):
+        cache = self._cache('t2', local_entries=4)
+        for i in range(20):
+            cache.set(f'k{i}', i)
+        self.assertLessEqual(len(cache.local._cache), 4)
+        self.assertGreater(cache_stats()['t2']['local_evictions'], 0)
+        self.assertEqual(cache.get('k0'), 0)  # still served by the shared tier
+
+    def test_counter_file_cache_increments_atomically_and_keeps_expiry(self):
+        cache = CounterFileBasedCache(os.path.join(self.cache_dir, 'counters'), {})
+        self.assertTrue(cache.add('hits', 0, timeout=100))
+        self.assertFalse(cache.add('hits', 0, timeout=100))
+
+        def hammer():
+            for _ in range(50):
+                cache.incr('hits')
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get('hits'), 400)
+
+        with open(cache._key_to_file('hits'), 'rb') as f:
+            self.assertLess(pickle.load(f) - time.time(), 100)  # not reset to the default 300s
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_delete_clears_both_tiers(self):
+        cache = self._cache('t3')
+        cache.set('k', 'v')
+        cache.delete('k')
+        self.assertIsNone(cache.get('k'))
+
+    def test_stats_endpoint_is_staff_only(self):
+        user = User.objects.create_user(username='viewer', email='viewer@example.com', password='TestPass123!')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.client.force_login(user)
+        response = self.client.get(reverse('cache_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('caches', response.json())
+
+
+class AsyncItemApiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asyncer', email='async@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.item = Item.objects.create(inventory=self.inventory, name='Rice', quantity=2)
+
+    def test_item_endpoints_are_async(self):
+        for view in (views.item_detail_api, views.item_quantity_update,
+                     views.ItemCreateView.as_view(), views.ItemUpdateView.as_view()):
+            self.assertTrue(iscoroutinefunction(view))
+
+    async def test_detail_over_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('item_detail_api', args=[self.inventory.id, self.item.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['item']['name'], 'Rice')
+
+    async def test_quantity_update_over_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('item_quantity_update', args=[self.inventory.id, self.item.id]),
+            data=json.dumps({'action': 'decrease', 'amount': 5}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'success': True, 'quantity': 0})
+        await self.item.arefresh_from_db()
+        self.assertEqual(self.item.quantity, 0)
+
+    async def test_other_users_item_is_not_found(self):
+        other = await User.objects.acreate(username='other', email='other@example.com')
+        await self.async_client.aforce_login(other)
+        response = await self.async_client.get(reverse('item_detail_api', args=[self.inventory.id, self.item.id]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_class_view_requires_login(self):
+        response = await self.async_client.post(reverse('create_item', args=[self.inventory.id]), {'name': 'X'})
+        self.assertEqual(response.status_code, 302)
+
+    async def test_create_over_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('create_item', args=[self.inventory.id]), {'name': 'Beans', 'quantity': 3},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(await Item.objects.filter(name='Beans', quantity=3).aexists())
+
+
+class ItemBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='batcher', email='batch@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.rice = Item.objects.create(inventory=self.inventory, name='Rice', quantity=5)
+        self.beans = Item.objects.create(inventory=self.inventory, name='Beans', quantity=1)
+        self.client.force_login(self.user)
+        self.url = reverse('item_batch', args=[self.inventory.id])
+
+    def _post(self, payload):
+        return self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+
+    def test_mixed_operations_applied_in_order(self):
+        response = self._post({'operations': [
+            {'op': 'quantity', 'item_id': self.rice.id, 'delta': -2},
+            {'op': 'quantity', 'item_id': self.rice.id, 'delta': -1},
+            {'op': 'update', 'item_id': self.rice.id, 'fields': {'brand': 'ACME'}},
+            {'op': 'quantity', 'item_id': self.beans.id, 'delta': -5},
+            {'op': 'delete', 'item_id': self.beans.id},
+            {'op': 'create', 'fields': {'name': 'Oats', 'quantity': 4}},
+        ]})
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual([r['quantity'] for r in data['results'][:2]], [3, 2])
+        self.assertEqual(data['results'][3]['quantity'], 0)
+        self.rice.refresh_from_db()
+        self.assertEqual((self.rice.quantity, self.rice.brand), (2, 'ACME'))
+        self.assertFalse(Item.objects.filter(id=self.beans.id).exists())
+        self.assertEqual(Item.objects.get(id=data['results'][5]['item_id']).name, 'Oats')
+
+    def test_statement_count_does_not_grow_with_operations(self):
+        ops = [{'op': 'quantity', 'item_id': self.rice.id, 'delta': 1} for _ in range(50)]
+        ops += [{'op': 'quantity', 'item_id': self.beans.id, 'delta': 1} for _ in range(50)]
+        with CaptureQueriesContext(connection) as ctx:
+            self._post({'operations': ops})
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "accounts_item"')]
+        self.assertEqual(len(writes), 1)
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 55)
+
+    def test_invalid_operations_are_reported_and_skipped(self):
+        other = Inventory.objects.create(user=User.objects.create_user(username='o', email='o@example.com'), name='X')
+        foreign = Item.objects.create(inventory=other, name='Foreign', quantity=1)
+        data = self._post({'operations': [
+            {'op': 'quantity', 'item_id': foreign.id, 'delta': 1},
+            {'op': 'update', 'item_id': self.rice.id, 'fields': {'quantity': -4, 'brand': 'X'}},
+            {'op': 'explode'},
+            {'op': 'quantity', 'item_id': self.rice.id, 'delta': 1},
+        ]}).json()
+        self.assertEqual([r['success'] for r in data['results']], [False, False, False, True])
+        self.rice.refresh_from_db()
+        self.assertEqual((self.rice.quantity, self.rice.brand), (6, ''))
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.quantity, 1)
+
+    def test_atomic_batch_rolls_back_on_any_failure(self):
+        response = self._post({'atomic': True, 'operations': [
+            {'op': 'quantity', 'item_id': self.rice.id, 'delta': 3},
+            {'op': 'delete', 'item_id': 999999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['committed'])
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 5)
+
+    def test_barcode_collisions_within_a_batch_are_rejected(self):
+        data = self._post({'operations': [
+            {'op': 'create', 'fields': {'name': 'Oats', 'quantity': 1, 'barcode': '111'}},
+            {'op': 'create', 'fields': {'name': 'Bran', 'quantity': 1, 'barcode': '111'}},
+            {'op': 'update', 'item_id': self.rice.id, 'fields': {'barcode': '111'}},
+            {'op': 'update', 'item_id': self.beans.id, 'fields': {'barcode': '222'}},
+            {'op': 'update', 'item_id': self.beans.id, 'fields': {'barcode': ''}},
+            {'op': 'create', 'fields': {'name': 'Peas', 'quantity': 1, 'barcode': '222'}},
+        ]}).json()
+        self.assertEqual([r['success'] for r in data['results']], [True, False, False, True, True, True])
+        self.assertIn('barcode', data['results'][1]['error'])
+        self.assertEqual(
+            dict(Item.objects.filter(inventory=self.inventory).exclude(barcode='').values_list('barcode', 'name')),
+            {'111': 'Oats', '222': 'Peas'},
+        )
+
+    def test_barcode_taken_after_validation_is_a_conflict(self):
+        Item.objects.create(inventory=self.inventory, name='Oats', barcode='111')
+        with mock.patch.object(ItemForm, 'clean_barcode', lambda form: form.cleaned_data['barcode']):
+            response = self._post({'operations': [{'op': 'create', 'fields': {'name': 'Bran', 'quantity': 1, 'barcode': '111'}}]})
+            self.assertEqual(response.status_code, 409)
+            with transaction.atomic():
+                response = self.client.post(reverse('create_item', args=[self.inventory.id]),
+                                            {'name': 'Bran', 'quantity': 1, 'barcode': '111'})
+            self.assertEqual(response.status_code, 409)
+            self.assertIn('barcode', response.json()['errors'])
+        self.assertEqual(Item.objects.filter(barcode='111').count(), 1)
+
+
+class ItemSerializerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='serializer', email='ser@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        for i in range(3):
+            Item.objects.create(inventory=self.inventory, name=f'Item {i}', quantity=i, brand='ACME')
+        self.client.force_login(self.user)
+
+    def test_row_and_instance_serialization_agree(self):
+        item = Item.objects.get(name='Item 1')
+        row = Item.objects.filter(id=item.id).values(*item_columns(DEFAULT_ITEM_FIELDS)).get()
+        self.assertEqual(serialize_item(item), serialize_item_row(row))
+
+    def test_sparse_fieldset_selects_only_needed_columns(self):
+        url = reverse('item_list_api', args=[self.inventory.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'fields': 'id,quantity', 'sort': 'quantity_desc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'], [
+            {'id': Item.objects.get(name=f'Item {i}').id, 'quantity': i} for i in (2, 1, 0)
+        ])
+        item_select = next(q['sql'] for q in ctx.captured_queries if 'FROM "accounts_item"' in q['sql']
+                           and 'COUNT' not in q['sql'])
+        self.assertNotIn('"description"', item_select)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('item_list_api', args=[self.inventory.id]), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['error'])
+
+    def test_detail_honours_fields(self):
+        item = Item.objects.get(name='Item 2')
+        response = self.client.get(reverse('item_detail_api', args=[self.inventory.id, item.id]), {'fields': 'name'})
+        self.assertEqual(response.json(), {'success': True, 'item': {'name': 'Item 2'}})
+
+
+class StockLedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger', email='ledger@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.item = Item.objects.create(inventory=self.inventory, name='Milk', quantity=10)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        ledger.flush()
+
+    def movements_at(self, *entries):
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id=self.item.id, kind=kind, delta=delta, quantity=0, created_at=when)
+            for kind, delta, when in entries
+        )
+
+    def test_mutations_are_buffered_then_flushed_in_one_insert(self):
+        for _ in range(3):
+            self.client.post(
+                reverse('item_quantity_update', args=[self.inventory.id, self.item.id]),
+                data=json.dumps({'action': 'decrease', 'amount': 2}),
+                content_type='application/json',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_item', args=[self.inventory.id, self.item.id]))
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(ledger.pending_count(), 4)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(ledger.flush(), 4)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(
+            list(StockMovement.objects.values_list('kind', 'delta', 'quantity')),
+            [('adjust', -2, 8), ('adjust', -2, 6), ('adjust', -2, 4), ('delete', -4, 0)],
+        )
+
+    def test_idle_process_flushes_in_background_and_on_sigterm(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.record(self.item, StockMovement.KIND_ADJUST, -1)
+        with self.settings(STOCK_LEDGER_BACKGROUND_FLUSH=True, STOCK_LEDGER_FLUSH_SECONDS=0):
+            self.assertEqual(ledger.background_flush(), 1)
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.record(self.item, StockMovement.KIND_ADJUST, -1)
+        previous = mock.Mock()
+        ledger.sigterm_handler(previous)(signal.SIGTERM, None)
+        previous.assert_called_once_with(signal.SIGTERM, None)
+        with self.assertRaises(SystemExit):
+            ledger.sigterm_handler(signal.SIG_DFL)(signal.SIGTERM, None)
+        self.assertEqual(StockMovement.objects.count(), 1)  # nothing written from the handler
+        ledger._flush_at_exit()
+        self.assertEqual(StockMovement.objects.count(), 2)
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        apply_item_operations(self.inventory, [
+            {'op': 'quantity', 'item_id': self.item.id, 'delta': -3},
+            {'op': 'delete', 'item_id': 0},
+        ], atomic=True)
+        self.assertEqual(ledger.pending_count(), 0)
+
+    def test_history_queries_use_snapshots(self):
+        start = timezone.now() - timedelta(days=30)
+        self.movements_at(('create', 10, start), ('adjust', -4, start + timedelta(days=5)))
+        self.assertEqual(ledger.take_snapshots(), 1)
+        self.movements_at(('adjust', 6, start + timedelta(days=10)), ('adjust', -2, start + timedelta(days=20)))
+
+        self.assertEqual(ledger.quantity_as_of(self.item.id, start + timedelta(days=1)), 10)
+        self.assertEqual(ledger.quantity_as_of(self.item.id, start + timedelta(days=15)), 12)
+        self.assertEqual(ledger.quantity_as_of(self.item.id, timezone.now()), 10)
+        self.assertEqual(ledger.consumed_between(self.item.id, start, timezone.now()), 6)
+        self.assertAlmostEqual(ledger.consumption_rate(self.item.id, days=30), 6 / 30)
+
+        with CaptureQueriesContext(connection) as ctx:
+            ledger.quantity_as_of(self.item.id, timezone.now())
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_failed_snapshot_run_is_redone_in_full(self):
+        other = Item.objects.create(inventory=self.inventory, name='Other', quantity=0)
+        now = timezone.now()
+        self.movements_at(('create', 10, now))
+        StockMovement.objects.create(item=other, kind='create', delta=3, quantity=3, created_at=now)
+        real_bulk_create = StockSnapshot.objects.bulk_create
+
+        def second_batch_fails(objs):
+            if StockSnapshot.objects.exists():
+                raise DatabaseError('disk full')
+            return real_bulk_create(objs)
+
+        with mock.patch.object(StockSnapshot.objects, 'bulk_create', side_effect=second_batch_fails):
+            with self.assertRaises(DatabaseError):
+                ledger.take_snapshots(batch_size=1)
+        self.assertFalse(StockSnapshot.objects.exists())
+        self.assertEqual(ledger.take_snapshots(batch_size=1), 2)
+        self.assertEqual(dict(StockSnapshot.objects.values_list('item_id', 'quantity')),
+                         {self.item.id: 10, other.id: 3})
+
+    def test_history_survives_item_deletion(self):
+        item_id = self.item.id
+        self.movements_at(('create', 10, timezone.now()))
+        self.item.delete()
+        self.assertEqual(ledger.quantity_as_of(item_id, timezone.now()), 10)
+
+
+class ForecastTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='forecast', email='forecast@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.now = timezone.now()
+        created = self.now - timedelta(days=60)
+        self.milk = Item.objects.create(inventory=self.inventory, name='Milk', quantity=6)
+        self.salt = Item.objects.create(inventory=self.inventory, name='Salt', quantity=1)
+        Item.objects.filter(id__in=[self.milk.id, self.salt.id]).update(created_at=created)
+        StockMovement.objects.bulk_create([
+            StockMovement(item_id=self.milk.id, kind='adjust', delta=-30, quantity=6,
+                          created_at=self.now - timedelta(days=3)),
+            # outside the window
+            StockMovement(item_id=self.salt.id, kind='adjust', delta=-5, quantity=1,
+                          created_at=self.now - timedelta(days=45)),
+        ])
+
+    def test_forecasts_are_projected_and_stored(self):
+        self.assertEqual(forecast.forecast_user(self.user.id, now=self.now), 2)
+        milk = ItemForecast.objects.get(item=self.milk)
+        self.assertAlmostEqual(milk.daily_rate, 1.0)
+        self.assertEqual(milk.runs_out_on, timezone.localdate(self.now) + timedelta(days=6))
+        self.assertEqual(milk.reorder_quantity, 8)
+        salt = ItemForecast.objects.get(item=self.salt)
+        self.assertIsNone(salt.runs_out_on)
+        self.assertEqual(salt.reorder_quantity, 0)
+
+    def test_query_count_does_not_depend_on_item_count(self):
+        Item.objects.bulk_create(Item(inventory=self.inventory, name=f'Extra {i}', quantity=i) for i in range(50))
+        with CaptureQueriesContext(connection) as ctx:
+            forecast.forecast_user(self.user.id, now=self.now)
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_rerun_updates_in_place(self):
+        forecast.forecast_user(self.user.id, now=self.now)
+        Item.objects.filter(id=self.milk.id).update(quantity=60)
+        forecast.run_forecasts(now=self.now)
+        self.assertEqual(ItemForecast.objects.count(), 2)
+        self.assertEqual(ItemForecast.objects.get(item=self.milk).reorder_quantity, 0)
+
+    def test_python_projection_matches_definition(self):
+        rates, days_left, reorder = forecast._project_python([10, 5, 0], [20, 0, 3], [10, 40, 0.5], 30, 7, 14)
+        self.assertEqual(rates, [2.0, 0.0, 3.0])
+        self.assertEqual(days_left, [5, None, 0])
+        self.assertEqual(reorder, [18, 0, 42])
+
+    def test_numpy_projection_matches_python_fallback(self):
+        quantities = [10, 5, 0, 7, 100, 3]
+        consumed = [20, 0, 3, 7, 1, 90]
+        ages = [10, 40, 0.5, 30, 200, 3]
+        self.assertIsNotNone(forecast.np)
+        self.assertEqual(
+            forecast._project_numpy(quantities, consumed, ages, 30, 7, 14),
+            forecast._project_python(quantities, consumed, ages, 30, 7, 14),
+        )
+
+    def test_dashboard_shows_stored_forecasts(self):
+        forecast.forecast_user(self.user.id, now=self.now)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Runs out in 6 days')
+        self.assertContains(response, 'Reorder 8')
+
+    def test_running_out_fragment_is_cached_until_forecasts_change(self):
+        self.client.force_login(self.user)
+        locmem = 'django.core.cache.backends.locmem.LocMemCache'
+        with override_settings(CACHES={
+            **settings.CACHES,
+            'views': {'BACKEND': locmem, 'LOCATION': f'{self.id()}-views'},
+            'aggregates': {'BACKEND': locmem, 'LOCATION': f'{self.id()}-aggregates'},
+        }):
+            forecast.forecast_user(self.user.id, now=self.now)
+            self.client.get(reverse('dashboard'))
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertContains(self.client.get(reverse('dashboard')), 'Runs out in 6 days')
+            self.assertFalse(any('accounts_itemforecast' in q['sql'] for q in ctx.captured_queries))
+
+            StockMovement.objects.filter(item=self.milk).update(delta=-60)
+            with self.captureOnCommitCallbacks(execute=True):
+                forecast.forecast_user(self.user.id, now=self.now)
+            self.assertContains(self.client.get(reverse('dashboard')), 'Runs out in 3 days')
+
+
+class AlertDigestTest(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com')
+        pantry = Inventory.objects.create(user=self.alice, name='Pantry')
+        garage = Inventory.objects.create(user=self.bob, name='Garage')
+        self.milk = Item.objects.create(inventory=pantry, name='Milk', quantity=10,
+                                        expiration_date=self.today + timedelta(days=2))
+        self.eggs = Item.objects.create(inventory=pantry, name='Eggs', quantity=1)
+        Item.objects.create(inventory=pantry, name='Rice', quantity=10, expiration_date=self.today + timedelta(days=90))
+        self.oil = Item.objects.create(inventory=garage, name='Oil', quantity=0)
+        self.stream = StringIO()
+        self.notifier = ConsoleNotifier(self.stream)
+
+    def test_one_digest_per_user_then_nothing_on_rerun(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(send_alert_digests(self.notifier), 2)
+        # re-arm delete, the item query, the alert insert
+        self.assertEqual(len(ctx.captured_queries), 3)
+        output = self.stream.getvalue()
+        self.assertIn('To: alice@example.com', output)
+        self.assertIn('Milk (Pantry) expires', output)
+        self.assertIn('Eggs (Pantry): 1 left', output)
+        self.assertIn('Oil (Garage): 0 left', output)
+        self.assertNotIn('Rice', output)
+
+        self.assertEqual(send_alert_digests(self.notifier), 0)
+
+    def test_restock_and_new_expiry_date_re_arm_alerts(self):
+        send_alert_digests(self.notifier)
+        Item.objects.filter(id=self.eggs.id).update(quantity=12)
+        send_alert_digests(self.notifier)
+        Item.objects.filter(id=self.eggs.id).update(quantity=2)
+        Item.objects.filter(id=self.milk.id).update(expiration_date=self.today + timedelta(days=5))
+        self.stream.truncate(0)
+        self.assertEqual(send_alert_digests(self.notifier), 1)
+        self.assertIn('Eggs', self.stream.getvalue())
+        self.assertIn('Milk', self.stream.getvalue())
+
+    def test_undelivered_digests_are_retried(self):
+        class Failing:
+            def send(self, user, subject, body):
+                return False
+        self.assertEqual(send_alert_digests(Failing()), 0)
+        self.assertFalse(ItemAlert.objects.exists())
+
+    def test_email_notifier(self):
+        from django.core import mail
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            send_alert_digests(EmailNotifier())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['alice@example.com', 'bob@example.com'])
+
+
+class SoftDeleteTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='purger', email='purge@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        Item.objects.bulk_create(Item(inventory=self.inventory, name=f'Item {i}', quantity=1) for i in range(25))
+        self.item = Item.objects.create(inventory=self.inventory, name='Pictured', image='item_images/pic.jpg')
+        os.makedirs(os.path.join(self.media_root, 'item_images'))
+        self.image_path = os.path.join(self.media_root, 'item_images', 'pic.jpg')
+        with open(self.image_path, 'wb') as fh:
+            fh.write(b'jpeg')
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_delete_inventory_hides_immediately_and_purges_later(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('delete_inventory', args=[self.inventory.id]))
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(any('DELETE' in q['sql'] for q in ctx.captured_queries))
+        self.assertFalse(Inventory.objects.filter(id=self.inventory.id).exists())
+        self.assertEqual(self.client.get(reverse('inventory_items', args=[self.inventory.id])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('item_detail_api', args=[self.inventory.id, self.item.id])).status_code, 404,
+        )
+        # The name is free again straight away.
+        Inventory.objects.create(user=self.user, name='Pantry')
+
+        counts = purge_deleted(batch_size=10)
+        self.assertEqual(counts, {'inventories': 1, 'items': 26, 'accounts': 0})
+        self.assertFalse(Inventory.all_objects.filter(id=self.inventory.id).exists())
+        self.assertFalse(os.path.exists(self.image_path))
+
+    def test_shared_image_survives_purge(self):
+        other = Inventory.objects.create(user=self.user, name='Other')
+        Item.objects.create(inventory=other, name='Copy', image='item_images/pic.jpg')
+        soft_delete_inventory(self.inventory)
+        purge_deleted()
+        self.assertTrue(os.path.exists(self.image_path))
+
+    def test_delete_account_deactivates_then_purges(self):
+        Category.objects.create(user=self.user, name='Dairy')
+        response = self.client.post(
+            reverse('delete_account'),
+            data=json.dumps({'username_confirmation': 'purger', 'current_password': 'TestPass123!'}),
+            content_type='application/json',
+        )
+        self.assertTrue(response.json()['success'])
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNone(authenticate(email='purge@example.com', password='TestPass123!'))
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 302)
+
+        counts = purge_deleted(batch_size=10)
+        self.assertEqual(counts['accounts'], 1)
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(Category.objects.filter(user_id=self.user.id).exists())
+        self.assertFalse(Item.objects.exists())
+
+
+class InventoryTransferTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mover', email='mover@example.com', password='TestPass123!')
+        self.category = Category.objects.create(user=self.user, name='Dairy')
+        self.pantry = Inventory.objects.create(user=self.user, name='Pantry', emoji='🥫')
+        self.fridge = Inventory.objects.create(user=self.user, name='Fridge')
+        Item.objects.bulk_create(
+            Item(inventory=self.pantry, name=f'Item {i}', quantity=i, category=self.category,
+                 image='item_images/shared.jpg', image_variants={'160': 'variants/item_images/shared.jpg/160.jpg'})
+            for i in range(200)
+        )
+        self.client.force_login(self.user)
+
+    def test_duplicate_copies_items_with_a_constant_number_of_statements(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('duplicate_inventory', args=[self.pantry.id]),
+                                        data='{}', content_type='application/json')
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['copied'], 200)
+        self.assertEqual(data['inventory']['name'], 'Pantry (copy)')
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        copy = Inventory.objects.get(id=data['inventory']['id'])
+        self.assertEqual(copy.emoji, '🥫')
+        item = copy.items.get(name='Item 7')
+        self.assertEqual(item.quantity, 7)
+        self.assertEqual(item.category, self.category)
+        self.assertEqual(item.image.name, 'item_images/shared.jpg')
+        self.assertEqual(item.image_variants, {'160': 'variants/item_images/shared.jpg/160.jpg'})
+        self.assertEqual(StockMovement.objects.filter(item__inventory=copy, kind='create').count(), 200)
+        self.assertEqual(ledger.quantity_as_of(item.id, timezone.now()), 7)
+
+        second = self.client.post(reverse('duplicate_inventory', args=[self.pantry.id]),
+                                  data='{}', content_type='application/json').json()
+        self.assertEqual(second['inventory']['name'], 'Pantry (copy 2)')
+
+    def test_copy_name_fits_long_names(self):
+        self.pantry.name = 'P' * 250
+        self.pantry.save()
+        first = copy_name(self.pantry)
+        self.assertEqual(first, 'P' * 248 + ' (copy)')
+        Inventory.objects.create(user=self.user, name=first)
+        self.assertEqual(copy_name(self.pantry), 'P' * 246 + ' (copy 2)')
+
+    def test_duplicate_rejects_taken_name(self):
+        response = self.client.post(reverse('duplicate_inventory', args=[self.pantry.id]),
+                                    data=json.dumps({'name': 'Fridge'}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_move_and_copy_selected_items(self):
+        ids = list(self.pantry.items.order_by('id').values_list('id', flat=True)[:3])
+        url = reverse('bulk_action', args=[self.pantry.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, data=json.dumps(
+                {'action': 'move', 'item_ids': ids, 'target_inventory_id': self.fridge.id}),
+                content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'count': 3})
+        self.assertEqual(sum('UPDATE "accounts_item"' in q['sql'] for q in ctx.captured_queries), 1)
+        self.assertEqual(self.fridge.items.count(), 3)
+
+        response = self.client.post(reverse('bulk_action', args=[self.fridge.id]), data=json.dumps(
+            {'action': 'copy', 'item_ids': ids, 'target_inventory_id': self.pantry.id}),
+            content_type='application/json')
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(self.pantry.items.count(), 200)
+        self.assertEqual(self.fridge.items.count(), 3)
+
+    def test_cannot_target_another_users_inventory(self):
+        other = User.objects.create_user(username='other', email='other@example.com')
+        theirs = Inventory.objects.create(user=other, name='Theirs')
+        ids = list(self.pantry.items.values_list('id', flat=True)[:1])
+        response = self.client.post(reverse('bulk_action', args=[self.pantry.id]), data=json.dumps(
+            {'action': 'move', 'item_ids': ids, 'target_inventory_id': theirs.id}),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(theirs.items.exists())
+
+
+class CategoryApiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sorter', email='sorter@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.dairy = Category.objects.create(user=self.user, name='Dairy')
+        self.milk = Category.objects.create(user=self.user, name='Milk')
+        for i in range(3):
+            Item.objects.create(inventory=self.inventory, name=f'Cheese {i}', category=self.dairy)
+        Item.objects.create(inventory=self.inventory, name='Skim', category=self.milk)
+        self.client.force_login(self.user)
+
+    def post(self, name, args, payload):
+        return self.client.post(reverse(name, args=args), data=json.dumps(payload), content_type='application/json')
+
+    def test_list_with_counts_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('category_list'))
+        self.assertEqual(response.json()['categories'], [
+            {'id': self.dairy.id, 'name': 'Dairy', 'item_count': 3},
+            {'id': self.milk.id, 'name': 'Milk', 'item_count': 1},
+        ])
+        # session + user are cached; the list itself is a single aggregate query
+        self.assertEqual(sum('accounts_category' in q['sql'] for q in ctx.captured_queries), 1)
+
+    def test_counts_are_cached_until_something_changes(self):
+        with override_settings(CACHES={
+            **settings.CACHES, 'aggregates': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': self.id()},
+        }):
+            self.client.get(reverse('category_list'))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('category_list'))
+            self.assertFalse(any('accounts_category' in q['sql'] for q in ctx.captured_queries))
+            self.assertEqual(response.json()['categories'][0]['item_count'], 3)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('create_item', args=[self.inventory.id]),
+                                 {'name': 'Brie', 'quantity': 1, 'category': self.dairy.id})
+            self.assertEqual(self.client.get(reverse('category_list')).json()['categories'][0]['item_count'], 4)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post('merge_category', [self.milk.id], {'target_id': self.dairy.id})
+            self.assertEqual(self.client.get(reverse('category_list')).json()['categories'], [
+                {'id': self.dairy.id, 'name': 'Dairy', 'item_count': 5},
+            ])
+
+    def test_names_are_unique_ignoring_case(self):
+        response = self.post('create_category', [], {'name': 'dAIRY'})
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Category.objects.create(user=self.user, name='DAIRY')
+        response = self.post('rename_category', [self.milk.id], {'name': 'dairy'})
+        self.assertEqual(response.status_code, 400)
+        response = self.post('rename_category', [self.milk.id], {'name': 'MILK'})
+        self.assertEqual(response.json()['category']['name'], 'MILK')
+
+    def test_lookup_uses_the_functional_index(self):
+        plan = str(categories_by_name(self.user, 'Dairy').explain())
+        self.assertIn('category_user_name_ci_uniq', plan)
+
+    def test_merge_reassigns_with_one_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post('merge_category', [self.milk.id], {'target_id': self.dairy.id})
+        self.assertEqual(response.json(), {'success': True, 'moved': 1})
+        self.assertEqual(sum(q['sql'].startswith('UPDATE "accounts_item"') for q in ctx.captured_queries), 2)
+        self.assertEqual(Item.objects.filter(category=self.dairy).count(), 4)
+        self.assertFalse(Category.objects.filter(id=self.milk.id).exists())
+
+    def test_delete_with_and_without_reassignment(self):
+        archived = Item.objects.create(inventory=self.inventory, name='Old skim', category=self.milk, quantity=0)
+        Item.objects.filter(id=archived.id).update(updated_at=timezone.now() - timedelta(days=60))
+        archive_items()
+        self.post('delete_category', [self.milk.id], {'reassign_to': self.dairy.id})
+        self.assertEqual(Item.objects.filter(category=self.dairy).count(), 4)
+        self.assertEqual(ArchivedItem.objects.get(id=archived.id).category, self.dairy)
+        self.post('delete_category', [self.dairy.id], {})
+        self.assertEqual(Item.objects.filter(category__isnull=True).count(), 4)
+
+    def test_item_form_only_offers_own_categories(self):
+        other = User.objects.create_user(username='other', email='other@example.com')
+        theirs = Category.objects.create(user=other, name='Theirs')
+        form = ItemForm(data={'name': 'X', 'quantity': 1, 'category': theirs.id}, user=self.user)
+        self.assertFalse(form.is_valid())
+        form = ItemForm(data={'name': 'X', 'quantity': 1, 'category': self.dairy.id}, user=self.user)
+        self.assertTrue(form.is_valid())
+
+
+class WarmupTest(TestCase):
+    def setUp(self):
+        warmup._warm = None
+
+    def tearDown(self):
+        warmup._warm = None
+
+    def test_boot_warmup_skips_connections(self):
+        timings = warmup.warm_up(include_connections=False)
+        self.assertEqual(set(timings), {'templates', 'url_resolver'})
+        self.assertIn('accounts/login.html', list(warmup._project_templates()))
+
+    def test_readiness_warms_once_without_login(self):
+        response = self.client.get(reverse('readiness'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['ready'])
+        self.assertEqual(set(data['warmup_ms']), {'templates', 'url_resolver', 'databases', 'caches'})
+        first = warmup._warm
+        self.client.get(reverse('readiness'))
+        self.assertIs(warmup._warm, first)
+
+
+MANIFEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'accounts.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+class StaticAssetsTest(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+
+    def test_pages_link_bundles_instead_of_inlining(self):
+        response = self.client.get(reverse('login'))
+        self.assertNotContains(response, '<style>')
+        self.assertContains(response, 'accounts/css/base.css')
+
+    def test_collectstatic_writes_hashed_precompressed_bundles(self):
+        with override_settings(STATIC_ROOT=self.static_root, STORAGES=MANIFEST_STORAGES):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(os.path.join(self.static_root, 'staticfiles.json')) as manifest:
+                hashed = json.load(manifest)['paths']['accounts/css/base.css']
+            self.assertNotEqual(hashed, 'accounts/css/base.css')
+            path = os.path.join(self.static_root, hashed)
+            with open(path, 'rb') as original, gzip.open(path + '.gz') as compressed:
+                self.assertEqual(compressed.read(), original.read())
+
+            from django.contrib.staticfiles.storage import staticfiles_storage
+            self.assertEqual(staticfiles_storage.url('accounts/css/base.css'), '/static/' + hashed)
+
+    def test_unhashed_names_only_without_manifest_in_debug(self):
+        storage = CompressedManifestStaticFilesStorage(location=self.static_root)
+        with override_settings(DEBUG=True):
+            self.assertEqual(storage.url('accounts/css/base.css'), '/static/accounts/css/base.css')
+        with self.assertRaises(ValueError):
+            storage.url('accounts/css/base.css')
+
+
+class ProtectedMediaTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='owner', password='TestPass123!')
+        self.other = User.objects.create_user(username='other', password='TestPass123!')
+        inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        Item.objects.create(inventory=inventory, name='Pictured', image='item_images/pic.jpg')
+        os.makedirs(os.path.join(self.media_root, 'item_images'))
+        with open(os.path.join(self.media_root, 'item_images', 'pic.jpg'), 'wb') as fh:
+            fh.write(b'0123456789')
+        self.url = '/media/item_images/pic.jpg'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_only_the_owner_can_fetch(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(len([q for q in queries if 'accounts_item' in q['sql']]), 1)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_path_traversal_is_rejected(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/media/item_images/../../settings.py').status_code, 404)
+
+    def test_range_and_etag(self):
+        self.client.force_login(self.user)
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        response = self.client.get(self.url, headers={'Range': 'bytes=-3', 'If-Range': etag})
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=20-'}).status_code, 416)
+
+    def test_accel_redirect_hands_off_to_nginx(self):
+        self.client.force_login(self.user)
+        with self.settings(MEDIA_ACCEL_REDIRECT='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/item_images/pic.jpg')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request=None, read_only=True, write=False):
+        if request is None:
+            return self.router.db_for_read(Item)
+        token, state = routers._begin(request)
+        try:
+            state['read_only'] = read_only
+            if write:
+                self.router.db_for_write(Item)
+            return self.router.db_for_read(Item), state
+        finally:
+            routers._request_state.reset(token)
+
+    def test_reads_outside_marked_views_use_the_primary(self):
+        self.assertEqual(self.route(), 'default')
+        self.assertEqual(self.route(self.factory.get('/'), read_only=False)[0], 'default')
+
+    def test_marked_views_read_from_a_replica_until_they_write(self):
+        self.assertEqual(self.route(self.factory.get('/'))[0], 'replica1')
+        alias, state = self.route(self.factory.get('/'), write=True)
+        self.assertEqual(alias, 'default')
+        self.assertTrue(state['wrote'])
+
+    def test_pinned_clients_read_from_the_primary(self):
+        request = self.factory.get('/', HTTP_COOKIE=f'{routers.PIN_COOKIE}=1')
+        self.assertEqual(self.route(request)[0], 'default')
+
+    def test_write_sets_pin_cookie(self):
+        _, state = self.route(self.factory.post('/'), write=True)
+        response = routers._finish(state, HttpResponse())
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]['max-age'], 5)
+        _, state = self.route(self.factory.get('/'))
+        self.assertNotIn(routers.PIN_COOKIE, routers._finish(state, HttpResponse()).cookies)
+
+
+class ReplicaPinningMiddlewareTest(TestCase):
+    def test_quantity_update_pins_the_client(self):
+        user = User.objects.create_user(username='pinned', password='TestPass123!')
+        inventory = Inventory.objects.create(user=user, name='Pantry')
+        item = Item.objects.create(inventory=inventory, name='Milk', quantity=1)
+        self.client.force_login(user)
+        self.addCleanup(ledger.flush)  # don't leak the buffered movement into later tests
+        with self.settings(DATABASE_REPLICAS=['replica1']):
+            response = self.client.post(
+                reverse('item_quantity_update', args=[inventory.id, item.id]),
+                json.dumps({'action': 'increase'}), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+
+class ThrottleTest(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user(username='noisy', email='noisy@example.com', password='TestPass123!')
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/15m'), (100, 900))
+        with self.assertRaises(ValueError):
+            parse_rate('10 per minute')
+
+    def test_bucket_refills_over_the_period(self):
+        start = 6000.0  # start of a 60s window
+        self.assertEqual([take('t', 'c', '3/m', start + i) for i in range(3)], [0, 0, 0])
+        self.assertGreater(take('t', 'c', '3/m', start + 3), 0)
+        # Half-way through the next window half of the previous usage has drained
+        self.assertEqual(take('t', 'c', '3/m', start + 90), 0)
+        self.assertGreater(take('t', 'c', '3/m', start + 91), 0)
+        self.assertEqual(take('t', 'other', '3/m', start + 91), 0)
+
+    @override_settings(THROTTLE_RATES={'create_category': '2/m'})
+    def test_blocked_before_any_query(self):
+        self.client.force_login(self.user)
+        url = reverse('create_category')
+        for name in ('A', 'B'):
+            response = self.client.post(url, json.dumps({'name': name}), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, json.dumps({'name': 'C'}), content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.json()['success'])
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(Category.objects.filter(name='C').exists())
+        self.assertEqual(self.client.get(reverse('category_list')).status_code, 200)
+
+    @override_settings(THROTTLE_RATES={'login': '1/m'})
+    def test_anonymous_buckets_are_per_ip(self):
+        data = {'email': 'noisy@example.com', 'password': 'wrong'}
+        self.client.post(reverse('login'), data, REMOTE_ADDR='10.0.0.1')
+        response = self.client.post(reverse('login'), data, REMOTE_ADDR='10.0.0.1', HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.post(reverse('login'), data, REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(THROTTLE_RATES={'login': '1/m'}, THROTTLE_PROXY_COUNT=1)
+    def test_clients_behind_the_proxy_get_their_own_buckets(self):
+        data = {'email': 'noisy@example.com', 'password': 'wrong'}
+        proxy = {'REMOTE_ADDR': '10.0.0.1'}
+        self.client.post(reverse('login'), data, HTTP_X_FORWARDED_FOR='198.51.100.7', **proxy)
+        response = self.client.post(reverse('login'), data, HTTP_X_FORWARDED_FOR='1.2.3.4, 198.51.100.7', **proxy)
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(reverse('login'), data, HTTP_X_FORWARDED_FOR='203.0.113.9', **proxy)
+        self.assertEqual(response.status_code, 200)
+
+    def test_refuses_to_start_without_atomic_counters(self):
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'throttle': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }):
+            with self.assertRaises(ImproperlyConfigured):
+                ThrottleMiddleware(lambda request: HttpResponse())
+
+    def test_decorator(self):
+        view = throttle('1/h', name='decorated')(lambda request: HttpResponse('ok'))
+        factory = RequestFactory()
+        request = factory.post('/')
+        request.session = {}
+        self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(view(request).status_code, 429)
+        self.assertEqual(view(factory.get('/')).status_code, 200)
+
+
+class ScanTest(TestCase):
+    def setUp(self):
+        self.addCleanup(ledger.flush)
+        self.user = User.objects.create_user(username='scanner', email='scan@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Warehouse')
+        self.item = Item.objects.create(inventory=self.inventory, name='Widget', quantity=2, barcode='0123456789012')
+        self.client.force_login(self.user)
+        self.url = reverse('scan_item', args=[self.inventory.id])
+
+    def _scan(self, code, delta=None):
+        payload = {'code': code} if delta is None else {'code': code, 'delta': delta}
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_scan_is_one_update(self):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            data = scanning.scan(self.user, self.inventory.id, ' 0123456789012 ', 3)
+        self.assertEqual(data, {'id': self.item.id, 'name': 'Widget', 'quantity': 5})
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+        ledger.flush()
+        self.assertEqual(StockMovement.objects.get(item=self.item, kind=StockMovement.KIND_ADJUST).delta, 3)
+
+    def test_repeat_scans_stay_one_statement(self):
+        self.assertEqual(self._scan('0123456789012').json()['item']['quantity'], 3)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(scanning.scan(self.user, self.inventory.id, '0123456789012').get('quantity'), 4)
+        self.assertEqual(len(queries), 1)
+
+    def test_reassigned_code_resolves_to_the_new_item(self):
+        scanning.scan(self.user, self.inventory.id, '0123456789012')
+        self.item.barcode = ''
+        self.item.save()
+        other = Item.objects.create(inventory=self.inventory, name='Gadget', quantity=0, barcode='0123456789012')
+        self.assertEqual(scanning.scan(self.user, self.inventory.id, '0123456789012')['id'], other.id)
+
+    def test_unknown_code_and_insufficient_stock(self):
+        self.assertEqual(self._scan('999').status_code, 404)
+        response = self._scan('0123456789012', -3)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(response.json()['success'])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 2)
+        self.assertEqual(self._scan('0123456789012', 0).status_code, 400)
+        self.assertEqual(self._scan('').status_code, 400)
+        for body in ('[]', '"x"', 'null', '{'):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_other_users_inventory(self):
+        intruder = User.objects.create_user(username='intruder', email='x@example.com', password='TestPass123!')
+        self.client.force_login(intruder)
+        self.assertEqual(self._scan('0123456789012').status_code, 404)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 2)
+
+    def test_barcode_unique_per_inventory(self):
+        form = ItemForm(data={'name': 'Copy', 'quantity': 1, 'barcode': '0123456789012'},
+                        user=self.user, inventory=self.inventory)
+        self.assertFalse(form.is_valid())
+        self.assertIn('barcode', form.errors)
+        other = Inventory.objects.create(user=self.user, name='Shop')
+        Item.objects.create(inventory=other, name='Widget', barcode='0123456789012')
+        spare = Item.objects.create(inventory=other, name='Spare', barcode='555')
+        move_items(Item.objects.filter(inventory=other), self.inventory)
+        self.assertEqual(
+            sorted(Item.objects.filter(inventory=self.inventory).values_list('barcode', flat=True)),
+            ['', '0123456789012', '555'],
+        )
+        spare.refresh_from_db()
+        self.assertEqual(spare.barcode, '555')
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        autocomplete.clear_cache()
+        self.addCleanup(autocomplete.clear_cache)
+        self.addCleanup(ledger.flush)
+        self.user = User.objects.create_user(username='typer', email='typer@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Fridge')
+        for name, brand in [('Milk', 'Dairyland'), ('milk', 'Dairyland'), ('Milk 2%', 'Moo'), ('Mint', '')]:
+            Item.objects.create(inventory=self.inventory, name=name, brand=brand)
+        stranger = User.objects.create_user(username='other', email='other@example.com', password='TestPass123!')
+        Item.objects.create(inventory=Inventory.objects.create(user=stranger, name='Theirs'), name='Mild salsa')
+        self.client.force_login(self.user)
+        self.url = reverse('item_autocomplete')
+
+    def test_prefix_index(self):
+        index = autocomplete.PrefixIndex()
+        for value in ['Milk', 'milk', 'Milk 2%', 'Mint', 'Bread']:
+            index.add(value)
+        self.assertEqual(index.top('MI'), ['Milk', 'Milk 2%', 'Mint'])
+        self.assertEqual(index.top('mi', limit=1), ['Milk'])
+        index.remove('Milk')
+        index.remove('milk')
+        self.assertEqual(index.top('mi'), ['Milk 2%', 'Mint'])
+        self.assertEqual(index.top('x'), [])
+
+    def test_database_path_matches_memory_path(self):
+        cold = self.client.get(self.url, {'q': 'mi'}).json()['suggestions']
+        self.assertEqual(cold, {'name': ['Milk', 'Milk 2%', 'Mint'], 'brand': []})
+        self.assertIsNotNone(autocomplete.cached_indexes(self.user.id))  # built when the request finished
+        with CaptureQueriesContext(connection) as queries:
+            warm = autocomplete.suggest(self.user, 'mi')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(warm, cold)
+        self.assertEqual(autocomplete.suggest(self.user, 'd', fields=('brand',)), {'brand': ['Dairyland']})
+
+    def test_item_views_patch_the_index(self):
+        autocomplete.build(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('create_item', args=[self.inventory.id]),
+                                        {'name': 'Mineral water', 'quantity': 1, 'brand': 'Aqua'})
+        self.assertEqual(response.status_code, 200)
+        item_id = response.json()['item']['id']
+        self.assertIn('Mineral water', autocomplete.suggest(self.user, 'min')['name'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('update_item', args=[self.inventory.id, item_id]),
+                             {'name': 'Sparkling water', 'quantity': 1, 'brand': 'Aqua'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_item', args=[self.inventory.id, item_id]))
+        indexes = autocomplete.cached_indexes(self.user.id)
+        self.assertIsNotNone(indexes)
+        self.assertEqual(indexes['name'].top('min'), ['Mint'])
+        self.assertEqual(indexes['name'].top('spark'), [])
+
+    def test_bulk_changes_invalidate(self):
+        autocomplete.build(self.user)
+        other = Inventory.objects.create(user=self.user, name='Freezer')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk_action', args=[self.inventory.id]), json.dumps({
+                'action': 'copy', 'target_inventory_id': other.id,
+                'item_ids': list(self.inventory.items.values_list('id', flat=True)),
+            }), content_type='application/json')
+        self.assertIsNone(autocomplete.cached_indexes(self.user.id))
+        self.assertEqual(self.client.get(self.url, {'q': 'mint', 'field': 'name'}).json()['suggestions'],
+                         {'name': ['Mint']})
+
+    def test_bulk_delete_patches_the_warm_index(self):
+        self.client.get(self.url, {'q': 'mi'})
+        self.assertIsNotNone(autocomplete.cached_indexes(self.user.id))
+        doomed = self.inventory.items.filter(name='Mint').values_list('id', flat=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('bulk_action', args=[self.inventory.id]), json.dumps({
+                'action': 'delete', 'item_ids': list(doomed),
+            }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, {'q': 'mi', 'field': 'name'}).json()['suggestions'],
+                         {'name': ['Milk', 'Milk 2%']})
+
+    def test_lost_version_does_not_revive_a_stale_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            autocomplete.invalidate(self.user.id)
+        stale = autocomplete.build(self.user)
+        version = autocomplete._version(self.user.id)
+        cache.delete(autocomplete._version_key(self.user.id))  # evicted
+        with self.captureOnCommitCallbacks(execute=True):
+            autocomplete.invalidate(self.user.id)
+        self.assertGreater(autocomplete._version(self.user.id), version)
+        autocomplete._store(self.user.id, version, stale)
+        self.assertIsNone(autocomplete.cached_indexes(self.user.id))
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'mi', 'field': 'sku'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'mi', 'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': ' '}).json()['suggestions'], {'name': [], 'brand': []})
+
+
+@override_settings(ARCHIVE_RULES={'consumed_after_days': 30, 'expired_after_days': 90})
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='archivist', email='arch@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        today = timezone.localdate()
+        self.used_up = Item.objects.create(inventory=self.inventory, name='Flour', quantity=0, barcode='111',
+                                           image='item_images/flour.jpg')
+        self.recently_used_up = Item.objects.create(inventory=self.inventory, name='Sugar', quantity=0)
+        self.expired = Item.objects.create(inventory=self.inventory, name='Yogurt', quantity=2,
+                                           expiration_date=today - timedelta(days=120))
+        self.live = Item.objects.create(inventory=self.inventory, name='Rice', quantity=5)
+        long_ago = timezone.now() - timedelta(days=100)
+        Item.objects.filter(id__in=[self.used_up.id, self.expired.id, self.live.id]).update(updated_at=long_ago)
+        ItemForecast.objects.create(item=self.used_up, daily_rate=1.0, computed_at=timezone.now())
+        ItemAlert.objects.create(item=self.expired, kind=ItemAlert.KIND_EXPIRING)
+        self.client.force_login(self.user)
+
+    def test_rules_move_items_to_the_archive(self):
+        self.assertEqual(archive_items(batch_size=1), 2)
+        self.assertEqual(
+            set(Item.objects.filter(inventory=self.inventory).values_list('name', flat=True)), {'Sugar', 'Rice'},
+        )
+        archived = ArchivedItem.objects.get(id=self.used_up.id)
+        self.assertEqual((archived.name, archived.barcode, archived.inventory_id), ('Flour', '111', self.inventory.id))
+        self.assertTrue(ArchivedItem.objects.filter(id=self.expired.id).exists())
+        self.assertFalse(ItemForecast.objects.exists())
+        self.assertFalse(ItemAlert.objects.exists())
+        self.assertEqual(referenced_paths(['item_images/flour.jpg']), {'item_images/flour.jpg'})
+        self.assertEqual(archive_items(), 0)
+
+    def test_statements_do_not_grow_with_batch(self):
+        with CaptureQueriesContext(connection) as queries:
+            archive_items()
+        self.assertEqual(ArchivedItem.objects.count(), 2)
+        # select batch, INSERT ... SELECT, 3 DELETEs, then the empty select
+        self.assertLessEqual(len([q for q in queries if 'SAVEPOINT' not in q['sql']]), 6)
+
+    def test_rules_can_be_turned_off_and_skip_deleted_inventories(self):
+        with self.settings(ARCHIVE_RULES={'consumed_after_days': 0}):
+            self.assertEqual(archive_items(), 0)
+        soft_delete_inventory(self.inventory)
+        self.assertEqual(archive_items(), 0)
+
+    def test_list_shows_archive_on_request_and_restore(self):
+        archive_items()
+        url = reverse('inventory_items', args=[self.inventory.id])
+        self.assertNotContains(self.client.get(url), 'Flour')
+        self.assertContains(self.client.get(url, {'archived': '1'}), 'Flour')
+
+        Item.objects.create(inventory=self.inventory, name='New flour', barcode='111')
+        response = self.client.post(
+            reverse('restore_archived_items', args=[self.inventory.id]),
+            json.dumps({'item_ids': [self.used_up.id, self.expired.id]}), content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'success': True, 'count': 2})
+        self.assertFalse(ArchivedItem.objects.exists())
+        restored = Item.objects.get(id=self.used_up.id)
+        self.assertEqual(restored.barcode, '')  # taken by the new item meanwhile
+        self.assertGreater(restored.updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(archive_items(), 0)  # restoring restarts the grace period
+
+    def test_restore_is_scoped_to_the_inventory(self):
+        archive_items()
+        other = Inventory.objects.create(user=self.user, name='Other')
+        self.assertEqual(restore_items(other, [self.used_up.id]), 0)
+        intruder = User.objects.create_user(username='intruder', email='in@example.com', password='TestPass123!')
+        self.client.force_login(intruder)
+        response = self.client.post(
+            reverse('restore_archived_items', args=[self.inventory.id]),
+            json.dumps({'item_ids': [self.used_up.id]}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(ArchivedItem.objects.count(), 2)
+
+    def test_purge_removes_archived_items(self):
+        archive_items()
+        soft_delete_inventory(self.inventory)
+        self.assertEqual(purge_deleted()['items'], 4)
+        self.assertFalse(ArchivedItem.objects.exists())
+
+
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = self.settings(MEDIA_ROOT=self.media_root, CHUNKED_UPLOAD_DIR=os.path.join(self.media_root, 'partial'),
+                                 UPLOAD_CHUNK_MAX_SIZE=1024, ITEM_IMAGE_VARIANT_WIDTHS=[160])
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='uploader', email='up@example.com', password='TestPass123!')
+        self.inventory = Inventory.objects.create(user=self.user, name='Pantry')
+        self.item = Item.objects.create(inventory=self.inventory, name='Tea')
+        self.client.force_login(self.user)
+        buffer = BytesIO()
+        Image.effect_noise((200, 150), 64).convert('RGB').save(buffer, format='PNG')
+        self.data = buffer.getvalue()
+
+    def _start(self, **overrides):
+        payload = {'filename': 'tea.png', 'size': len(self.data), 'sha256': hashlib.sha256(self.data).hexdigest()}
+        payload.update(overrides)
+        return self.client.post(reverse('create_upload'), json.dumps(payload), content_type='application/json')
+
+    def _patch(self, upload_id, offset, chunk, **headers):
+        return self.client.patch(
+            reverse('upload_detail', args=[upload_id]), chunk, content_type='application/octet-stream',
+            headers={'Upload-Offset': str(offset), **headers},
+        )
+
+    def _send_all(self, upload_id, start=0):
+        for offset in range(start, len(self.data), 1024):
+            response = self._patch(upload_id, offset, self.data[offset:offset + 1024])
+            self.assertEqual(response.status_code, 200)
+
+    def _attach(self, upload_id):
+        return self.client.post(reverse('attach_upload', args=[self.inventory.id, self.item.id]),
+                                json.dumps({'upload_id': upload_id}), content_type='application/json')
+
+    def test_resumed_upload_is_attached_to_the_item(self):
+        response = self._start()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload']['id']
+        digest = base64.b64encode(hashlib.sha256(self.data[:1024]).digest()).decode()
+        self.assertEqual(self._patch(upload_id, 0, self.data[:1024], **{'Upload-Checksum': f'sha256 {digest}'})
+                         ['Upload-Offset'], '1024')
+        # The connection dropped; ask where to carry on
+        status = self.client.get(reverse('upload_detail', args=[upload_id])).json()['upload']
+        self.assertEqual((status['offset'], status['complete']), (1024, False))
+        self.assertEqual(self._attach(upload_id).status_code, 409)
+        self._send_all(upload_id, start=status['offset'])
+
+        response = self._attach(upload_id)
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertTrue(self.item.image.name.startswith('item_images/tea'))
+        with open(os.path.join(self.media_root, self.item.image.name), 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(list(self.item.image_variants), ['160'])
+        self.assertFalse(os.path.exists(part_path(upload_id)))
+        self.assertFalse(ImageUpload.objects.exists())
+
+    def test_offsets_and_chunk_checksums(self):
+        upload_id = self._start().json()['upload']['id']
+        response = self._patch(upload_id, 512, self.data[512:1024])
+        self.assertEqual((response.status_code, response['Upload-Offset']), (409, '0'))
+        bad = base64.b64encode(hashlib.sha256(b'other').digest()).decode()
+        response = self._patch(upload_id, 0, self.data[:1024], **{'Upload-Checksum': f'sha256 {bad}'})
+        self.assertEqual((response.status_code, response['Upload-Offset']), (422, '0'))
+        self.assertEqual(self._patch(upload_id, 0, b'x' * 2048).status_code, 413)
+        self._send_all(upload_id)
+        self.assertEqual(self._patch(upload_id, len(self.data), b'x').status_code, 400)
+
+    def test_concurrent_writes_to_one_upload_are_serialized(self):
+        upload_id = self._start().json()['upload']['id']
+        with open(part_path(upload_id), 'r+b') as writer:
+            locks.lock(writer, locks.LOCK_EX)  # another request is writing a chunk
+            response = self._patch(upload_id, 0, self.data[:1024])
+            locks.unlock(writer)
+        self.assertEqual((response.status_code, response['Upload-Offset']), (409, '0'))
+        self.assertEqual(self._patch(upload_id, 0, self.data[:1024])['Upload-Offset'], '1024')
+
+    def test_whole_file_is_verified_before_attaching(self):
+        upload_id = self._start(sha256='0' * 64).json()['upload']['id']
+        self._send_all(upload_id)
+        self.assertEqual(self._attach(upload_id).status_code, 422)
+        self.assertFalse(ImageUpload.objects.exists())
+
+        self.data = b'not an image' * 10
+        upload_id = self._start(sha256='').json()['upload']['id']
+        self._send_all(upload_id)
+        self.assertEqual(self._attach(upload_id).status_code, 400)
+        self.item.refresh_from_db()
+        self.assertFalse(self.item.image)
+
+    def test_validation_and_ownership(self):
+        self.assertEqual(self._start(filename='tea.exe').status_code, 400)
+        with self.settings(UPLOAD_MAX_SIZE=100):
+            self.assertEqual(self._start().status_code, 413)
+        upload_id = self._start().json()['upload']['id']
+        intruder = User.objects.create_user(username='intruder', email='in@example.com', password='TestPass123!')
+        self.client.force_login(intruder)
+        self.assertEqual(self._patch(upload_id, 0, self.data[:1024]).status_code, 404)
+        self.assertEqual(self.client.delete(reverse('upload_detail', args=[upload_id])).status_code, 404)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.delete(reverse('upload_detail', args=[upload_id])).status_code, 200)
+        self.assertFalse(os.path.exists(part_path(upload_id)))
+
+    def test_cleanup_removes_abandoned_uploads(self):
+        upload_id = self._start().json()['upload']['id']
+        orphan = part_path('00000000-0000-0000-0000-000000000000')
+        open(orphan, 'wb').close()
+        self.assertEqual(cleanup_uploads(), 0)
+        ImageUpload.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        os.utime(orphan, (0, 0))
+        self.assertEqual(cleanup_uploads(), 2)
+        self.assertFalse(os.path.exists(part_path(upload_id)))
+        self.assertFalse(os.path.exists(orphan))
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.staff = User.objects.create_user(username='staff', password='TestPass123!', is_staff=True)
+        self.inventory = Inventory.objects.create(user=self.staff, name='Pantry')
+        self.url = reverse('inventory_items', args=[self.inventory.id])
+
+    def test_not_loaded_without_profile_dir(self):
+        with self.settings(PROFILE_DIR=''):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_staff_flag_writes_folded_stacks_and_allocations(self):
+        self.client.force_login(self.staff)
+        with self.settings(PROFILE_DIR=self.directory):
+            response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        base = os.path.join(self.directory, response['X-Profile-Id'])
+        self.assertTrue(os.path.exists(base + '.collapsed'))
+        with open(base + '.alloc.txt') as fh:
+            self.assertTrue(fh.read().strip())
+
+    def test_cprofile_mode_via_header(self):
+        self.client.force_login(self.staff)
+        with self.settings(PROFILE_DIR=self.directory):
+            response = self.client.get(self.url, headers={'X-Profile': 'cprofile'})
+        stats = pstats.Stats(os.path.join(self.directory, response['X-Profile-Id'] + '.prof'))
+        self.assertTrue(any(func[2] == 'get' and func[0].endswith('views.py') for func in stats.stats))
+
+    def test_async_view_is_profiled_on_its_loop_thread(self):
+        item = Item.objects.create(inventory=self.inventory, name='Milk')
+        self.client.force_login(self.staff)
+        with self.settings(PROFILE_DIR=self.directory):
+            response = self.client.get(
+                reverse('item_detail_api', args=[self.inventory.id, item.id]), headers={'X-Profile': 'cprofile'},
+            )
+        self.assertEqual(response.status_code, 200)
+        stats = pstats.Stats(os.path.join(self.directory, response['X-Profile-Id'] + '.prof'))
+        self.assertTrue(any(func[2] == 'item_detail_api' for func in stats.stats))
+        self.assertTrue(any(func[2] == 'serialize_item_row' for func in stats.stats))
+
+    def test_flag_is_a_boolean(self):
+        self.client.force_login(self.staff)
+        with self.settings(PROFILE_DIR=self.directory):
+            self.assertNotIn('X-Profile-Id', self.client.get(self.url, {'profile': '0'}))
+            self.assertNotIn('X-Profile-Id', self.client.get(self.url, {'profile': 'false'}))
+            self.assertIn('X-Profile-Id', self.client.get(self.url, {'profile': 'true'}))
+
+    def test_ignored_for_non_staff(self):
+        self.staff.is_staff = False
+        self.staff.save()
+        self.client.force_login(self.staff)
+        with self.settings(PROFILE_DIR=self.directory):
+            response = self.client.get(self.url, {'profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,155 @@
+"""
+Request throttling with per-client buckets in the shared cache.
+
+Each throttled URL name has a rate such as ``'10/m'``, meaning a bucket of
+10 tokens that refills continuously over a minute. A client's bucket is
+keyed by the user id for logged-in requests and by the client IP address
+otherwise. The user id is read from the session (``_auth_user_id``, served
+from the sessions cache) rather than ``request.user``, so deciding normally
+costs no database query.
+
+Buckets live in the ``throttle`` cache alias, whose shared tier must
+increment atomically (memcached, Redis or ``CounterFileBasedCache``);
+``ThrottleMiddleware`` refuses to start otherwise, since a get+set counter
+under-counts exactly when a client hammers an endpoint. That tier only
+offers atomic ``add``/``incr``, not compare-and-swap, so a bucket is stored
+as one counter per refill period. Tokens used are approximated as
+``previous * (1 - elapsed) + current``: the sliding-window form of the
+same bucket, which needs one ``incr`` and one ``get`` per request and
+never writes to the database.
+
+``ThrottleMiddleware`` applies ``THROTTLE_RATES`` (by URL name) in
+``process_view``. Blocked requests get a 429 with ``Retry-After`` before
+the view runs, so before any ORM query or password hash. The ``throttle``
+decorator does the same for a single view. Only unsafe methods (POST, PUT,
+PATCH, DELETE) are throttled, so pages still load while a client is
+blocked.
+"""
+
+import functools
+import math
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from .cache import has_atomic_incr
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_RATE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+_ADDRESS = re.compile(r'[^0-9A-Fa-f.:]')  # forwarded values end up in cache keys
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``'10/m'`` -> ``(10, 60)``; ``'100/15m'`` -> ``(100, 900)``."""
+    match = _RATE.match(rate.replace(' ', ''))
+    if not match:
+        raise ValueError(f'Invalid throttle rate: {rate!r}')
+    tokens, count, unit = match.groups()
+    return int(tokens), int(count or 1) * PERIODS[unit]
+
+
+def client_ip(request):
+    """The client address, skipping ``THROTTLE_PROXY_COUNT`` trusted proxies."""
+    proxies = getattr(settings, 'THROTTLE_PROXY_COUNT', 1)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        return _ADDRESS.sub('', hops[-min(proxies, len(hops))])[:45]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    session = getattr(request, 'session', None)
+    user_id = session.get(SESSION_KEY) if session is not None else None
+    if user_id is not None:
+        return f'user:{user_id}'
+    return f'ip:{client_ip(request)}'
+
+
+def take(name, client, rate, now=None):
+    """
+    Take one token from ``client``'s bucket for ``name``.
+
+    Returns 0 when the request may proceed, otherwise the number of seconds
+    until a token is available again.
+    """
+    tokens, period = parse_rate(rate)
+    cache = caches['throttle']
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    key = f'throttle:{name}:{client}:{int(window)}'
+    try:
+        used = cache.incr(key)
+    except ValueError:
+        used = 1 if cache.add(key, 1, timeout=2 * period) else cache.incr(key)
+    previous = cache.get(f'throttle:{name}:{client}:{int(window) - 1}', 0)
+    used += previous * (1 - offset / period)
+    if used <= tokens:
+        return 0
+    return max(1, math.ceil((used - tokens) * period / tokens))
+
+
+def throttled_response(request, retry_after):
+    message = 'Too many requests. Please wait a moment and try again.'
+    if 'text/html' in request.headers.get('Accept', ''):
+        response = HttpResponse(message, status=429, content_type='text/plain')
+    else:
+        response = JsonResponse({'success': False, 'error': message}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def check(request, name, rate):
+    """A 429 response if ``request`` is over ``rate`` for ``name``, else None."""
+    if request.method in SAFE_METHODS:
+        return None
+    retry_after = take(name, client_key(request), rate)
+    if retry_after:
+        return throttled_response(request, retry_after)
+    return None
+
+
+class ThrottleMiddleware(MiddlewareMixin):
+    """Applies ``THROTTLE_RATES`` by URL name; needs SessionMiddleware before it."""
+
+    def __init__(self, get_response):
+        if not has_atomic_incr(caches['throttle']):
+            raise ImproperlyConfigured(
+                "The 'throttle' cache must increment atomically (memcached, Redis or "
+                "accounts.cache.CounterFileBasedCache as its shared tier)."
+            )
+        super().__init__(get_response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.url_name if request.resolver_match else None
+        rate = getattr(settings, 'THROTTLE_RATES', {}).get(name)
+        if rate is None:
+            return None
+        return check(request, name, rate)
+
+
+def throttle(rate, name=None):
+    """Throttle one view at ``rate`` (sync or async), independent of ``THROTTLE_RATES``."""
+    def decorator(view):
+        bucket = name or f'{view.__module__}.{view.__qualname__}'
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                return check(request, bucket, rate) or await view(request, *args, **kwargs)
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                return check(request, bucket, rate) or view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,116 @@
+"""
+Set-based inventory duplication and item move/copy.
+
+Copies are a single ``INSERT ... SELECT`` built from the ORM's own SELECT,
+so no item row passes through Python; moves are a single ``UPDATE``.
+Copied items point at the same image file and variants as the originals
+(the media purger and ``gc_media`` only delete files nothing references).
+Barcodes are unique per inventory, so an item copied or moved into an
+inventory that already uses its barcode arrives without one.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Case, Exists, F, Max, OuterRef, Value, When
+from django.db.models.fields import CharField, DateTimeField, IntegerField
+from django.utils import timezone
+
+from .models import Inventory, Item, StockMovement
+
+
+# Copied verbatim; everything else is set for the new row.
+_NOT_COPIED = {'id', 'inventory', 'barcode', 'created_at', 'updated_at'}
+
+
+def _barcode_in(target):
+    """An item's barcode, or '' when ``target`` already has an item with that barcode."""
+    taken = Item.objects.filter(inventory=target, barcode=OuterRef('barcode')).exclude(barcode='')
+    return Case(When(Exists(taken), then=Value('')), default=F('barcode'), output_field=CharField())
+
+
+def insert_select(model, columns, queryset):
+    """``INSERT INTO model (columns) <queryset's SELECT>``; returns the row count."""
+    select_sql, params = queryset.query.sql_with_params()
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) {}'.format(
+        quote(model._meta.db_table), ', '.join(quote(column) for column in columns), select_sql,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def copy_items(queryset, target):
+    """Copy every item in ``queryset`` into ``target``. Returns the number copied."""
+    now = timezone.now()
+    fields = [f for f in Item._meta.concrete_fields if f.name not in _NOT_COPIED]
+    with transaction.atomic():
+        last_id = Item.objects.aggregate(last=Max('id'))['last'] or 0
+        rows = (
+            queryset.order_by()
+            .annotate(
+                new_inventory=Value(target.id, output_field=IntegerField()),
+                new_barcode=_barcode_in(target),
+                new_created_at=Value(now, output_field=DateTimeField()),
+                new_updated_at=Value(now, output_field=DateTimeField()),
+            )
+            .values(*[f.attname for f in fields], 'new_inventory', 'new_barcode', 'new_created_at', 'new_updated_at')
+        )
+        copied = insert_select(
+            Item,
+            [f.column for f in fields] + ['inventory_id', 'barcode', 'created_at', 'updated_at'],
+            rows,
+        )
+        # Opening ledger entries for the new rows, also without a round-trip per item.
+        movements = (
+            Item.objects.filter(inventory=target, id__gt=last_id, created_at=now).order_by()
+            .annotate(
+                kind=Value(StockMovement.KIND_CREATE, output_field=CharField()),
+                delta=F('quantity'),
+                at=Value(now, output_field=DateTimeField()),
+            )
+            .values('id', 'quantity', 'kind', 'delta', 'at')
+        )
+        insert_select(StockMovement, ['item_id', 'quantity', 'kind', 'delta', 'created_at'], movements)
+    return copied
+
+
+def move_items(queryset, target):
+    """Move every item in ``queryset`` into ``target`` with one UPDATE."""
+    return queryset.exclude(inventory=target).update(
+        inventory=target, barcode=_barcode_in(target), updated_at=timezone.now(),
+    )
+
+
+def copy_name(inventory):
+    """
+    First free "<name> (copy)", "<name> (copy 2)", ... for the inventory's owner.
+
+    A long name is shortened so the suffix still fits the column.
+    """
+    max_length = Inventory._meta.get_field('name').max_length
+
+    def candidate(n):
+        suffix = ' (copy)' if n == 1 else f' (copy {n})'
+        return inventory.name[:max_length - len(suffix)].rstrip() + suffix
+
+    # Every candidate keeps at least this much of the name (suffixes stay under 20 characters).
+    stem = inventory.name[:max_length - 20].rstrip()
+    taken = set(
+        Inventory.objects.filter(user_id=inventory.user_id, name__startswith=stem).values_list('name', flat=True)
+    )
+    n = 1
+    while candidate(n) in taken:
+        n += 1
+    return candidate(n)
+
+
+def duplicate_inventory(inventory, name=None, emoji=None):
+    """Create a copy of ``inventory`` with all of its items. Returns ``(copy, item_count)``."""
+    with transaction.atomic():
+        copy = Inventory.objects.create(
+            user_id=inventory.user_id,
+            name=name or copy_name(inventory),
+            emoji=emoji or inventory.emoji,
+        )
+        count = copy_items(Item.objects.filter(inventory=inventory), copy)
+    return copy, count
@@ -0,0 +1,255 @@
+"""
+Resumable, chunked image uploads.
+
+A client first announces an upload: file name, total size and,
+optionally, the SHA-256 of the whole file. It then sends the bytes in any
+number of ``PATCH`` requests, each giving the offset it starts at in
+``Upload-Offset``. Each chunk is streamed, under an exclusive lock on the
+part file so concurrent PATCHes of one upload cannot interleave, into
+``<CHUNKED_UPLOAD_DIR>/<id>.part`` in ``READ_SIZE`` reads. Memory per
+upload stays constant whatever the file size, and neither the multipart
+parser nor ``FILE_UPLOAD_MAX_MEMORY_SIZE`` is involved.
+
+The ``ImageUpload`` row stores the accepted offset. It only advances, by
+a conditional UPDATE, once a chunk is fully on disk and matches its
+optional ``Upload-Checksum: sha256 <base64>``. A dropped connection loses
+at most the chunk in flight: the client asks for the offset (GET) and
+carries on from there.
+
+Once every byte is in, ``attach`` checks the whole-file checksum and that
+Pillow recognizes the image, then hands the file to storage. With the
+default FileSystemStorage the part file is renamed into place, not
+copied, which is why it lives under ``MEDIA_ROOT``. The ``cleanup_uploads``
+command removes uploads abandoned for ``UPLOAD_EXPIRY_HOURS``.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File, locks
+from django.core.validators import get_available_image_extensions
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from PIL import Image
+
+from .images import refresh_item_variants
+from .media import delete_unreferenced_images
+from .models import ImageUpload
+
+
+READ_SIZE = 64 * 1024
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _PartFile(File):
+    # FileSystemStorage moves files that report a temporary path instead of copying them.
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(upload_id):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload_id}.part')
+
+
+def describe(upload):
+    return {
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'complete': upload.offset == upload.size,
+        'chunk_size': settings.UPLOAD_CHUNK_MAX_SIZE,
+    }
+
+
+def start(user, filename, size, sha256=''):
+    """Register a new upload and create its (empty) part file."""
+    filename = get_valid_filename(os.path.basename(str(filename or '')))[:100]
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if not filename or extension not in get_available_image_extensions():
+        raise UploadError('Choose an image file.')
+    if isinstance(size, bool) or not isinstance(size, int) or size <= 0:
+        raise UploadError('Size must be a positive integer.')
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f'Images can be at most {settings.UPLOAD_MAX_SIZE // (1024 * 1024)} MB.', status=413)
+    sha256 = (sha256 or '').lower()
+    if sha256 and not _SHA256.match(sha256):
+        raise UploadError('sha256 must be 64 hex digits.')
+    if ImageUpload.objects.filter(user=user).count() >= settings.UPLOAD_MAX_PENDING:
+        raise UploadError('Too many unfinished uploads; finish or cancel one first.', status=429)
+
+    upload = ImageUpload.objects.create(user=user, filename=filename, size=size, sha256=sha256)
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    open(part_path(upload.id), 'wb').close()
+    return upload
+
+
+def _chunk_checksum(header):
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise UploadError('Upload-Checksum must be "sha256 <base64 digest>".')
+    try:
+        return base64.b64decode(value.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise UploadError('Upload-Checksum digest is not valid base64.')
+
+
+def write_chunk(upload, request):
+    """Append the request body at ``Upload-Offset``; returns the new offset."""
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        raise UploadError('Upload-Offset header required.')
+    if offset != upload.offset:
+        raise UploadError(f'Expected Upload-Offset {upload.offset}.', status=409)
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or '')
+    except ValueError:
+        raise UploadError('Content-Length required.', status=411)
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f'Chunks can be at most {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.', status=413)
+    if length <= 0 or offset + length > upload.size:
+        raise UploadError('Chunk does not fit the announced size.')
+    expected = _chunk_checksum(request.headers.get('Upload-Checksum'))
+
+    try:
+        part = open(part_path(upload.id), 'r+b')
+    except FileNotFoundError:
+        raise UploadError('Upload expired; start again.', status=410)
+    with part:
+        # Serializes writers of this upload: a second PATCH at the same offset
+        # would otherwise interleave its bytes with an accepted chunk.
+        if not locks.lock(part, locks.LOCK_EX | locks.LOCK_NB):
+            raise UploadError('Another chunk of this upload is being written.', status=409)
+        try:
+            try:
+                upload.refresh_from_db(fields=['offset'])
+            except ImageUpload.DoesNotExist:
+                raise UploadError('Upload expired; start again.', status=410)
+            if offset != upload.offset:
+                raise UploadError(f'Expected Upload-Offset {upload.offset}.', status=409)
+            _receive(upload, request, part, offset, length, expected)
+        finally:
+            locks.unlock(part)
+    return upload.offset
+
+
+def _receive(upload, request, part, offset, length, expected):
+    digest = hashlib.sha256()
+    received = 0
+    part.seek(offset)
+    while received < length:
+        data = request.read(min(READ_SIZE, length - received))
+        if not data:
+            break
+        part.write(data)
+        digest.update(data)
+        received += len(data)
+    part.flush()
+    # Bytes past the accepted offset are simply overwritten by the retry.
+    if received != length:
+        raise UploadError('Chunk ended early; resume from the current offset.')
+    if expected is not None and digest.digest() != expected:
+        raise UploadError('Chunk checksum mismatch; send it again.', status=422)
+
+    advanced = ImageUpload.objects.filter(pk=upload.pk, offset=offset).update(
+        offset=offset + length, updated_at=timezone.now(),
+    )
+    if not advanced:
+        upload.refresh_from_db(fields=['offset'])
+        raise UploadError(f'Expected Upload-Offset {upload.offset}.', status=409)
+    upload.offset = offset + length
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discard(upload):
+    try:
+        os.remove(part_path(upload.id))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def attach(upload, item):
+    """Verify a finished upload and make it ``item``'s image (replacing any previous one)."""
+    if upload.offset != upload.size:
+        raise UploadError(f'Upload incomplete: {upload.offset} of {upload.size} bytes.', status=409)
+    path = part_path(upload.id)
+    if not os.path.exists(path):
+        upload.delete()
+        raise UploadError('Upload expired; start again.', status=410)
+    if upload.sha256 and file_sha256(path) != upload.sha256:
+        discard(upload)
+        raise UploadError('Checksum mismatch; upload the file again.', status=422)
+    try:
+        with Image.open(path) as image:
+            image.verify()  # reads the structure, not the pixels
+    except Exception:
+        discard(upload)
+        raise UploadError('The file is not a valid image.')
+
+    previous_image = item.image.name if item.image else None
+    with _PartFile(open(path, 'rb')) as part:
+        part.size = upload.size
+        item.image.save(upload.filename, part, save=False)
+    refresh_item_variants(item, save=False, delete_stale=False)
+    item.save(update_fields=['image', 'image_variants', 'updated_at'])
+    discard(upload)  # the part file is gone already unless storage copied it
+    delete_unreferenced_images([previous_image])
+    return item
+
+
+def cleanup_uploads(max_age=None, log=None):
+    """Remove uploads untouched for ``max_age`` and part files without an upload. Returns the number removed."""
+    if max_age is None:
+        max_age = timedelta(hours=settings.UPLOAD_EXPIRY_HOURS)
+    removed = 0
+    for upload in ImageUpload.objects.filter(updated_at__lt=timezone.now() - max_age).iterator():
+        discard(upload)
+        removed += 1
+        if log:
+            log(str(upload.id))
+
+    older_than = time.time() - max_age.total_seconds()
+    try:
+        iterator = os.scandir(settings.CHUNKED_UPLOAD_DIR)
+    except FileNotFoundError:
+        return removed
+    with iterator as entries:
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            try:
+                upload_id = uuid.UUID(name)
+            except ValueError:
+                continue
+            if (
+                extension == '.part' and entry.stat().st_mtime < older_than
+                and not ImageUpload.objects.filter(id=upload_id).exists()
+            ):
+                os.remove(entry.path)
+                removed += 1
+                if log:
+                    log(entry.name)
+    return removed
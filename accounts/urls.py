@@ -14,6 +14,7 @@ urlpatterns = [
     path('api/inventories/create/', views.create_inventory, name='create_inventory'),
     path('inventories/<int:inventory_id>/update/', views.update_inventory, name='update_inventory'),
     path('inventories/<int:inventory_id>/delete/', views.delete_inventory, name='delete_inventory'),
+    path('inventories/<int:inventory_id>/duplicate/', views.duplicate_inventory_view, name='duplicate_inventory'),
     # Inventory item pages and APIs
     path('inventories/<int:inventory_id>/items/', views.ItemListView.as_view(), name='inventory_items'),
     path('inventories/<int:inventory_id>/items/create/', views.ItemCreateView.as_view(), name='create_item'),
@@ -21,6 +22,20 @@ urlpatterns = [
     path('inventories/<int:inventory_id>/items/<int:item_id>/delete/', views.ItemDeleteView.as_view(), name='delete_item'),
     path('inventories/<int:inventory_id>/items/<int:item_id>/quantity/', views.item_quantity_update, name='item_quantity_update'),
     path('inventories/<int:inventory_id>/items/<int:item_id>/detail/', views.item_detail_api, name='item_detail_api'),
+    path('inventories/<int:inventory_id>/scan/', views.scan_item, name='scan_item'),
     path('inventories/<int:inventory_id>/bulk/', views.bulk_action, name='bulk_action'),
+    path('inventories/<int:inventory_id>/items/batch/', views.item_batch, name='item_batch'),
+    path('inventories/<int:inventory_id>/archive/restore/', views.restore_archived_items, name='restore_archived_items'),
+    path('inventories/<int:inventory_id>/items/<int:item_id>/image/', views.attach_upload, name='attach_upload'),
+    path('api/uploads/', views.create_upload, name='create_upload'),
+    path('api/uploads/<uuid:upload_id>/', views.upload_detail, name='upload_detail'),
+    path('inventories/<int:inventory_id>/items/api/', views.item_list_api, name='item_list_api'),
+    path('api/items/autocomplete/', views.item_autocomplete, name='item_autocomplete'),
     path('categories/create/', views.create_category, name='create_category'),
+    path('api/categories/', views.category_list, name='category_list'),
+    path('categories/<int:category_id>/rename/', views.rename_category, name='rename_category'),
+    path('categories/<int:category_id>/merge/', views.merge_category, name='merge_category'),
+    path('categories/<int:category_id>/delete/', views.delete_category_view, name='delete_category'),
+    path('api/cache-stats/', views.cache_stats_api, name='cache_stats'),
+    path('readyz/', views.readiness, name='readiness'),
 ]
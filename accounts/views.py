@@ -1,19 +1,41 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.views import View
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.cache import never_cache
-from .forms import RegisterForm, LoginForm, ItemForm
-from .models import Inventory, Item, Category
+from django.utils.decorators import method_decorator
+from . import aggregates, autocomplete, uploads
+from .archive import restore_items
+from .backends import email_in_use
+from .batch import BatchError, apply_item_operations
+from .categories import category_name_taken, delete_category, merge_categories
+from .cache import cache_stats
+from .concurrency import run_blocking
+from .forms import BARCODE_TAKEN, RegisterForm, LoginForm, ItemForm
+from .hashers import verify_password
+from .ledger import movement, record, record_movements
+from .models import ArchivedItem, ImageUpload, Inventory, Item, ItemForecast, Category, StockMovement
+from .protected_media import serve_media
+from .purge import soft_delete_account, soft_delete_inventory
+from .routers import replica_reads
+from .scanning import ScanError, scan
+from .transfer import copy_items, duplicate_inventory, move_items
+from .warmup import ensure_warm
 import json
-from sorl.thumbnail import get_thumbnail
+import uuid
+from .images import refresh_item_variants
+from .media import delete_unreferenced_images
+from .serializers import (
+    FastJsonResponse, item_values, parse_fields, serialize_item, serialize_item_row, serialize_rows,
+)
 from django.core.paginator import Paginator
-from django.db import transaction
+from django.db import DatabaseError, IntegrityError, connection
+from django.utils import timezone
 
 
 @require_http_methods(["GET", "POST"])
@@ -49,17 +71,12 @@ def login_view(request):
             email = form.cleaned_data['email']
             password = form.cleaned_data['password']
             
-            try:
-                user = User.objects.get(email=email)
-                user_obj = authenticate(request, username=user.username, password=password)
-                
-                if user_obj is not None:
-                    login(request, user_obj)
-                    messages.success(request, f'Welcome back, {user.username}!')
-                    return redirect('dashboard')
-                else:
-                    messages.error(request, 'Invalid email or password.')
-            except User.DoesNotExist:
+            user = authenticate(request, email=email, password=password)
+            if user is not None:
+                login(request, user)
+                messages.success(request, f'Welcome back, {user.username}!')
+                return redirect('dashboard')
+            else:
                 messages.error(request, 'Invalid email or password.')
     else:
         form = LoginForm()
@@ -76,23 +93,34 @@ def logout_view(request):
 
 @login_required(login_url='login')
 @never_cache
+@replica_reads
 def dashboard(request):
     inventories = Inventory.objects.filter(user=request.user)
+    forecasts = (
+        ItemForecast.objects.filter(
+            item__inventory__user=request.user, item__inventory__deleted_at__isnull=True, runs_out_on__isnull=False,
+        )
+        .select_related('item__inventory').order_by('runs_out_on')[:8]
+    )
     return render(request, 'accounts/dashboard.html', {
         'user': request.user,
-        'inventories': inventories
+        'inventories': inventories,
+        'forecasts': forecasts,
+        # cache key of the "Running Out Soon" fragment; days left change daily
+        'aggregates_version': aggregates.version(request.user.id),
+        'today': timezone.localdate(),
     })
 
 
 @login_required(login_url='login')
 @require_http_methods(["POST"])
 def delete_inventory(request, inventory_id):
-    """Delete an inventory and all its items"""
+    """Delete an inventory; its items are removed in the background by purge_deleted"""
     try:
         inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
-        # Delete all items first (cascade) then inventory
-        Item.objects.filter(inventory_id=inventory_id).delete()
-        Inventory.objects.filter(id=inventory_id).delete()
+        soft_delete_inventory(inventory)
+        autocomplete.invalidate(request.user.id)
+        aggregates.invalidate(request.user.id)
         return JsonResponse({'success': True, 'message': 'Inventory deleted'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
@@ -118,6 +146,7 @@ def update_inventory(request, inventory_id):
         inventory.name = name
         inventory.emoji = emoji
         inventory.save()
+        aggregates.invalidate(request.user.id)
         return JsonResponse({'success': True, 'message': 'Inventory updated'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -181,51 +210,94 @@ def create_inventory(request):
         }, status=500)
 
 
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def duplicate_inventory_view(request, inventory_id):
+    """API endpoint to copy an inventory and all of its items"""
+    inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
+    try:
+        data = json.loads(request.body or '{}')
+        name = (data.get('name') or '').strip()
+        if len(name) > 255:
+            return JsonResponse({'success': False, 'error': 'Inventory name must be less than 255 characters.'}, status=400)
+        if name and Inventory.objects.filter(user=request.user, name=name).exists():
+            return JsonResponse({'success': False, 'error': 'You already have an inventory with this name.'}, status=400)
+        copy, count = duplicate_inventory(inventory, name=name or None, emoji=data.get('emoji'))
+        autocomplete.invalidate(request.user.id)
+        aggregates.invalidate(request.user.id)
+        return JsonResponse({
+            'success': True,
+            'message': f'Copied {count} item(s) to "{copy.name}".',
+            'inventory': {'id': copy.id, 'name': copy.name, 'emoji': copy.emoji},
+            'copied': count,
+        })
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    except IntegrityError:
+        return JsonResponse({'success': False, 'error': 'You already have an inventory with this name.'}, status=400)
+
+
 # --------------------
 # Items and Categories
 # --------------------
 
 
+def sort_items(items_qs, sort):
+    """Apply one of the inventory page's sort options to an Item queryset."""
+    from django.db.models import Case, When, Value
+    if sort == 'expiry_asc':
+        # Sort soon to late, but items with no expiry date go to the end
+        items_qs = items_qs.annotate(
+            has_expiry=Case(
+                When(expiration_date__isnull=True, then=Value(1)),
+                default=Value(0)
+            )
+        ).order_by('has_expiry', 'expiration_date')
+    elif sort == 'expiry_desc':
+        # Sort late to soon, but items with no expiry date go to the end
+        items_qs = items_qs.annotate(
+            has_expiry=Case(
+                When(expiration_date__isnull=True, then=Value(1)),
+                default=Value(0)
+            )
+        ).order_by('has_expiry', '-expiration_date')
+    elif sort == 'quantity_asc':
+        items_qs = items_qs.order_by('quantity')
+    elif sort == 'quantity_desc':
+        items_qs = items_qs.order_by('-quantity')
+
+    return items_qs
+
+
 class ItemListView(LoginRequiredMixin, View):
     """Display items for a given inventory and handle filtering/searching via query params."""
     login_url = 'login'
 
+    @method_decorator(replica_reads)
     def get(self, request, inventory_id):
         inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
         items_qs = Item.objects.filter(inventory=inventory)
 
-        # Sorting
-        from django.db.models import Case, When, Value
-        sort = request.GET.get('sort')
-        if sort == 'expiry_asc':
-            # Sort soon to late, but items with no expiry date go to the end
-            items_qs = items_qs.annotate(
-                has_expiry=Case(
-                    When(expiration_date__isnull=True, then=Value(1)),
-                    default=Value(0)
-                )
-            ).order_by('has_expiry', 'expiration_date')
-        elif sort == 'expiry_desc':
-            # Sort late to soon, but items with no expiry date go to the end
-            items_qs = items_qs.annotate(
-                has_expiry=Case(
-                    When(expiration_date__isnull=True, then=Value(1)),
-                    default=Value(0)
-                )
-            ).order_by('has_expiry', '-expiration_date')
-        elif sort == 'quantity_asc':
-            items_qs = items_qs.order_by('quantity')
-        elif sort == 'quantity_desc':
-            items_qs = items_qs.order_by('-quantity')
+        items_qs = sort_items(items_qs, request.GET.get('sort'))
 
         # Pagination (optional)
         paginator = Paginator(items_qs, 60)
         page = request.GET.get('page')
         items = paginator.get_page(page)
 
+        # Archived items live in their own table and are only read on request
+        show_archived = request.GET.get('archived') == '1'
+        archived = None
+        if show_archived:
+            archived_qs = sort_items(ArchivedItem.objects.filter(inventory=inventory), request.GET.get('sort'))
+            archived = Paginator(archived_qs, 60).get_page(request.GET.get('archived_page'))
+
         response = render(request, 'accounts/inventory_items.html', {
             'inventory': inventory,
             'items': items,
+            'show_archived': show_archived,
+            'archived': archived,
+            'categories': Category.objects.filter(user=request.user).only('id', 'name'),
         })
         response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response['Pragma'] = 'no-cache'
@@ -233,61 +305,116 @@ class ItemListView(LoginRequiredMixin, View):
         return response
 
 
-class ItemCreateView(LoginRequiredMixin, View):
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """LoginRequiredMixin for views with async handlers.
+
+    Resolves the user with ``request.auser()`` so the session/user lookup
+    never runs synchronously inside the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        response = super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+        return await response
+
+
+async def _load_form_data(request):
+    """Parse the multipart body (spooling uploads to disk) off the event loop."""
+    await run_blocking(lambda: request.POST)
+
+
+async def _commit_image(item):
+    """Write a freshly uploaded image to storage off the event loop."""
+    if item.image and not item.image._committed:
+        await run_blocking(item.image.save, item.image.name, item.image.file, save=False)
+
+
+def _barcode_conflict():
+    # The form's barcode check and the insert race; the unique index decides.
+    return JsonResponse({'success': False, 'errors': {'barcode': [BARCODE_TAKEN]}}, status=409)
+
+
+class ItemCreateView(AsyncLoginRequiredMixin, View):
     login_url = 'login'
 
-    def post(self, request, inventory_id):
-        inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
+    async def post(self, request, inventory_id):
+        user = await request.auser()
+        try:
+            fields = parse_fields(request)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        inventory = await aget_object_or_404(Inventory, id=inventory_id, user=user)
+
+        await _load_form_data(request)
+        form = ItemForm(request.POST, request.FILES, user=user, inventory=inventory)
+        if await sync_to_async(form.is_valid)():
+            item = form.save(commit=False)
+            item.inventory = inventory
+            await _commit_image(item)
+            try:
+                await item.asave()
+            except IntegrityError:
+                return _barcode_conflict()
+            record(item, StockMovement.KIND_CREATE, item.quantity)
+            # Bumps the shared cache version: blocking I/O, kept off the event loop
+            await sync_to_async(autocomplete.item_saved)(user.id, item)
+            await sync_to_async(aggregates.invalidate)(user.id)
 
-        form = ItemForm(request.POST, request.FILES)
-        if form.is_valid():
-            with transaction.atomic():
-                item = form.save(commit=False)
-                item.inventory = inventory
-                item.save()
-
-                # ActivityLog removed
-
-            return JsonResponse({'success': True, 'item': {
-                'id': item.id,
-                'name': item.name,
-                'quantity': item.quantity,
-                'category': item.category.name if item.category else None,
-                'image_url': item.image.url if item.image else None,
-                'thumbnail_url': get_thumbnail(item.image, '300x300', quality=85).url if item.image else None,
-            }})
+            if item.image:
+                await run_blocking(refresh_item_variants, item, save=False)
+                await item.asave(update_fields=['image_variants'])
+
+            return FastJsonResponse({'success': True, 'item': serialize_item(item, fields)})
 
         return JsonResponse({'success': False, 'errors': form.errors}, status=400)
 
 
-class ItemUpdateView(LoginRequiredMixin, View):
+class ItemUpdateView(AsyncLoginRequiredMixin, View):
     login_url = 'login'
 
-    def post(self, request, inventory_id, item_id):
-        inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
-        item = get_object_or_404(Item, id=item_id, inventory=inventory)
+    async def post(self, request, inventory_id, item_id):
+        user = await request.auser()
+        try:
+            fields = parse_fields(request)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        item = await aget_object_or_404(
+            Item.objects.select_related('inventory', 'category'),
+            id=item_id, inventory_id=inventory_id,
+            inventory__user=user, inventory__deleted_at__isnull=True,
+        )
 
-        form = ItemForm(request.POST, request.FILES, instance=item)
-        if form.is_valid():
+        await _load_form_data(request)
+        previous_quantity = item.quantity
+        previous_names = (item.name, item.brand)
+        previous_image = item.image.name if item.image else None
+        form = ItemForm(request.POST, request.FILES, instance=item, user=user)
+        if await sync_to_async(form.is_valid)():
             remove_image = form.cleaned_data.get('remove_image')
-            with transaction.atomic():
-                item = form.save(commit=False)
-                if remove_image and item.image:
-                    item.image.delete(save=False)
-                    item.image = None
-                    # ActivityLog removed
-
-                item.save()
-                # ActivityLog removed
-
-            return JsonResponse({'success': True, 'item': {
-                'id': item.id,
-                'name': item.name,
-                'quantity': item.quantity,
-                'category': item.category.name if item.category else None,
-                'image_url': item.image.url if item.image else None,
-                'thumbnail_url': get_thumbnail(item.image, '300x300', quality=85).url if item.image else None,
-            }})
+            image_changed = remove_image or 'image' in form.changed_data
+            item = form.save(commit=False)
+            if remove_image:
+                item.image = None
+
+            await _commit_image(item)
+            try:
+                await item.asave()
+            except IntegrityError:
+                return _barcode_conflict()
+            record(item, StockMovement.KIND_ADJUST, item.quantity - previous_quantity)
+            await sync_to_async(autocomplete.item_saved)(user.id, item, previous_names)
+            await sync_to_async(aggregates.invalidate)(user.id)
+
+            if image_changed:
+                # Copied items share image files, so the old one is only
+                # deleted once nothing references it any more.
+                await run_blocking(refresh_item_variants, item, save=False, delete_stale=False)
+                await item.asave(update_fields=['image_variants'])
+                await sync_to_async(delete_unreferenced_images)([previous_image])
+
+            return FastJsonResponse({'success': True, 'item': serialize_item(item, fields)})
 
         return JsonResponse({'success': False, 'errors': form.errors}, status=400)
 
@@ -299,7 +426,11 @@ class ItemDeleteView(LoginRequiredMixin, View):
         try:
             inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
             item = get_object_or_404(Item, id=item_id, inventory=inventory)
+            removal = movement(item, StockMovement.KIND_DELETE, -item.quantity)
             item.delete()
+            record_movements([removal])
+            autocomplete.item_deleted(request.user.id, [item])
+            aggregates.invalidate(request.user.id)
             return JsonResponse({'success': True, 'message': 'Item deleted'})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
@@ -307,29 +438,46 @@ class ItemDeleteView(LoginRequiredMixin, View):
 
 @login_required(login_url='login')
 @require_http_methods(["POST"])
-def item_quantity_update(request, inventory_id, item_id):
-    inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
-    item = get_object_or_404(Item, id=item_id, inventory=inventory)
+async def item_quantity_update(request, inventory_id, item_id):
+    user = await request.auser()
+    item = await aget_object_or_404(Item.objects.owned_by(user), id=item_id, inventory_id=inventory_id)
     try:
         data = json.loads(request.body)
         action = data.get('action')
         amount = int(data.get('amount', 1))
+        previous_quantity = item.quantity
         if action == 'increase':
             item.quantity += amount
-            item.save()
-            # ActivityLog removed
+            await item.asave(update_fields=['quantity', 'updated_at'])
         elif action == 'decrease':
             item.quantity = max(0, item.quantity - amount)
-            item.save()
-            # ActivityLog removed
+            await item.asave(update_fields=['quantity', 'updated_at'])
         else:
             return JsonResponse({'success': False, 'error': 'Invalid action'}, status=400)
+        record(item, StockMovement.KIND_ADJUST, item.quantity - previous_quantity)
 
         return JsonResponse({'success': True, 'quantity': item.quantity})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def scan_item(request, inventory_id):
+    """Resolve a scanned barcode and adjust that item's quantity by ``delta`` (default 1)."""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    try:
+        result = scan(request.user, inventory_id, data.get('code'), data.get('delta', 1))
+    except ScanError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+    return FastJsonResponse({'success': True, 'item': result})
+
+
 @login_required(login_url='login')
 @require_http_methods(["POST"])
 def create_category(request):
@@ -338,30 +486,114 @@ def create_category(request):
         name = data.get('name', '').strip()
         if not name:
             return JsonResponse({'success': False, 'error': 'Category name required'}, status=400)
-        if Category.objects.filter(user=request.user, name__iexact=name).exists():
+        if category_name_taken(request.user, name):
             return JsonResponse({'success': False, 'error': 'Category already exists'}, status=400)
         cat = Category.objects.create(user=request.user, name=name)
+        aggregates.invalidate(request.user.id)
         return JsonResponse({'success': True, 'category': {'id': cat.id, 'name': cat.name}})
+    except IntegrityError:
+        return JsonResponse({'success': False, 'error': 'Category already exists'}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 @login_required(login_url='login')
-def item_detail_api(request, inventory_id, item_id):
+def category_list(request):
+    return JsonResponse({'success': True, 'categories': aggregates.category_counts(request.user)})
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def rename_category(request, category_id):
+    category = get_object_or_404(Category, id=category_id, user=request.user)
+    try:
+        name = json.loads(request.body).get('name', '').strip()
+        if not name:
+            return JsonResponse({'success': False, 'error': 'Category name required'}, status=400)
+        if len(name) > 100:
+            return JsonResponse({'success': False, 'error': 'Category name must be at most 100 characters'}, status=400)
+        if category_name_taken(request.user, name, exclude_id=category.id):
+            return JsonResponse({'success': False, 'error': 'Category already exists'}, status=400)
+        category.name = name
+        category.save(update_fields=['name'])
+        aggregates.invalidate(request.user.id)
+        return JsonResponse({'success': True, 'category': {'id': category.id, 'name': category.name}})
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    except IntegrityError:
+        return JsonResponse({'success': False, 'error': 'Category already exists'}, status=400)
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def merge_category(request, category_id):
+    """Move every item of this category into target_id and delete it"""
+    category = get_object_or_404(Category, id=category_id, user=request.user)
+    try:
+        target_id = json.loads(request.body).get('target_id')
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    target = Category.objects.filter(id=target_id, user=request.user).exclude(id=category.id).first()
+    if target is None:
+        return JsonResponse({'success': False, 'error': 'Target category not found'}, status=404)
+    moved = merge_categories(category, target)
+    aggregates.invalidate(request.user.id)
+    return JsonResponse({'success': True, 'moved': moved})
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def delete_category_view(request, category_id):
+    """Delete a category, optionally moving its items to reassign_to"""
+    category = get_object_or_404(Category, id=category_id, user=request.user)
+    try:
+        reassign_id = json.loads(request.body or '{}').get('reassign_to')
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    target = None
+    if reassign_id is not None:
+        target = Category.objects.filter(id=reassign_id, user=request.user).exclude(id=category.id).first()
+        if target is None:
+            return JsonResponse({'success': False, 'error': 'Target category not found'}, status=404)
+    moved = delete_category(category, reassign_to=target)
+    aggregates.invalidate(request.user.id)
+    return JsonResponse({'success': True, 'moved': moved})
+
+
+@login_required(login_url='login')
+@replica_reads
+async def item_detail_api(request, inventory_id, item_id):
+    user = await request.auser()
+    try:
+        fields = parse_fields(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    row = await item_values(
+        Item.objects.owned_by(user).filter(id=item_id, inventory_id=inventory_id).order_by(), fields
+    ).afirst()
+    if row is None:
+        raise Http404('No Item matches the given query.')
+    return FastJsonResponse({'success': True, 'item': serialize_item_row(row, fields)})
+
+
+@login_required(login_url='login')
+@replica_reads
+def item_list_api(request, inventory_id):
+    """One page of an inventory's items as JSON, serialized straight from ``values()`` rows."""
     inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
-    item = get_object_or_404(Item, id=item_id, inventory=inventory)
-    return JsonResponse({
+    try:
+        fields = parse_fields(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    items_qs = sort_items(Item.objects.filter(inventory=inventory), request.GET.get('sort'))
+    paginator = Paginator(item_values(items_qs, fields), 60)
+    page = paginator.get_page(request.GET.get('page'))
+    return FastJsonResponse({
         'success': True,
-        'item': {
-            'id': item.id,
-            'name': item.name,
-            'quantity': item.quantity,
-            'brand': item.brand,
-            'description': item.description,
-            'expiration_date': item.expiration_date.isoformat() if item.expiration_date else None,
-            'image_url': item.image.url if item.image else None,
-            'thumbnail_url': get_thumbnail(item.image, '300x', quality=85).url if item.image else None,
-        }
+        'items': serialize_rows(page.object_list, fields),
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'count': paginator.count,
     })
 
 
@@ -375,18 +607,37 @@ def bulk_action(request, inventory_id):
         item_ids = data.get('item_ids', [])
         amount = int(data.get('amount', 1))
         items = Item.objects.filter(id__in=item_ids, inventory=inventory)
-        if action == 'delete':
+        if action in ['move', 'copy']:
+            target = Inventory.objects.filter(id=data.get('target_inventory_id'), user=request.user).first()
+            if target is None:
+                return JsonResponse({'success': False, 'error': 'Target inventory not found'}, status=404)
+            if action == 'move':
+                count = move_items(items, target)
+            else:
+                count = copy_items(items, target)
+                autocomplete.invalidate(request.user.id)
+            aggregates.invalidate(request.user.id)
+            return JsonResponse({'success': True, 'count': count})
+        elif action == 'delete':
+            # delete() empties the queryset's cache, so keep the rows for bookkeeping
+            doomed = list(items)
+            removals = [movement(it, StockMovement.KIND_DELETE, -it.quantity) for it in doomed]
             items.delete()
+            record_movements(removals)
+            autocomplete.item_deleted(request.user.id, doomed)
+            aggregates.invalidate(request.user.id)
             return JsonResponse({'success': True})
         elif action in ['increase', 'decrease']:
+            changes = []
             for it in items:
+                previous_quantity = it.quantity
                 if action == 'increase':
                     it.quantity += amount
-                    # ActivityLog removed
                 else:
                     it.quantity = max(0, it.quantity - amount)
-                    # ActivityLog removed
                 it.save()
+                changes.append(movement(it, StockMovement.KIND_ADJUST, it.quantity - previous_quantity))
+            record_movements(changes)
             return JsonResponse({'success': True})
         else:
             return JsonResponse({'success': False, 'error': 'Unknown bulk action'}, status=400)
@@ -394,6 +645,145 @@ def bulk_action(request, inventory_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def restore_archived_items(request, inventory_id):
+    """Move archived items back into the inventory"""
+    inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
+    try:
+        data = json.loads(request.body)
+        item_ids = [int(pk) for pk in data.get('item_ids', [])]
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    return JsonResponse({'success': True, 'count': restore_items(inventory, item_ids)})
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def create_upload(request):
+    """Start a resumable image upload: ``{filename, size, sha256?}``"""
+    try:
+        data = json.loads(request.body)
+        upload = uploads.start(request.user, data.get('filename'), data.get('size'), data.get('sha256'))
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    except uploads.UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+    return JsonResponse({'success': True, 'upload': uploads.describe(upload)}, status=201)
+
+
+@login_required(login_url='login')
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+@never_cache
+def upload_detail(request, upload_id):
+    """GET the accepted offset, PATCH the next chunk (``Upload-Offset`` header) or DELETE the upload"""
+    upload = get_object_or_404(ImageUpload, id=upload_id, user=request.user)
+    if request.method == 'DELETE':
+        uploads.discard(upload)
+        return JsonResponse({'success': True})
+    if request.method == 'PATCH':
+        try:
+            uploads.write_chunk(upload, request)
+        except uploads.UploadError as e:
+            response = JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+            response['Upload-Offset'] = str(upload.offset)
+            return response
+    response = JsonResponse({'success': True, 'upload': uploads.describe(upload)})
+    response['Upload-Offset'] = str(upload.offset)
+    return response
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def attach_upload(request, inventory_id, item_id):
+    """Make a finished upload (``{upload_id}``) the item's image"""
+    item = get_object_or_404(Item.objects.owned_by(request.user), id=item_id, inventory_id=inventory_id)
+    try:
+        fields = parse_fields(request)
+        upload_id = uuid.UUID(str(json.loads(request.body).get('upload_id')))
+    except (json.JSONDecodeError, AttributeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    upload = get_object_or_404(ImageUpload, id=upload_id, user=request.user)
+    try:
+        uploads.attach(upload, item)
+    except uploads.UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+    return FastJsonResponse({'success': True, 'item': serialize_item(item, fields)})
+
+
+@login_required(login_url='login')
+@require_http_methods(["GET"])
+@replica_reads
+def item_autocomplete(request):
+    """Suggest existing item names and brands starting with ``q`` (``field`` limits it to one)"""
+    prefix = request.GET.get('q', '').strip()
+    field = request.GET.get('field')
+    if field is not None and field not in autocomplete.FIELDS:
+        return JsonResponse({'success': False, 'error': 'Unknown field.'}, status=400)
+    fields = (field,) if field else autocomplete.FIELDS
+    try:
+        limit = min(max(int(request.GET.get('limit', autocomplete.DEFAULT_LIMIT)), 1), autocomplete.MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid limit.'}, status=400)
+    if not prefix:
+        suggestions = {name: [] for name in fields}
+    else:
+        suggestions = autocomplete.suggest(request.user, prefix, fields, limit)
+    return FastJsonResponse({'success': True, 'suggestions': suggestions})
+
+
+@login_required(login_url='login')
+def cache_stats_api(request):
+    """Per-process hit/miss counters for every cache alias (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Staff access required.'}, status=403)
+    return JsonResponse({'success': True, 'caches': cache_stats()})
+
+
+@require_http_methods(["GET", "HEAD"])
+def protected_media(request, name):
+    """Uploaded images, for the owner of the item only"""
+    return serve_media(request, name)
+
+
+@never_cache
+def readiness(request):
+    """Startup/readiness probe: warms the process once and checks the database"""
+    try:
+        timings = ensure_warm()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError as exc:
+        return JsonResponse({'ready': False, 'error': str(exc)}, status=503)
+    return JsonResponse({'ready': True, 'warmup_ms': timings})
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def item_batch(request, inventory_id):
+    """Apply an ordered list of item operations in one transaction"""
+    inventory = get_object_or_404(Inventory, id=inventory_id, user=request.user)
+    try:
+        data = json.loads(request.body)
+        results, committed = apply_item_operations(
+            inventory, data.get('operations'), atomic=bool(data.get('atomic')),
+        )
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid request format.'}, status=400)
+    except BatchError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except IntegrityError:
+        # A concurrent request took a barcode after this batch validated it.
+        return JsonResponse({'success': False, 'committed': False, 'error': BARCODE_TAKEN}, status=409)
+    if committed:
+        autocomplete.invalidate(request.user.id)
+        aggregates.invalidate(request.user.id)
+
+    success = committed and all(r['success'] for r in results)
+    return JsonResponse({'success': success, 'committed': committed, 'results': results},
+                        status=200 if committed else 400)
+
+
 # ========================
 # User Settings Views
 # ========================
@@ -419,7 +809,7 @@ def change_email(request):
         current_password = data.get('current_password', '').strip()
         
         # Validate current password
-        if not authenticate(username=user.username, password=current_password):
+        if not verify_password(request, current_password):
             return JsonResponse({
                 'success': False,
                 'error': 'Current password is incorrect.'
@@ -437,7 +827,7 @@ def change_email(request):
             }, status=400)
         
         # Check if email already exists (case-insensitive)
-        if User.objects.filter(email__iexact=new_email).exclude(id=user.id).exists():
+        if email_in_use(new_email, exclude_user_id=user.id):
             return JsonResponse({
                 'success': False,
                 'error': 'This email is already in use by another account.'
@@ -476,7 +866,7 @@ def change_password(request):
         new_password = data.get('new_password', '').strip()
         
         # Validate current password
-        if not authenticate(username=user.username, password=current_password):
+        if not verify_password(request, current_password):
             return JsonResponse({
                 'success': False,
                 'error': 'Current password is incorrect.'
@@ -493,8 +883,9 @@ def change_password(request):
                 'error': f'Password validation failed: {str(e)}'
             }, status=400)
         
-        # Ensure new password is different from current
-        if authenticate(username=user.username, password=new_password):
+        # Ensure new password is different from current (already verified
+        # above, so a plain comparison avoids hashing a second time)
+        if new_password == current_password:
             return JsonResponse({
                 'success': False,
                 'error': 'New password must be different from your current password.'
@@ -537,7 +928,7 @@ def delete_account(request):
         current_password = data.get('current_password', '').strip()
         
         # Validate current password
-        if not authenticate(username=user.username, password=current_password):
+        if not verify_password(request, current_password):
             return JsonResponse({
                 'success': False,
                 'error': 'Current password is incorrect.'
@@ -550,16 +941,9 @@ def delete_account(request):
                 'error': f'Username confirmation does not match. Expected: {user.username}'
             }, status=400)
         
-        # Delete all user data in a transaction
-        with transaction.atomic():
-            # Delete all inventories (items will be cascade deleted)
-            Inventory.objects.filter(user=user).delete()
-            
-            # Delete all categories
-            Category.objects.filter(user=user).delete()
-            
-            # Delete the user account
-            user.delete()
+        # Deactivate now; inventories, items, categories and the user row
+        # are removed in the background by purge_deleted
+        soft_delete_account(user)
         
         # Log out the user (session will be invalid)
         logout(request)
@@ -0,0 +1,81 @@
+"""
+Process warm-up for scale-from-zero deployments.
+
+``warm_up`` does the work a cold process would otherwise do during its
+first requests: it compiles every project template into the cached
+template loader, populates the URL resolver, opens the database connection
+and touches each cache alias. ``start.sh`` runs it before the server takes
+traffic (``WARMUP_ON_START``, templates and URLs only) and the readiness
+endpoint runs the full warm-up on first use, so a startup probe pointed at
+it only passes once the process is warm.
+
+Heavy optional modules (Pillow, sorl's thumbnail engine) are deliberately
+not imported here; they load on the first request that resizes an image.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+
+_warm = None
+_lock = threading.Lock()
+
+
+def _project_templates():
+    """Template names under the configured template DIRS and this app's templates."""
+    roots = [Path(apps.get_app_config('accounts').path) / 'templates']
+    for engine in settings.TEMPLATES:
+        roots += [Path(d) for d in engine.get('DIRS', [])]
+    for root in roots:
+        if root.is_dir():
+            for path in sorted(root.rglob('*.html')):
+                yield path.relative_to(root).as_posix()
+
+
+def _timed(timings, step, func):
+    started = time.perf_counter()
+    func()
+    timings[step] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def warm_up(include_connections=True):
+    """
+    Prime templates and URLs, then (optionally) DB connections and caches.
+
+    Connections are skipped when called from ``AppConfig.ready()``, where
+    database access is not allowed yet. Returns ``{step: ms}``.
+    """
+    timings = {}
+    _timed(timings, 'templates', lambda: [get_template(name) for name in _project_templates()])
+    _timed(timings, 'url_resolver', lambda: get_resolver().reverse_dict)
+    if not include_connections:
+        return timings
+
+    def databases():
+        for alias in connections:
+            connections[alias].ensure_connection()
+    _timed(timings, 'databases', databases)
+
+    def cache_aliases():
+        for alias in settings.CACHES:
+            caches[alias].get('warmup:probe')
+    _timed(timings, 'caches', cache_aliases)
+    return timings
+
+
+def ensure_warm():
+    """Run ``warm_up`` once per process; returns the timings of that run."""
+    global _warm
+    if _warm is None:
+        with _lock:
+            if _warm is None:
+                _warm = warm_up()
+    return _warm
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,12 +44,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'accounts.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'accounts.throttle.ThrottleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'inventory_app.urls'
@@ -70,6 +74,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'inventory_app.wsgi.application'
 
+# Tests run with in-process caches and no background ledger flusher
+# (inventory_app/testing.py)
+TEST_RUNNER = 'inventory_app.testing.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -85,6 +93,140 @@ DATABASES = {
     }
 }
 
+# Read replicas: DB_REPLICAS is a comma-separated list of SQLite files (copies
+# of the primary, see sync_replicas) or, for other engines, replica host[:port]
+# entries that reuse the primary's credentials. Views marked @replica_reads
+# read from them; a client that wrote reads from the primary for
+# REPLICA_STICKY_SECONDS afterwards (accounts/routers.py).
+def _replica(entry):
+    config = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        config['NAME'] = entry
+    else:
+        config['HOST'], _, config['PORT'] = entry.partition(':')
+    return config
+
+
+DATABASE_REPLICAS = []
+for _index, _entry in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(','))):
+    DATABASES[f'replica{_index + 1}'] = _replica(_entry.strip())
+    DATABASE_REPLICAS.append(f'replica{_index + 1}')
+
+DATABASE_ROUTERS = ['accounts.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Each subsystem gets its own alias. Every alias is a two-tier cache
+# (accounts.cache.TieredCache): a bounded in-process LRU in front of a
+# shared tier. The shared tier is file-based under CACHE_DIR (with atomic
+# counters, accounts.cache.CounterFileBasedCache) unless
+# CACHE_SHARED_LOCATION points at a memcached server (host:port or
+# unix:/path/to/socket, requires pymemcache). Hit/miss counters are
+# available to staff at accounts/api/cache-stats/.
+
+CACHE_DIR = Path(os.environ.get('CACHE_DIR', '/tmp/inventory_app_cache'))
+CACHE_SHARED_LOCATION = os.environ.get('CACHE_SHARED_LOCATION', '')
+
+
+def _tiered_cache(alias, local_entries, local_timeout, shared_entries, timeout=300):
+    if CACHE_SHARED_LOCATION:
+        shared = {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_SHARED_LOCATION,
+            'KEY_PREFIX': alias,
+        }
+    else:
+        shared = {
+            'BACKEND': 'accounts.cache.CounterFileBasedCache',
+            'LOCATION': CACHE_DIR / alias,
+            'OPTIONS': {'MAX_ENTRIES': shared_entries},
+        }
+    shared['TIMEOUT'] = timeout
+    return {
+        'BACKEND': 'accounts.cache.TieredCache',
+        'LOCATION': alias,
+        'TIMEOUT': timeout,
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': local_entries,
+            'LOCAL_TIMEOUT': local_timeout,
+            'SHARED': shared,
+        },
+    }
+
+
+CACHES = {
+    'default': _tiered_cache('default', local_entries=1000, local_timeout=30, shared_entries=10000),
+    # sorl-thumbnail key/value store: entries are effectively immutable
+    'thumbnails': _tiered_cache('thumbnails', local_entries=5000, local_timeout=3600,
+                                shared_entries=100000, timeout=None),
+    # Short local lifetime so a logout in one process is seen quickly by the others
+    'sessions': _tiered_cache('sessions', local_entries=5000, local_timeout=5,
+                              shared_entries=100000, timeout=60 * 60 * 24 * 14),
+    # Rendered template fragments ({% cache ... using="views" %})
+    'views': _tiered_cache('views', local_entries=500, local_timeout=60, shared_entries=5000),
+    # Per-user query results such as category item counts (accounts/aggregates.py)
+    'aggregates': _tiered_cache('aggregates', local_entries=2000, local_timeout=30, shared_entries=20000),
+    # Throttle counters; incr always goes to the shared tier, which must
+    # increment atomically (ThrottleMiddleware refuses to start otherwise)
+    'throttle': _tiered_cache('throttle', local_entries=1000, local_timeout=1, shared_entries=100000),
+}
+
+THUMBNAIL_CACHE = 'thumbnails'
+
+
+# Throttling (accounts/throttle.py): token buckets per URL name, per user when
+# logged in and per IP otherwise, checked before the view runs. Rates are
+# 'tokens/period' with period s, m, h or d (e.g. '100/15m'); only POST, PUT,
+# PATCH and DELETE requests spend tokens. THROTTLE_PROXY_COUNT is the number of
+# trusted proxies appending to X-Forwarded-For: 1 behind the shipped nginx or
+# Cloud Run; set 0 only when clients connect to Django directly, or every
+# anonymous client shares the proxy's address (and its login bucket).
+THROTTLE_RATES = {
+    # Password hashing
+    'login': '10/m',
+    'register': '5/m',
+    'change_password': '5/m',
+    'change_email': '5/m',
+    'delete_account': '3/m',
+    # Item and inventory mutations
+    'create_item': '60/m',
+    'update_item': '60/m',
+    'delete_item': '60/m',
+    'item_quantity_update': '240/m',
+    'scan_item': '100/s',  # handheld scanners send bursts
+    'bulk_action': '30/m',
+    'item_batch': '30/m',
+    'restore_archived_items': '30/m',
+    # Resumable uploads: one request per chunk
+    'create_upload': '30/m',
+    'upload_detail': '600/m',
+    'attach_upload': '30/m',
+    'create_inventory': '30/m',
+    'duplicate_inventory': '10/m',
+}
+THROTTLE_PROXY_COUNT = int(os.environ.get('THROTTLE_PROXY_COUNT', 1))
+
+# Staff can profile one request with ?profile=1 (or ?profile=cprofile) when
+# PROFILE_DIR is set; results land there (accounts/profiling.py). Unset, the
+# profiling middleware is not loaded at all.
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+
+
+# Sessions and messages
+# cached_db reads sessions from the 'sessions' cache and only touches the
+# database when a session changes. Set SESSION_ENGINE to
+# django.contrib.sessions.backends.cache to drop database writes entirely
+# (sessions then live only as long as the cache does).
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Flash messages travel in a signed cookie so adding one never modifies
+# (and re-saves) the session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -105,6 +247,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER selects the algorithm for new and upgraded hashes:
+# 'pbkdf2' (default), 'scrypt', or 'argon2' (requires argon2-cffi).
+# The remaining hashers stay enabled so existing hashes still verify and
+# are re-encoded with the preferred algorithm/cost on the next login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'accounts.hashers.TunablePBKDF2PasswordHasher',
+    'scrypt': 'accounts.hashers.TunableScryptPasswordHasher',
+    'argon2': 'accounts.hashers.TunableArgon2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Cost parameters; unset (0) means Django's default for that algorithm.
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 0))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 0))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 0))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 0))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -123,19 +291,96 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed names plus .gz/.br copies of text assets
+# (served by nginx with gzip_static); see accounts/storage.py
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'accounts.storage.CompressedManifestStaticFilesStorage'},
+}
+
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Behind nginx, set to its internal media location (e.g. '/protected-media/')
+# so files are streamed by nginx after the ownership check; empty serves them
+# from Django
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+
+# Resumable image uploads (accounts/uploads.py). Part files must be on the
+# same filesystem as MEDIA_ROOT so finished uploads are renamed, not copied;
+# cleanup_uploads removes uploads untouched for UPLOAD_EXPIRY_HOURS.
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', str(MEDIA_ROOT / 'partial'))
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 50 * 1024 * 1024))
+UPLOAD_CHUNK_MAX_SIZE = 4 * 1024 * 1024  # below nginx's client_max_body_size
+UPLOAD_MAX_PENDING = 10  # per user
+UPLOAD_EXPIRY_HOURS = 24
+
+# Threads available to async views for blocking image/storage work
+BLOCKING_IO_WORKERS = int(os.environ.get('BLOCKING_IO_WORKERS', 4))
+
+# Widths (px) pre-rendered for every item image and offered via srcset
+ITEM_IMAGE_VARIANT_WIDTHS = [160, 320, 640]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Default file storage for uploaded media
+# Default file storage for uploaded media (still read by sorl-thumbnail)
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
 # Authentication settings
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Seconds the authentication middleware may reuse a cached user row (0 disables)
+AUTH_USER_CACHE_TIMEOUT = 30
+
+# Users whose name/brand autocomplete index each process keeps in memory
+# (least recently used dropped first; accounts/autocomplete.py)
+AUTOCOMPLETE_USERS = int(os.environ.get('AUTOCOMPLETE_USERS', 500))
+
+# Stock movements are buffered per process and written in one INSERT once
+# this many are pending or the oldest has waited this many seconds (checked
+# after each request and by a background thread)
+STOCK_LEDGER_FLUSH_SIZE = int(os.environ.get('STOCK_LEDGER_FLUSH_SIZE', 50))
+STOCK_LEDGER_FLUSH_SECONDS = int(os.environ.get('STOCK_LEDGER_FLUSH_SECONDS', 5))
+STOCK_LEDGER_BACKGROUND_FLUSH = True
+
+# Consumption forecasts: average usage over the window, suggest reordering
+# when an item runs out within the lead time, enough to cover the cover days
+FORECAST_WINDOW_DAYS = 30
+FORECAST_LEAD_DAYS = 7
+FORECAST_COVER_DAYS = 14
+
+# Items at or below this quantity are low on stock; items expiring within
+# EXPIRY_ALERT_DAYS are expiring soon (badges and send_alerts digests)
+LOW_STOCK_THRESHOLD = 3
+EXPIRY_ALERT_DAYS = 7
+
+# archive_items moves items out of the live table once they have been at
+# quantity 0, or expired, for this many days without being edited. Archived
+# items can be shown and restored from the inventory page. 0 turns a rule off.
+ARCHIVE_RULES = {
+    'consumed_after_days': int(os.environ.get('ARCHIVE_CONSUMED_DAYS', 30)),
+    'expired_after_days': int(os.environ.get('ARCHIVE_EXPIRED_DAYS', 90)),
+}
+
+# Where send_alerts delivers digests: ConsoleNotifier, FileNotifier
+# (appends to ALERT_FILE_PATH) or EmailNotifier (Django's email backend)
+ALERT_NOTIFIER = os.environ.get('ALERT_NOTIFIER', 'accounts.notifications.ConsoleNotifier')
+ALERT_FILE_PATH = os.environ.get('ALERT_FILE_PATH', str(BASE_DIR / 'alerts.log'))
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'inventory@localhost')
+
+# Compile templates and load URLconfs while the process boots (start.sh sets
+# this) instead of during the first requests after a scale-from-zero
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'False') == 'True'
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
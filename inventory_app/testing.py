@@ -0,0 +1,46 @@
+"""
+Test runner that applies the settings a test run needs.
+
+The overrides are applied with ``override_settings`` when the test
+environment is set up, so they hold however the runner is invoked
+(``manage.py test``, a ``runtests`` script calling ``get_runner``):
+
+* every cache alias is a fresh in-process ``LocMemCache``, so nothing is
+  shared through the on-disk tier with other runs or a running server;
+* the ``views`` and ``aggregates`` aliases are dummies: their entries are
+  keyed by user id, which the test database hands out again after each
+  test's rollback. Tests of that caching switch them back on;
+* static files use the plain storage: there is no manifest to look up,
+  and outside ``DEBUG`` the manifest storage refuses to run without one;
+* the stock ledger's background flusher is off; tests flush explicitly.
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def overrides():
+    """The settings every test runs under (also usable from other runners)."""
+    caches = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+        for alias in settings.CACHES
+    }
+    for alias in ('views', 'aggregates'):
+        caches[alias] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    storages = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+    return {'CACHES': caches, 'STORAGES': storages, 'STOCK_LEDGER_BACKGROUND_FLUSH': False}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._overrides = override_settings(**overrides())
+        self._overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._overrides.disable()
+        super().teardown_test_environment(**kwargs)
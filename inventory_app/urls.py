@@ -18,13 +18,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 from django.conf import settings
-from django.conf.urls.static import static
+from accounts.views import protected_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('', RedirectView.as_view(url='accounts/login/', permanent=False)),
+    # Media is private: ownership is checked before the file (or an nginx
+    # X-Accel-Redirect to it) is returned
+    path(settings.MEDIA_URL.lstrip('/') + '<path:name>', protected_media, name='media'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
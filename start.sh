@@ -1,3 +1,8 @@
 #!/bin/bash
-# Start Django on the PORT environment variable (default 8080 for Cloud Run)
-python manage.py runserver 0.0.0.0:${PORT:-8080}
+# Start Django on the PORT environment variable (default 8080 for Cloud Run).
+# --noreload avoids booting a second (autoreloader) process, --skip-checks skips
+# the system checks (the Dockerfile already runs manage.py check --deploy), and
+# WARMUP_ON_START compiles templates and URLconfs before the first request
+# instead of during it.
+export WARMUP_ON_START=${WARMUP_ON_START:-True}
+exec python manage.py runserver 0.0.0.0:${PORT:-8080} --noreload --skip-checks